@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Measures what tracking costs on top of plain DEAP.
+
+Every workload runs once untracked and once per adapter, each in a fresh
+process so that the peak RSS belongs to that run only. Tracking does not draw
+random numbers, so all runs of a workload evolve the exact same individuals
+and the difference in run time is the tracking overhead.
+
+    python -m benchmarks.tracking --output bench.json
+    python -m benchmarks.tracking --workloads onemax --adapters array log --sizes 500x1000x20
+    python -m benchmarks.tracking --compare bench.json --threshold 1.25
+
+``--add-node`` also times ``ArrayAdapter.add_node`` alone (gene packing and
+interning included) for the gene shapes of the workloads; it is reported as
+``add_node_ns``, in nanoseconds per node.
+
+    python -m benchmarks.tracking --workloads onemax --adapters array --add-node
+
+With ``--compare``, the exit status is 1 if the per-individual overhead of any
+run grew by more than ``--threshold`` times the one in the baseline file.
+"""
+
+import argparse
+import contextlib
+import json
+import operator
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKLOADS = ('nsga2', 'tournament', 'onemax')
+# `-threaded` variants write from a background thread, see peaviz.adapters.threaded
+ADAPTERS = {
+    'none'           : None,
+    'graph'          : 'GraphAdapter',
+    'array'          : 'ArrayAdapter',
+    'log'            : 'LogAdapter',
+    'graph-threaded' : 'GraphAdapter',
+    'array-threaded' : 'ArrayAdapter',
+    'log-threaded'   : 'LogAdapter'
+}
+# (MU, LAMBDA, NGEN), LAMBDA is only used by nsga2
+SIZES = ((50, 100, 40), (500, 1000, 40), (5000, 10000, 10))
+
+SEED = 64
+NBR_ITEMS = 20
+MAX_ITEM = 50
+MAX_WEIGHT = 50
+ONEMAX_LENGTH = 100
+
+def untracked(algorithm):
+    def mate(*parents, generation, otherAttrs):
+        return algorithm(*parents)
+    return mate
+
+def tracked(algorithm, tracker):
+    """
+    @brief      ``breedAndTrack`` of the samples.
+    """
+    def mate(*parents, generation, otherAttrs):
+        children = algorithm(*parents)
+        parentConcreteIds = [p.cid for p in parents]
+        newConcreteIds = [tracker.deploy(c, generation, parentConcreteIds) for c in children]
+        for child, newCid in zip(children, newConcreteIds):
+            child.cid = newCid
+            tracker.setParents(newCid, parentConcreteIds, generation, otherAttrs)
+            tracker.checkAndAddMirror(newCid, child, generation, otherAttrs)
+        return children
+    return mate
+
+def cxSet(ind1, ind2):
+    temp = set(ind1)
+    ind1 &= ind2
+    ind2 ^= temp
+    return ind1, ind2
+
+def mutSet(individual):
+    if random.random() < 0.5:
+        if len(individual) > 0:
+            individual.remove(random.choice(sorted(tuple(individual))))
+    else:
+        individual.add(random.randrange(NBR_ITEMS))
+    return individual,
+
+def build(workload, tracker):
+    """
+    @brief      The DEAP toolbox of ``workload``, tracked by ``tracker`` unless
+                it is ``None``.
+    """
+    from deap import base, creator, tools
+
+    creator.create("Fitness", base.Fitness,
+        weights=(1.0,) if workload == 'onemax' else (-1.0, 1.0))
+    creator.create("Individual", set if workload != 'onemax' else list,
+        fitness=creator.Fitness, cid=int)
+    toolbox = base.Toolbox()
+
+    def maker(icls, attr, dimension):
+        individual = tools.initRepeat(icls, attr, dimension)
+        if tracker is not None:
+            individual.cid = tracker.deploy(individual)
+        return individual
+
+    if workload == 'onemax':
+        toolbox.register("attr", random.randint, 0, 1)
+        toolbox.register("individual", maker, creator.Individual, toolbox.attr, ONEMAX_LENGTH)
+        crossover = tools.cxTwoPoint
+        toolbox.register("mutate", tools.mutFlipBit, indpb=0.05)
+        toolbox.register("select", tools.selTournament, tournsize=3)
+
+        def evaluate(individual):
+            fitness = (sum(individual),)
+            if tracker is not None:
+                tracker.updateEvaluation(individual.cid, fitness, fitness[0])
+            return fitness
+    else:
+        items = [(random.randint(1, 10), random.uniform(0, 100)) for _ in range(NBR_ITEMS)]
+        toolbox.register("attr", random.randrange, NBR_ITEMS)
+        toolbox.register("individual", maker, creator.Individual, toolbox.attr, 5)
+        crossover = cxSet
+        toolbox.register("mutate", mutSet)
+        if workload == 'nsga2':
+            toolbox.register("select", tools.selNSGA2)
+        else:
+            toolbox.register("select", tools.selTournament, tournsize=3)
+
+        def evaluate(individual):
+            weight = sum(items[item][0] for item in individual)
+            value = sum(items[item][1] for item in individual)
+            if len(individual) > MAX_ITEM or weight > MAX_WEIGHT:
+                return 10000, 0
+            fitness = weight, value
+            if tracker is not None:
+                tracker.updateEvaluation(individual.cid, fitness,
+                    sum(map(operator.mul, individual.fitness.weights, fitness)))
+            return fitness
+
+    toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+    toolbox.register("evaluate", evaluate)
+    toolbox.register("mate", untracked(crossover) if tracker is None else tracked(crossover, tracker))
+    return toolbox
+
+def evolve(workload, toolbox, mu, lambda_, ngen, tracker=None):
+    """
+    @brief      Runs the GA of the samples, every generation (0 being the
+                initial population) tracked as one batch by ``tracker``.
+
+    @return     The number of evaluations.
+    """
+    import peaviz.algorithms
+
+    def evaluate(individuals):
+        invalid = [ind for ind in individuals if not ind.fitness.valid]
+        for ind, fit in zip(invalid, map(toolbox.evaluate, invalid)):
+            ind.fitness.values = fit
+        return len(invalid)
+
+    def generation(gen):
+        return contextlib.nullcontext() if tracker is None else tracker.generation(gen)
+
+    with generation(0):
+        pop = toolbox.population(n=mu)
+        nevals = evaluate(pop)
+    for gen in range(1, ngen + 1):
+        with generation(gen):
+            if workload == 'nsga2':
+                offspring = peaviz.algorithms.varOr(pop, toolbox, lambda_, 0.7, 0.2, gen)
+                nevals += evaluate(offspring)
+                pop[:] = toolbox.select(pop + offspring, mu)
+            else:
+                offspring = toolbox.select(pop, len(pop))
+                offspring = peaviz.algorithms.varAnd(offspring, toolbox, 0.5, 0.3, gen)
+                nevals += evaluate(offspring)
+                pop[:] = offspring
+    return nevals
+
+def run(config):
+    """
+    @brief      One benchmark run, in the current process.
+    """
+    import peaviz.adapters
+    import peaviz.trackers
+
+    os.chdir(config['directory'])
+    random.seed(config['seed'])
+
+    tracker = None
+    if config['adapter'] != 'none':
+        adapterClass = getattr(peaviz.adapters, ADAPTERS[config['adapter']])
+        tracker = peaviz.trackers.TrackerBase(adapterClass,
+            threaded=config['adapter'].endswith('-threaded'),
+            seed_str=str(config['seed']),
+            name='%s-%s-%d' % (config['workload'], config['adapter'], config['mu']))
+    toolbox = build(config['workload'], tracker)
+
+    start = time.perf_counter()
+    nevals = evolve(config['workload'], toolbox, config['mu'], config['lambda'], config['ngen'],
+                    tracker)
+    seconds = time.perf_counter() - start
+
+    result = dict(config, seconds=seconds, evaluations=nevals)
+    if tracker is not None:
+        result['nodes'] = tracker.numNodes()
+        start = time.perf_counter()
+        # waits for the writer thread of threaded adapters
+        tracker.adapter.save()
+        result['save_seconds'] = time.perf_counter() - start
+    result['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    del result['directory']
+    return result
+
+def add_node_cost(count=20000, repeat=5, seed=SEED):
+    """
+    @brief      Nanoseconds per ``ArrayAdapter.add_node``, the fastest of
+                ``repeat`` runs of ``count`` distinct genes, per gene shape.
+    """
+    from peaviz.adapters import ArrayAdapter
+
+    rng = random.Random(seed)
+    shapes = {
+        'bits-%d' % ONEMAX_LENGTH : lambda: [rng.randint(0, 1) for _ in range(ONEMAX_LENGTH)],
+        'ints-%d' % ONEMAX_LENGTH : lambda: [rng.randrange(NBR_ITEMS) for _ in range(ONEMAX_LENGTH)],
+        'set-5'                   : lambda: set(rng.sample(range(NBR_ITEMS), 5))
+    }
+    costs = {}
+    for shape, make in shapes.items():
+        genes = [make() for _ in range(count)]
+        best = float('inf')
+        for _ in range(repeat):
+            adapter = ArrayAdapter('0', 'add-node', capacity=count)
+            add_node = adapter.add_node
+            start = time.perf_counter()
+            for gene in genes:
+                add_node(gene)
+            best = min(best, time.perf_counter() - start)
+        costs[shape] = round(1e9 * best / count)
+    return costs
+
+def spawn(config):
+    """
+    @brief      Runs ``config`` in a fresh interpreter.
+    """
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.tracking', '--worker', json.dumps(config)],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if completed.returncode:
+        result = dict(config, error=completed.stderr.strip().splitlines()[-1])
+        del result['directory']
+        return result
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def benchmark(workloads, adapters, sizes, repeat=1, seed=SEED):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        os.mkdir(os.path.join(directory, 'graphs'))
+        for workload in workloads:
+            for mu, lambda_, ngen in sizes:
+                baseline = None
+                for adapter in ['none'] + [a for a in adapters if a != 'none']:
+                    config = {'workload': workload, 'adapter': adapter, 'seed': seed,
+                              'mu': mu, 'lambda': lambda_, 'ngen': ngen, 'directory': directory}
+                    runs = [spawn(config) for _ in range(repeat)]
+                    result = min(runs, key=lambda r: r.get('seconds', float('inf')))
+                    if adapter == 'none':
+                        baseline = result
+                    elif 'error' not in result and 'error' not in baseline:
+                        result['overhead_seconds'] = result['seconds'] - baseline['seconds']
+                        result['overhead_per_individual_ns'] = \
+                            1e9 * result['overhead_seconds'] / result['nodes']
+                    results.append(result)
+                    print(json.dumps(result), file=sys.stderr)
+    return results
+
+def regressions(results, baseline, threshold):
+    """
+    @brief      The results whose per-individual overhead grew by more than
+                ``threshold`` times the matching run of ``baseline``.
+    """
+    key = lambda r: (r['workload'], r['adapter'], r['mu'], r['lambda'], r['ngen'])
+    previous = {key(r): r for r in baseline['results']}
+    slower = []
+    for result in results:
+        before = previous.get(key(result), {}).get('overhead_per_individual_ns')
+        after = result.get('overhead_per_individual_ns')
+        if before and after and after > threshold * before:
+            slower.append(result)
+    return slower
+
+def parse_size(size):
+    return tuple(int(n) for n in size.split('x'))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument('--adapters', nargs='+', choices=list(ADAPTERS), default=list(ADAPTERS))
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=list(SIZES),
+        help='MUxLAMBDAxNGEN')
+    parser.add_argument('--repeat', type=int, default=1, help='keep the fastest of N runs')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='baseline JSON report')
+    parser.add_argument('--threshold', type=float, default=1.25)
+    parser.add_argument('--add-node', action='store_true', help='also time ArrayAdapter.add_node alone')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run(json.loads(args.worker))))
+        sys.exit(0)
+
+    report = {
+        'python'  : sys.version.split()[0],
+        'results' : benchmark(args.workloads, args.adapters, args.sizes, args.repeat, args.seed)
+    }
+    if args.add_node:
+        report['add_node_ns'] = add_node_cost(seed=args.seed)
+        print(json.dumps(report['add_node_ns']), file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            slower = regressions(report['results'], json.load(f), args.threshold)
+        for result in slower:
+            print('REGRESSION', json.dumps(result), file=sys.stderr)
+        sys.exit(1 if slower else 0)
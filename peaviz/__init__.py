@@ -5,4 +5,22 @@ Track evolution dynamics
 """
 __author__ = 'Ananya Bahadur'
 __verison__ = '0.1'
-from .tracker import Tracker, TrackerHub
+
+# name -> module, imported on first access (`gephistreamer` is only needed by
+# the GraphStream trackers)
+_LAZY = {
+    'Tracker'    : '.tracker',
+    'TrackerHub' : '.tracker'
+}
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    import importlib
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
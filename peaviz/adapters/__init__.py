@@ -1,2 +1,29 @@
-from .adapter_base import AdapterBase
-from .graph_adapter import GraphAdapter
+# name -> module, imported on first access so that `import peaviz.adapters`
+# loads neither graph-tool nor the neo4j driver, see `peaviz.registry`
+_LAZY = {
+    'AdapterBase'  : '.adapter_base',
+    'ArrayAdapter' : '.array_adapter',
+    'LogAdapter'   : '.log_adapter',
+    'LogReader'    : '.log_adapter',
+    'Neo4jAdapter' : '.neo4j_adapter',
+    'ShardReader'  : '.shards',
+    'FanOutAdapter': '.fanout',
+    'ThreadedAdapter': '.threaded',
+    'GraphAdapter' : '.graph_adapter'
+}
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    import importlib
+    try:
+        value = getattr(importlib.import_module(module, __name__), name)
+    except ImportError as error:
+        # graph-tool is optional, ArrayAdapter works without it
+        raise AttributeError('%s is unavailable: %s' % (name, error)) from error
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
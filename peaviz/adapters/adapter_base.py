@@ -1,5 +1,103 @@
+from .genotype import GenotypeStore
+import numpy
+import os.path
+import shutil
+
+def ancestry_mask(numNodes, src, dst, seeds):
+    """
+    @brief      Marks ``seeds`` and every node with a path to one of them.
+
+    @param      numNodes  Number of nodes
+    @param      src       Edge sources
+    @param      dst       Edge targets
+    @param      seeds     Node IDs
+
+    @return     A boolean array of ``numNodes`` rows.
+    """
+    # in-edges grouped by target, CSR style
+    order = numpy.argsort(dst, kind='stable')
+    sources = numpy.asarray(src)[order]
+    indptr = numpy.searchsorted(numpy.asarray(dst)[order], numpy.arange(numNodes + 1))
+
+    reached = numpy.zeros(numNodes, dtype=bool)
+    frontier = numpy.unique(numpy.asarray(seeds, dtype=numpy.int64))
+    reached[frontier] = True
+    while len(frontier):
+        starts, counts = indptr[frontier], indptr[frontier + 1] - indptr[frontier]
+        offsets = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        parents = sources[numpy.repeat(starts, counts) + offsets]
+        frontier = numpy.unique(parents[~reached[parents]])
+        reached[frontier] = True
+    return reached
+
+def new_run_directory(path, marker):
+    """
+    @brief      Creates the directory of a run. A previous run with the same
+                name (a directory holding ``marker``) is replaced, like
+                ``GraphAdapter`` overwrites ``graphs/<name>.gml``.
+
+    @param      marker  A file every run directory of this format holds
+
+    @exception  FileExistsError  ``path`` exists but is not such a run
+    """
+    if os.path.isdir(path) and (os.path.exists(os.path.join(path, marker))
+                                or not os.listdir(path)):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        raise FileExistsError('%s exists and is not a previous run (no %s), '
+                              'remove it or choose another name' % (path, marker))
+    os.makedirs(path)
+
 class AdapterBase():
 
+    # methods timed when the tracker is profiled, see ``peaviz.profiling``
+    OPERATIONS = ('add_node', 'add_edge', 'update_fitness', 'update_score',
+        'update_evaluations', 'index_gene', 'link_chain', 'fetchIndividual', 'walk_edge',
+        'getNode', 'getEdge', 'flush', 'prune', 'save')
+
+    def __init__(self, chain_tags=('EVOLVE',)):
+        """
+        @param      chain_tags  Edge labels forming linear chains (like the
+                                EVOLVE chain of mirror nodes) whose tail is
+                                cached for ``walk_edge``.
+        """
+        # every distinct genome, stored once
+        self.genotypes = GenotypeStore()
+        # genotype ID -> ID of the latest node carrying it
+        self._gene_index = {}
+        # node ID -> the node it replaced in `_gene_index`
+        self._shadowed = {}
+        # per chain tag: node ID -> chain head, chain head -> chain tail
+        self._chain_heads = {TAG: {} for TAG in chain_tags}
+        self._chain_tails = {TAG: {} for TAG in chain_tags}
+
+    def index_gene(self, gene, nodeID):
+        """
+        @brief      Interns ``gene`` and records ``nodeID`` as the latest node
+                    carrying it. Adapters call this from ``add_node``.
+
+        @return     The genotype ID of ``gene``, see ``self.genotypes``.
+        """
+        genotypeID = self.genotypes.intern(gene)
+        previousID = self._gene_index.get(genotypeID)
+        if previousID is not None:
+            self._shadowed[nodeID] = previousID
+        self._gene_index[genotypeID] = nodeID
+        return genotypeID
+
+    def link_chain(self, TAG, srcID, destID):
+        """
+        @brief      Extends the chain ``srcID`` belongs to with ``destID``.
+                    Adapters call this from ``add_edge``; it is a no-op for
+                    tags that are not in ``chain_tags``.
+        """
+        heads = self._chain_heads.get(TAG)
+        if heads is None:
+            return
+        head = heads.get(srcID, srcID)
+        heads[destID] = head
+        self._chain_tails[TAG][head] = destID
+
     def add_node(self, gene, gen=0, attr={}):
         return 0
 
@@ -12,14 +110,155 @@ class AdapterBase():
     def getEdge(self, edgeID):
         pass
 
-    def fetchIndividual(self, individual):
-        pass
+    def fetchIndividual(self, individual, exclude=None):
+        """
+        @brief      Finds the latest node whose gene equals ``individual``.
+
+        @param      individual  The individual
+        @param      exclude     Only nodes older than this ID are returned,
+                                typically the node just deployed for
+                                ``individual``: identical siblings deployed
+                                after it must not become its predecessors.
+
+        @return     The node ID, or ``None`` if this gene was never added.
+        """
+        genotypeID = self.genotypes.lookup(individual)
+        nodeID = self._gene_index.get(genotypeID)
+        if exclude is not None:
+            while nodeID is not None and nodeID >= exclude:
+                nodeID = self._shadowed.get(nodeID)
+        return nodeID
 
     def walk_edge(self, TAG, startID):
-        pass
+        """
+        @brief      Follows ``TAG`` edges from ``startID`` to the last node of
+                    the chain, in constant time for ``chain_tags``.
+
+        @return     The ID of the last node, ``startID`` if it has no such
+                    out-edge.
+        """
+        head = self._chain_heads[TAG].get(startID, startID)
+        return self._chain_tails[TAG].get(head, startID)
+
+    def prune(self, liveIDs, before_gen, archive=False):
+        """
+        @brief      Removes the nodes created before generation ``before_gen``
+                    that have no path to a node of ``liveIDs``, and their
+                    edges. Remaining nodes are renumbered densely, in the same
+                    order; edge IDs are renumbered too.
+
+        @param      liveIDs     Node IDs of the living individuals
+        @param      before_gen  Newer nodes are kept, they may still get
+                                descendants
+        @param      archive     Also write the removed nodes and edges (with
+                                their old IDs) to
+                                ``graphs/<name>.pruned-<before_gen>.npz``
+
+        @return     An array mapping old node IDs to new ones, ``-1`` for
+                    removed nodes.
+
+        Adapters whose nodes are already written out with their IDs (log
+        files, a database, generation segments) cannot renumber them; they
+        keep every node and return the identity.
+        """
+        return numpy.arange(self.numNodes(), dtype=numpy.int64)
+
+    def _archive_filename(self, before_gen):
+        return os.path.join('graphs', '%s.pruned-%d.npz' % (self.name, before_gen))
+
+    def _reindex(self, remap, genotypes):
+        """
+        @brief      Rebuilds the gene index and the chain caches after
+                    ``prune``.
+
+        @param      remap      Old node ID -> new node ID, ``-1`` if removed
+        @param      genotypes  Genotype IDs of the remaining nodes
+        """
+        nodeIDs = numpy.arange(len(genotypes))
+        order = numpy.lexsort((nodeIDs, genotypes))
+        sorted_genotypes = numpy.asarray(genotypes)[order]
+        same = sorted_genotypes[1:] == sorted_genotypes[:-1]
+        last = numpy.append(~same, True)
+        self._gene_index = dict(zip(sorted_genotypes[last].tolist(), order[last].tolist()))
+        self._shadowed = dict(zip(order[1:][same].tolist(), order[:-1][same].tolist()))
+
+        # removed nodes are never followed by remaining ones in a chain (their
+        # successors would be their descendants), so chains only lose a suffix
+        remap = remap.tolist()
+        for TAG, heads in self._chain_heads.items():
+            newHeads, newTails = {}, {}
+            for nodeID, head in heads.items():
+                nodeID, head = remap[nodeID], remap[head]
+                if nodeID >= 0 and head >= 0:
+                    newHeads[nodeID] = head
+                    newTails[head] = max(newTails.get(head, head), nodeID)
+            self._chain_heads[TAG] = newHeads
+            self._chain_tails[TAG] = newTails
+
+    def load_tables(self, nodes, edges, labels, genotypes):
+        """
+        @brief      Appends the nodes and edges of a node and edge table (see
+                    ``peaviz.adapters.tables``), in order. Used to restore a
+                    checkpoint.
+
+        @param      labels     Edge labels, indexed by ``edges['label']``
+        @param      genotypes  A ``GenotypeStore`` indexed by
+                               ``nodes['genotype']``
+
+        @return     The ID of the first appended node.
+        """
+        self.begin_batch()
+        firstID = None
+        for genotypeID, gen in zip(nodes['genotype'].tolist(), nodes['gen'].tolist()):
+            nodeID = self.add_node(genotypes.get(genotypeID), gen)
+            if firstID is None:
+                firstID = nodeID
+        for src, dst, label, gen in zip(edges['src'].tolist(), edges['dst'].tolist(),
+                                        edges['label'].tolist(), edges['gen'].tolist()):
+            self.add_edge(labels[label], src, dst, {'gen': gen})
+        fitnesses, scores = {}, {}
+        for offset, (fitness, score) in enumerate(zip(nodes['fitness'], nodes['score'].tolist())):
+            fitness = fitness[~numpy.isnan(fitness)]
+            if len(fitness):
+                fitnesses[firstID + offset] = fitness.tolist()
+            if not numpy.isnan(score):
+                scores[firstID + offset] = score
+        self.update_evaluations(fitnesses, scores)
+        self.flush()
+        return firstID
 
     def update_fitness(self, nodeID, fitness):
         pass
 
+    def update_score(self, nodeID, score):
+        pass
+
+    def update_evaluations(self, fitnesses, scores):
+        """
+        @brief      Applies many fitness and score updates at once. Adapters
+                    with columnar storage override this with vectorized writes.
+
+        @param      fitnesses  ``{nodeID: fitness}``
+        @param      scores     ``{nodeID: score}``
+        """
+        for nodeID, fitness in fitnesses.items():
+            self.update_fitness(nodeID, fitness)
+        for nodeID, score in scores.items():
+            self.update_score(nodeID, score)
+
+    def begin_batch(self):
+        """
+        @brief      Start buffering writes. IDs returned by ``add_node`` and
+                    ``add_edge`` stay valid, but the underlying storage is only
+                    updated on ``flush``.
+        """
+        pass
+
+    def flush(self):
+        """
+        @brief      Apply all buffered writes and stop buffering.
+        """
+        pass
+
     def save(self):
         pass
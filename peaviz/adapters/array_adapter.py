@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Array Adapter.
+
+Keeps the network in growable NumPy columns, so it needs neither graph-tool
+nor a database. The columns can be exported to CSR adjacency, a graph-tool
+``Graph`` or a networkx ``MultiDiGraph`` once the run is over.
+"""
+
+from .adapter_base import AdapterBase, ancestry_mask
+from .shards import ShardWriter
+from . import tables
+import numpy
+import os.path
+
+def _grow(column, size):
+    """
+    @brief      Returns ``column`` if it can hold ``size`` rows, else a copy
+                with its capacity doubled until it can (amortized O(1) appends).
+    """
+    capacity = len(column)
+    if size <= capacity:
+        return column
+    while capacity < size:
+        capacity = max(2 * capacity, 1)
+    grown = numpy.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+    grown[:len(column)] = column
+    return grown
+
+class ArrayAdapter(AdapterBase):
+    """
+    @brief      Stores nodes and edges column-wise.
+
+    @param[(in)] seed_str       The random seed of this session
+    @param[(in)] name           Name of the run, used as the file name on save
+    @param[(in)] fitness_width  Number of fitness components, wider
+                                fitnesses are rejected
+    @param[(in)] capacity       Initial number of rows of every column
+    @param[(in)] shard_generations  Write a segment every that many
+                                generations, see ``peaviz.adapters.shards``;
+                                ``prune`` then keeps every node
+
+    Unset fitness and score values are ``nan``.
+    """
+    def __init__(self, seed_str, name, fitness_width=2, capacity=1024, file_extension='npz',
+        shard_generations=None):
+        AdapterBase.__init__(self)
+        self.seed = seed_str
+        self.name = name
+        self.file_extension = file_extension
+        self.fitness_width = fitness_width
+
+        # node columns
+        self._numNodes = 0
+        self._gen = numpy.zeros(capacity, dtype=numpy.int32)
+        self._score = numpy.full(capacity, numpy.nan)
+        self._fitness = numpy.full((capacity, fitness_width), numpy.nan)
+        self._genotype = numpy.zeros(capacity, dtype=numpy.int64)
+
+        # edge columns, `label` holds an index into `labels`
+        self._numEdges = 0
+        self._src = numpy.zeros(capacity, dtype=numpy.int64)
+        self._dst = numpy.zeros(capacity, dtype=numpy.int64)
+        self._label = numpy.zeros(capacity, dtype=numpy.uint8)
+        self._edgeGen = numpy.zeros(capacity, dtype=numpy.int32)
+        self.labels = []
+        self._labelCodes = {}
+
+        self.shards = None
+        if shard_generations:
+            self.shards = ShardWriter(os.path.join('graphs', name) + '.shards',
+                seed_str, name, shard_generations)
+
+    def add_node(self, gene, gen=0, attrs={}):
+        nodeID = self._numNodes
+        if nodeID == len(self._gen):
+            self._gen = _grow(self._gen, nodeID + 1)
+            self._score = _grow(self._score, nodeID + 1)
+            self._fitness = _grow(self._fitness, nodeID + 1)
+            self._genotype = _grow(self._genotype, nodeID + 1)
+            self._score[nodeID:] = numpy.nan
+            self._fitness[nodeID:] = numpy.nan
+        self._gen[nodeID] = gen
+        self._genotype[nodeID] = self.index_gene(gene, nodeID)
+        self._numNodes += 1
+        if attrs:
+            if 'fitness' in attrs:
+                self.update_fitness(nodeID, attrs['fitness'])
+            if 'score' in attrs:
+                self.update_score(nodeID, attrs['score'])
+        return nodeID
+
+    def add_edge(self, TAG, srcID, destID, attrs={}):
+        edgeID = self._numEdges
+        if edgeID == len(self._src):
+            self._src = _grow(self._src, edgeID + 1)
+            self._dst = _grow(self._dst, edgeID + 1)
+            self._label = _grow(self._label, edgeID + 1)
+            self._edgeGen = _grow(self._edgeGen, edgeID + 1)
+        code = self._labelCodes.get(TAG)
+        if code is None:
+            code = self._labelCodes[TAG] = len(self.labels)
+            self.labels.append(TAG)
+        self._src[edgeID] = srcID
+        self._dst[edgeID] = destID
+        self._label[edgeID] = code
+        self._edgeGen[edgeID] = attrs.get('gen', 0)
+        self._numEdges += 1
+        self.link_chain(TAG, srcID, destID)
+        return edgeID
+
+    def getNode(self, nodeID):
+        return {
+            'gene'    : self.genotypes.get(self._genotype[nodeID]),
+            'gen'     : int(self._gen[nodeID]),
+            'fitness' : self._fitness[nodeID],
+            'score'   : self._score[nodeID]
+        }
+
+    def getEdge(self, edgeID):
+        return {
+            'source' : int(self._src[edgeID]),
+            'target' : int(self._dst[edgeID]),
+            'label'  : self.labels[self._label[edgeID]],
+            'gen'    : int(self._edgeGen[edgeID])
+        }
+
+    def walk_edge(self, TAG, startID):
+        if TAG in self._chain_tails:
+            return AdapterBase.walk_edge(self, TAG, startID)
+
+        # not a cached chain, follow the first matching out-edge
+        code = self._labelCodes.get(TAG)
+        src, label = self._src[:self._numEdges], self._label[:self._numEdges]
+        nodeID = startID
+        while True:
+            following = numpy.flatnonzero((src == nodeID) & (label == code))
+            if not len(following):
+                return nodeID
+            nodeID = int(self._dst[following[0]])
+
+    def _too_wide(self, width):
+        return ValueError('fitness has %d components but the adapter was built with '
+                          'fitness_width=%d, pass a larger fitness_width' % (width, self.fitness_width))
+
+    def update_fitness(self, nodeID, fitness):
+        if len(fitness) > self.fitness_width:
+            raise self._too_wide(len(fitness))
+        self._fitness[nodeID, :len(fitness)] = fitness
+
+    def update_score(self, nodeID, score):
+        self._score[nodeID] = score
+
+    def update_evaluations(self, fitnesses, scores):
+        if self.shards is not None:
+            self.shards.updated(fitnesses, scores)
+        if fitnesses:
+            nodeIDs = numpy.fromiter(fitnesses.keys(), dtype=numpy.int64, count=len(fitnesses))
+            try:
+                values = numpy.array(list(fitnesses.values()), dtype=numpy.float64)
+            except ValueError:
+                # fitnesses of different widths
+                values = None
+            if values is not None and values.ndim == 2:
+                if values.shape[1] > self.fitness_width:
+                    raise self._too_wide(values.shape[1])
+                self._fitness[nodeIDs, :values.shape[1]] = values
+            else:
+                for nodeID, fitness in fitnesses.items():
+                    self.update_fitness(nodeID, fitness)
+        if scores:
+            nodeIDs = numpy.fromiter(scores.keys(), dtype=numpy.int64, count=len(scores))
+            self._score[nodeIDs] = list(scores.values())
+
+    def load_tables(self, nodes, edges, labels, genotypes):
+        firstID, n = self._numNodes, len(nodes['gen'])
+        self._gen = _grow(self._gen, firstID + n)
+        self._score = _grow(self._score, firstID + n)
+        self._fitness = _grow(self._fitness, firstID + n)
+        self._genotype = _grow(self._genotype, firstID + n)
+        self._score[firstID:] = numpy.nan
+        self._fitness[firstID:] = numpy.nan
+        rows = slice(firstID, firstID + n)
+        width = min(self.fitness_width, nodes['fitness'].shape[1])
+        self._gen[rows] = nodes['gen']
+        self._score[rows] = nodes['score']
+        self._fitness[rows, :width] = nodes['fitness'][:, :width]
+        codes = numpy.array([self.genotypes.intern(genotypes.get(genotypeID))
+                             for genotypeID in range(len(genotypes))], dtype=numpy.int64)
+        self._genotype[rows] = codes[nodes['genotype']] if n else []
+        for nodeID, genotypeID in enumerate(self._genotype[rows].tolist(), firstID):
+            previousID = self._gene_index.get(genotypeID)
+            if previousID is not None:
+                self._shadowed[nodeID] = previousID
+            self._gene_index[genotypeID] = nodeID
+        self._numNodes += n
+
+        firstEdge, m = self._numEdges, len(edges['src'])
+        self._src = _grow(self._src, firstEdge + m)
+        self._dst = _grow(self._dst, firstEdge + m)
+        self._label = _grow(self._label, firstEdge + m)
+        self._edgeGen = _grow(self._edgeGen, firstEdge + m)
+        rows = slice(firstEdge, firstEdge + m)
+        for TAG in labels:
+            if TAG not in self._labelCodes:
+                self._labelCodes[TAG] = len(self.labels)
+                self.labels.append(TAG)
+        codes = numpy.array([self._labelCodes[TAG] for TAG in labels], dtype=numpy.uint8)
+        self._src[rows] = edges['src']
+        self._dst[rows] = edges['dst']
+        self._label[rows] = codes[edges['label']] if m else []
+        self._edgeGen[rows] = edges['gen']
+        self._numEdges += m
+        for src, dst, label in zip(edges['src'].tolist(), edges['dst'].tolist(), edges['label'].tolist()):
+            self.link_chain(labels[label], src, dst)
+        return firstID
+
+    def flush(self):
+        if self.shards is not None:
+            self.shards.flushed(self)
+
+    def prune(self, liveIDs, before_gen, archive=False):
+        if self.shards is not None:
+            # written segments keep their node IDs
+            return AdapterBase.prune(self, liveIDs, before_gen, archive)
+        n, m = self._numNodes, self._numEdges
+        nodes, edges = self.node_table(), self.edge_table()
+        seeds = numpy.union1d(numpy.asarray(liveIDs, dtype=numpy.int64),
+                              numpy.flatnonzero(nodes['gen'] >= before_gen))
+        keep = ancestry_mask(n, edges['src'], edges['dst'], seeds)
+        remap = numpy.full(n, -1, dtype=numpy.int64)
+        remap[keep] = numpy.arange(numpy.count_nonzero(keep))
+        if keep.all():
+            return remap
+
+        keepEdge = keep[edges['src']] & keep[edges['dst']]
+        if archive:
+            numpy.savez_compressed(self._archive_filename(before_gen),
+                labels=numpy.array(self.labels, dtype=str),
+                node_id=numpy.flatnonzero(~keep),
+                **{'node_' + key: column[~keep] for key, column in nodes.items()},
+                **{'edge_' + key: column[~keepEdge] for key, column in edges.items()})
+
+        self._gen = nodes['gen'][keep]
+        self._genotype = nodes['genotype'][keep]
+        self._fitness = nodes['fitness'][keep]
+        self._score = nodes['score'][keep]
+        self._src = remap[edges['src'][keepEdge]]
+        self._dst = remap[edges['dst'][keepEdge]]
+        self._label = edges['label'][keepEdge]
+        self._edgeGen = edges['gen'][keepEdge]
+        self._numNodes = len(self._gen)
+        self._numEdges = len(self._src)
+        self._reindex(remap, self._genotype)
+        return remap
+
+    def node_table(self):
+        """
+        @brief      Views of the node columns, row ``i`` is node ``i``.
+        """
+        n = self._numNodes
+        return {
+            'gen'      : self._gen[:n],
+            'genotype' : self._genotype[:n],
+            'fitness'  : self._fitness[:n],
+            'score'    : self._score[:n]
+        }
+
+    def edge_table(self):
+        """
+        @brief      Views of the edge columns, row ``i`` is edge ``i``. The
+                    ``label`` column indexes into ``self.labels``.
+        """
+        m = self._numEdges
+        return {
+            'src'   : self._src[:m],
+            'dst'   : self._dst[:m],
+            'label' : self._label[:m],
+            'gen'   : self._edgeGen[:m]
+        }
+
+    def tables_since(self, nodeStart, edgeStart):
+        """
+        @brief      The node and edge tables of the rows added after the first
+                    ``nodeStart`` nodes and ``edgeStart`` edges.
+        """
+        return ({key: column[nodeStart:] for key, column in self.node_table().items()},
+                {key: column[edgeStart:] for key, column in self.edge_table().items()})
+
+    def node_genes(self):
+        """
+        @brief      The canonical gene of every node, in node order.
+        """
+        return map(self.genotypes.get, self._genotype[:self._numNodes].tolist())
+
+    def to_csr(self):
+        """
+        @brief      Builds the CSR adjacency of the PARENT_OF and EVOLVE edges.
+
+        @return     ``(indptr, indices, edgeIDs)``: the out-neighbours of node
+                    ``i`` are ``indices[indptr[i]:indptr[i+1]]``, reached
+                    through the edges ``edgeIDs[indptr[i]:indptr[i+1]]``.
+        """
+        edges = self.edge_table()
+        edgeIDs = numpy.argsort(edges['src'], kind='stable')
+        indptr = numpy.zeros(self._numNodes + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(edges['src'], minlength=self._numNodes), out=indptr[1:])
+        return indptr, edges['dst'][edgeIDs], edgeIDs
+
+    def to_graph_tool(self):
+        """
+        @brief      Materializes a graph-tool ``Graph`` with the same schema as
+                    ``GraphAdapter`` (fitness is stored as ``vector<double>``).
+        """
+        return tables.to_graph_tool(self.node_table(), self.edge_table(),
+            self.labels, self.node_genes(), self.seed, self.name)
+
+    def to_networkx(self):
+        """
+        @brief      Materializes a networkx ``MultiDiGraph``.
+        """
+        import networkx
+
+        nodes, edges = self.node_table(), self.edge_table()
+        graph = networkx.MultiDiGraph(labels=[self.seed], name=self.name)
+        graph.add_nodes_from(
+            (nodeID, {'gene': gene, 'gen': int(gen), 'fitness': fitness.tolist(), 'score': float(score)})
+            for nodeID, (gene, gen, fitness, score)
+            in enumerate(zip(self.node_genes(), nodes['gen'], nodes['fitness'], nodes['score'])))
+        graph.add_edges_from(
+            (int(src), int(dst), {'label': self.labels[label], 'gen': int(gen)})
+            for src, dst, label, gen
+            in zip(edges['src'], edges['dst'], edges['label'], edges['gen']))
+        return graph
+
+    def save(self):
+        if self.shards is not None:
+            return self.shards.close(self)
+        filename = os.path.join('graphs', self.name) + '.' + self.file_extension
+        numpy.savez_compressed(filename,
+            seed=self.seed,
+            labels=numpy.array(self.labels, dtype=str),
+            **{'genotypes_' + key: column for key, column in self.genotypes.to_arrays().items()},
+            **{'node_' + key: column for key, column in self.node_table().items()},
+            **{'edge_' + key: column for key, column in self.edge_table().items()})
+        return filename
+
+    def numNodes(self):
+        return self._numNodes
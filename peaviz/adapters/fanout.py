@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Fan-out Adapter.
+
+Sends every tracking event to several adapters, so one run produces, say, a
+graph-tool file and a live Neo4j view. The first adapter is the primary: its
+IDs are the concrete IDs handed to the tracker and it answers every read
+(``getNode``, ``fetchIndividual``...). The other adapters replay the events
+with their own IDs, the mapping is kept here.
+
+Secondaries run on background writer threads by default, so the GA loop only
+pays for the primary. ``save`` waits for them to catch up.
+
+    tracker = TrackerBase([ArrayAdapter, ('neo4j', {'label': SEED, 'passwd': ...})],
+        seed_str=SEED, name='knapsack')
+
+The Neo4j adapter connects on its first write, or pass it a connected py2neo
+``Graph`` with ``'graph': ...``.
+
+``FanOutAdapter.build`` takes the writer options:
+
+    tracker = TrackerBase(FanOutAdapter.build, specs=['array', 'graph'],
+        background=False, seed_str=SEED, name='knapsack')
+"""
+
+from .genotype import canonical_gene
+from .threaded import Writer
+from .. import registry
+import numpy
+
+class Mirror:
+    """
+    @brief      Replays the events of the primary adapter into ``adapter``,
+                translating primary node IDs into its own.
+    """
+    def __init__(self, adapter):
+        self.adapter = adapter
+        # primary node ID -> node ID of `adapter`
+        self.ids = {}
+
+    def add_node(self, nodeID, gene, gen, attrs):
+        self.ids[nodeID] = self.adapter.add_node(gene, gen, attrs)
+
+    def add_edge(self, TAG, srcID, destID, attrs):
+        ids = self.ids
+        self.adapter.add_edge(TAG, ids[srcID], ids[destID], attrs)
+
+    def update_evaluations(self, fitnesses, scores):
+        ids = self.ids
+        self.adapter.update_evaluations(
+            {ids[nodeID]: fitness for nodeID, fitness in fitnesses.items()},
+            {ids[nodeID]: score for nodeID, score in scores.items()})
+
+    def begin_batch(self):
+        self.adapter.begin_batch()
+
+    def flush(self):
+        self.adapter.flush()
+
+    def load_tables(self, firstID, nodes, edges, labels, genotypes):
+        """
+        @brief      Replays the tables the primary restored from ``firstID``
+                    on, see ``AdapterBase.load_tables``.
+        """
+        adapter, ids = self.adapter, self.ids
+        noNodes = {key: column[:0] for key, column in nodes.items()}
+        noEdges = {key: column[:0] for key, column in edges.items()}
+        # the nodes first, their IDs translate the edges
+        localID = adapter.load_tables(nodes, noEdges, labels, genotypes)
+        for offset in range(len(nodes['gen'])):
+            ids[firstID + offset] = localID + offset
+        adapter.load_tables(noNodes, dict(edges,
+            src=numpy.array([ids[nodeID] for nodeID in edges['src'].tolist()], dtype=numpy.int64),
+            dst=numpy.array([ids[nodeID] for nodeID in edges['dst'].tolist()], dtype=numpy.int64)),
+            labels, genotypes)
+
+    def remap(self, remap):
+        """
+        @brief      The primary renumbered its nodes (``prune``), this adapter
+                    keeps all of them.
+        """
+        ids = self.ids
+        self.ids = {int(newID): ids[nodeID] for nodeID, newID in enumerate(remap.tolist())
+                    if newID >= 0 and nodeID in ids}
+
+    def apply(self, event):
+        method, args = event
+        getattr(self, method)(*args)
+
+    def put(self, method, *args):
+        self.apply((method, args))
+
+    def wait(self):
+        pass
+
+    def close(self):
+        pass
+
+class BackgroundMirror(Mirror):
+    """
+    @brief      A ``Mirror`` replaying events on its own writer thread, see
+                ``peaviz.adapters.threaded.Writer``.
+
+    @param      maxsize  Capacity of the event queue, the GA blocks when the
+                         adapter falls that far behind
+    """
+    def __init__(self, adapter, maxsize=65536):
+        Mirror.__init__(self, adapter)
+        self.writer = Writer(self.apply, maxsize, 'peaviz-%s' % type(adapter).__name__)
+
+    def put(self, method, *args):
+        self.writer.put((method, args))
+
+    def wait(self):
+        """
+        @brief      Blocks until every queued event was applied.
+        """
+        self.writer.wait()
+
+    def close(self):
+        self.writer.close()
+
+class FanOutAdapter:
+    """
+    @brief      Broadcasts the events of a tracker to ``adapters``, the first
+                one being the primary.
+
+    @param      background  Replay the secondaries on writer threads
+    @param      maxsize     Capacity of each writer's queue
+    """
+    def __init__(self, adapters, background=True, maxsize=65536):
+        if not adapters:
+            raise ValueError('no adapters given')
+        self.primary = adapters[0]
+        self.mirrors = [BackgroundMirror(adapter, maxsize) if background else Mirror(adapter)
+                        for adapter in adapters[1:]]
+        self.OPERATIONS = self.primary.OPERATIONS
+
+    @classmethod
+    def build(cls, specs, background=True, maxsize=65536, **kwargs):
+        """
+        @brief      Builds the adapters of ``specs``: adapter instances, adapter
+                    classes or names (built with ``kwargs``), or
+                    ``(class or name, kwargs)`` pairs (built with their own
+                    arguments only).
+        """
+        adapters = []
+        for spec in specs:
+            if isinstance(spec, tuple):
+                adapterClass, adapterKwargs = spec
+                adapters.append(registry.adapter(adapterClass)(**adapterKwargs))
+            elif isinstance(spec, (str, type)):
+                adapters.append(registry.adapter(spec)(**kwargs))
+            else:
+                adapters.append(spec)
+        return cls(adapters, background, maxsize)
+
+    @property
+    def adapters(self):
+        return [self.primary] + [mirror.adapter for mirror in self.mirrors]
+
+    def __getattr__(self, name):
+        # everything else (name, labels, genotypes, tables...) is the primary's
+        if 'primary' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    def add_node(self, gene, gen=0, attrs={}):
+        # the individual may be mutated before a writer thread gets to it
+        gene = canonical_gene(gene)
+        nodeID = self.primary.add_node(gene, gen, attrs)
+        for mirror in self.mirrors:
+            mirror.put('add_node', nodeID, gene, gen, dict(attrs))
+        return nodeID
+
+    def add_edge(self, TAG, srcID, destID, attrs={}):
+        edgeID = self.primary.add_edge(TAG, srcID, destID, attrs)
+        for mirror in self.mirrors:
+            mirror.put('add_edge', TAG, srcID, destID, dict(attrs))
+        return edgeID
+
+    def update_fitness(self, nodeID, fitness):
+        self.primary.update_fitness(nodeID, fitness)
+        for mirror in self.mirrors:
+            mirror.put('update_evaluations', {nodeID: fitness}, {})
+
+    def update_score(self, nodeID, score):
+        self.primary.update_score(nodeID, score)
+        for mirror in self.mirrors:
+            mirror.put('update_evaluations', {}, {nodeID: score})
+
+    def update_evaluations(self, fitnesses, scores):
+        self.primary.update_evaluations(fitnesses, scores)
+        for mirror in self.mirrors:
+            mirror.put('update_evaluations', dict(fitnesses), dict(scores))
+
+    def begin_batch(self):
+        self.primary.begin_batch()
+        for mirror in self.mirrors:
+            mirror.put('begin_batch')
+
+    def flush(self):
+        self.primary.flush()
+        for mirror in self.mirrors:
+            mirror.put('flush')
+
+    def fetchIndividual(self, individual, exclude=None):
+        return self.primary.fetchIndividual(individual, exclude)
+
+    def walk_edge(self, TAG, startID):
+        return self.primary.walk_edge(TAG, startID)
+
+    def getNode(self, nodeID):
+        return self.primary.getNode(nodeID)
+
+    def getEdge(self, edgeID):
+        return self.primary.getEdge(edgeID)
+
+    def prune(self, liveIDs, before_gen, archive=False):
+        """
+        @brief      Prunes the primary only; secondaries keep every node and
+                    their ID mapping follows the renumbering.
+        """
+        remap = self.primary.prune(liveIDs, before_gen, archive)
+        for mirror in self.mirrors:
+            mirror.put('remap', remap)
+        return remap
+
+    def load_tables(self, nodes, edges, labels, genotypes):
+        """
+        @brief      Restores the tables into the primary, then replays them
+                    into the secondaries.
+        """
+        firstID = self.primary.load_tables(nodes, edges, labels, genotypes)
+        if firstID is not None:
+            for mirror in self.mirrors:
+                mirror.put('load_tables', firstID, nodes, edges, labels, genotypes)
+        return firstID
+
+    def wait(self):
+        """
+        @brief      Blocks until the secondaries applied every event.
+        """
+        for mirror in self.mirrors:
+            mirror.wait()
+
+    def save(self):
+        """
+        @brief      Saves every adapter once the secondaries caught up.
+
+        @return     The file of the primary, see ``saved`` for the others.
+        """
+        self.wait()
+        self.saved = [mirror.adapter.save() for mirror in self.mirrors]
+        filename = self.primary.save()
+        # no threads left behind once the run is saved, the next event
+        # starts them again
+        self.close()
+        return filename
+
+    def close(self):
+        """
+        @brief      Stops the writer threads, after applying the queued events.
+        """
+        for mirror in self.mirrors:
+            mirror.close()
+
+    def numNodes(self):
+        return self.primary.numNodes()
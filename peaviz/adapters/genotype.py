@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Helpers to compare and store genotypes independently of their container type.
+"""
+
+from array import array
+import numpy
+import pickle
+
+def canonical_gene(gene):
+    """
+    @brief      Builds a hashable key for a gene. Two genes encoding the same
+                genetic material map to equal keys.
+
+                - ``set``s (knapsack samples) become ``frozenset``s, so item
+                  order does not matter.
+                - ``list``s, ``tuple``s and bool vectors become ``tuple``s,
+                  nested ones (lists of lists, matrices) recursively.
+                - ``numpy`` arrays are converted through ``tolist()`` first.
+
+                ``True == 1``, so the keys of ``[True, False]`` and ``[1, 0]``
+                compare equal; ``pack_gene`` keeps the element type though, in
+                a ``GenotypeStore`` they are different genotypes.
+
+    @param      gene  The gene (usually the DEAP individual itself)
+
+    @return     The canonical key
+    """
+    if isinstance(gene, (list, tuple)):
+        key = tuple(gene)
+        try:
+            hash(key)
+        except TypeError:
+            # nested containers
+            key = tuple(map(canonical_gene, key))
+        return key
+    if isinstance(gene, (set, frozenset)):
+        return frozenset(gene)
+    if hasattr(gene, 'tolist'):
+        return canonical_gene(gene.tolist())
+    return gene
+
+BINARY, INTSET, SEQUENCE, OBJECT = range(4)
+
+def _typecode(lo, hi):
+    """
+    @brief      Smallest ``array`` typecode holding all integers in
+                ``[lo, hi]``.
+    """
+    if lo >= 0:
+        for code in 'BHIQ':
+            if hi < 1 << (8 * array(code).itemsize):
+                return code
+    return 'q'
+
+class PackedGene:
+    """
+    @brief      A gene already packed by ``pack_gene``, which returns its key
+                as is: a gene packed once can be handed to an adapter without
+                being packed again.
+    """
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+def pack_gene(gene):
+    """
+    @brief      Packs a gene into a compact, hashable key
+                ``(kind, typecode, length, data)``.
+
+                - ``BINARY``: bool vectors (typecode ``?``) and integer
+                  vectors of 0/1 (typecode ``B``), ``numpy.packbits``
+                - ``INTSET``: sets of integers, sorted into the smallest integer
+                  ``array``
+                - ``SEQUENCE``: other integer vectors, as the smallest ``array``
+                - ``OBJECT``: anything else, ``data`` is ``canonical_gene(gene)``
+
+                Vectors (lists, tuples, ``array``s, numpy arrays) go through
+                a single ``numpy.asarray``, their dtype tells how to pack
+                them. The element type is part of the key, so genes unpack to
+                the values they were made of.
+    """
+    if type(gene) is PackedGene:
+        return gene.key
+    if isinstance(gene, (set, frozenset)):
+        try:
+            values = numpy.asarray(sorted(gene))
+        except (TypeError, ValueError, OverflowError):
+            values = None
+        if values is not None and values.ndim == 1 and (values.dtype.kind in 'biu' or not len(values)):
+            lo, hi = (int(values[0]), int(values[-1])) if len(values) else (0, 0)
+            code = _typecode(lo, hi)
+            return (INTSET, code, len(values), values.astype(code).tobytes())
+    elif isinstance(gene, (list, tuple, array, numpy.ndarray)):
+        try:
+            values = numpy.asarray(gene)
+        except (ValueError, OverflowError):
+            values = None
+        if values is not None and values.ndim == 1:
+            kind = values.dtype.kind
+            if not len(values) and kind == 'f':
+                # `numpy.asarray([])` is a float array
+                kind = 'i'
+            if kind == 'b':
+                return (BINARY, '?', len(values), numpy.packbits(values).tobytes())
+            if kind in 'iu':
+                # one pass: the bits of 0/1 values (negative ones set the sign)
+                if len(values) and 0 <= numpy.bitwise_or.reduce(values) <= 1:
+                    return (BINARY, 'B', len(values), numpy.packbits(values).tobytes())
+                lo, hi = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+                code = _typecode(lo, hi)
+                return (SEQUENCE, code, len(values), values.astype(code).tobytes())
+    elif hasattr(gene, 'tolist'):
+        return pack_gene(gene.tolist())
+    return (OBJECT, '', 0, canonical_gene(gene))
+
+def unpack_gene(key):
+    """
+    @brief      The canonical gene (``frozenset`` or ``tuple``) of a packed key.
+    """
+    kind, code, length, data = key
+    if kind == BINARY:
+        bits = numpy.unpackbits(numpy.frombuffer(data, dtype=numpy.uint8), count=length)
+        return tuple((bits.astype(bool) if code == '?' else bits.astype(int)).tolist())
+    if kind == INTSET:
+        return frozenset(array(code, data))
+    if kind == SEQUENCE:
+        return tuple(array(code, data))
+    return data
+
+class GenotypeStore:
+    """
+    @brief      Interns genotypes: every distinct genome is packed (see
+                ``pack_gene``) and stored once, nodes only keep its integer
+                genotype ID. Packed keys are compared byte-wise, so equality
+                lookups do not depend on the container type of the gene.
+    """
+    def __init__(self):
+        self._ids = {}
+        self._keys = []
+
+    def intern(self, gene):
+        """
+        @brief      The genotype ID of ``gene``, adding it if it is new.
+        """
+        key = pack_gene(gene)
+        genotypeID = self._ids.get(key)
+        if genotypeID is None:
+            genotypeID = self._ids[key] = len(self._keys)
+            self._keys.append(key)
+        return genotypeID
+
+    def lookup(self, gene):
+        """
+        @brief      The genotype ID of ``gene``, ``None`` if it was never
+                    interned.
+        """
+        return self._ids.get(pack_gene(gene))
+
+    def get(self, genotypeID):
+        """
+        @brief      The canonical gene of a genotype ID.
+        """
+        return unpack_gene(self._keys[genotypeID])
+
+    def __len__(self):
+        return len(self._keys)
+
+    def subset(self, genotypeIDs):
+        """
+        @brief      A new store holding the genotypes ``genotypeIDs``, genotype
+                    ``genotypeIDs[i]`` of this store is genotype ``i`` of the
+                    subset.
+        """
+        store = GenotypeStore()
+        for genotypeID in genotypeIDs:
+            key = self._keys[genotypeID]
+            store._ids[key] = len(store._keys)
+            store._keys.append(key)
+        return store
+
+    def to_arrays(self):
+        """
+        @brief      The store as flat arrays (for ``numpy.savez`` and the like):
+                    ``kind``, ``typecode``, ``length``, and the packed bytes of
+                    genotype ``i`` in ``data[offset[i]:offset[i+1]]``.
+                    ``OBJECT`` genotypes are pickled.
+        """
+        blobs = [pickle.dumps(data) if kind == OBJECT else data
+                 for kind, code, length, data in self._keys]
+        offset = numpy.zeros(len(blobs) + 1, dtype=numpy.int64)
+        numpy.cumsum([len(blob) for blob in blobs], out=offset[1:])
+        return {
+            'kind'     : numpy.array([key[0] for key in self._keys], dtype=numpy.uint8),
+            'typecode' : numpy.array([ord(key[1] or ' ') for key in self._keys], dtype=numpy.uint8),
+            'length'   : numpy.array([key[2] for key in self._keys], dtype=numpy.int64),
+            'offset'   : offset,
+            'data'     : numpy.frombuffer(b''.join(blobs), dtype=numpy.uint8)
+        }
+
+    @classmethod
+    def from_arrays(cls, kind, typecode, length, offset, data):
+        """
+        @brief      Rebuilds a store written by ``to_arrays``, genotype IDs
+                    are preserved.
+        """
+        store = cls()
+        data = bytes(data)
+        for i, (k, code, n) in enumerate(zip(kind.tolist(), typecode.tolist(), length.tolist())):
+            blob = data[offset[i]:offset[i + 1]]
+            if k == OBJECT:
+                key = (OBJECT, '', 0, pickle.loads(blob))
+            else:
+                key = (k, chr(code), n, blob)
+            store._ids[key] = i
+            store._keys.append(key)
+        return store
@@ -1,12 +1,28 @@
-from .adapter_base import AdapterBase
+from .adapter_base import AdapterBase, ancestry_mask
+from .shards import ShardWriter
+from .tables import gene_list
 from graph_tool import Graph, Vertex, Edge
+import numpy
 import os.path
 
+def _default_value(value_type):
+    if value_type.startswith('vector'):
+        return []
+    elif value_type == 'string':
+        return ''
+    elif value_type == 'bool':
+        return False
+    else:
+        return 0
+
 class GraphAdapter(AdapterBase):
+
+    OPERATIONS = AdapterBase.OPERATIONS + ('_apply_pending',)
+
     def __init__(self, seed_str, name,
         file_extension='gml',
         vertex_schema={
-            'gene'    : 'vector<bool>',
+            'genotype': 'long',
             'gen'     : 'int',
             'fitness' : 'vector<long>',
             'score'   : 'long'
@@ -14,8 +30,10 @@ class GraphAdapter(AdapterBase):
         edge_schema={
             'label' : 'string',
             'gen'   : 'int'
-        }):
+        },
+        shard_generations=None):
 
+        AdapterBase.__init__(self)
         self.seed = seed_str
         self.name = name
         self.file_extension = file_extension
@@ -36,55 +54,272 @@ class GraphAdapter(AdapterBase):
         for key in edge_schema:
             self.graph.ep[key] = self.graph.new_ep(edge_schema[key])
 
+        # Column order used by `add_edge_list`, and the value used for
+        # columns an edge does not set.
+        self._edge_keys = list(edge_schema)
+        self._edge_defaults = {key: _default_value(edge_schema[key]) for key in edge_schema}
+
+        # Write buffers, see `begin_batch`
+        self._batching = False
+        self._pending_nodes = 0
+        self._pending_edges = []
+        self._pending_props = {}
+
+        # edge labels in order of appearance, see `edge_table`
+        self.labels = []
+        self._labelCodes = {}
+        self.shards = None
+        if shard_generations:
+            self.shards = ShardWriter(os.path.join('graphs', name) + '.shards',
+                seed_str, name, shard_generations)
+
     def add_node(self, gene, gen=0, attrs={}):
+        if self._batching:
+            nodeID = self.graph.num_vertices() + self._pending_nodes
+            self._pending_nodes += 1
+            genotypeID = self.index_gene(gene, nodeID)
+            self._buffer_props(nodeID, genotype=genotypeID, gen=gen)
+            self._buffer_props(nodeID, **attrs)
+            return nodeID
+
         v = self.graph.add_vertex()
-        self.graph.vp.gene[v] = gene
+        nodeID = self.graph.vertex_index[v]
+        self.graph.vp.genotype[v] = self.index_gene(gene, nodeID)
         self.graph.vp.gen[v]  = gen
         self.set_props(v, attrs)
-
-        return self.graph.vertex_index[v]
+        return nodeID
 
     def add_edge(self, TAG, srcID, destID, attrs={}):
+        if self._batching:
+            edgeID = self.graph.edge_index_range + len(self._pending_edges)
+            row = [srcID, destID]
+            for key in self._edge_keys:
+                if key == 'label':
+                    row.append(TAG)
+                else:
+                    row.append(attrs.get(key, self._edge_defaults[key]))
+            self._pending_edges.append(row)
+            self.link_chain(TAG, srcID, destID)
+            return edgeID
+
         e = self.graph.add_edge(srcID, destID)
         self.graph.ep.label[e] = TAG
         for key in attrs:
             self.graph.ep[key][e] = attrs[key]
+        self.link_chain(TAG, srcID, destID)
         return self.graph.edge_index[e]
-            
+
     def getNode(self, nodeID):
+        self._apply_pending()
         return self.graph.vertex(nodeID)
 
     def getEdge(self, edgeID):
+        self._apply_pending()
         return self.graph.edge(edgeID)
 
-    def fetchIndividual(self, individual):
-        targets = graph_tool.util.find_vertex(self.graph, self.graph.vp.gene, individual)
-        # find the last node, the one with highest `gen`
-        if targets:
-            # guaranteed to be in order!!
-            return self.graph.vertex_index[targets[-1]]
-        else:
-            return None
-
     def walk_edge(self, TAG, startID):
-        pass
+        if TAG in self._chain_tails:
+            return AdapterBase.walk_edge(self, TAG, startID)
+
+        # not a cached chain, follow the first matching out-edge
+        self._apply_pending()
+        nodeID = startID
+        while True:
+            v = self.graph.vertex(nodeID)
+            for e in v.out_edges():
+                if self.graph.ep.label[e] == TAG:
+                    nodeID = self.graph.vertex_index[e.target()]
+                    break
+            else:
+                return nodeID
 
     def update_fitness(self, nodeID, fitness):
+        if self._batching:
+            self._buffer_props(nodeID, fitness=fitness)
+            return
         v = self.graph.vertex(nodeID)
         self.set_props(v, {'fitness' : fitness})
 
     def update_score(self, nodeID, score):
+        if self._batching:
+            self._buffer_props(nodeID, score=score)
+            return
         v = self.graph.vertex(nodeID)
         self.set_props(v, {'score' : score})
 
+    def update_evaluations(self, fitnesses, scores):
+        if self.shards is not None:
+            self.shards.updated(fitnesses, scores)
+        # joins the write buffers, applied with one array write for `score`
+        if fitnesses:
+            self._pending_props.setdefault('fitness', {}).update(fitnesses)
+        if scores:
+            self._pending_props.setdefault('score', {}).update(scores)
+        if not self._batching:
+            self._apply_pending()
+
     def set_props(self, v, attrs):
         for key in attrs:
             self.graph.vp[key][v] = attrs[key]
 
+    def begin_batch(self):
+        self._batching = True
+
+    def flush(self):
+        self._apply_pending()
+        self._batching = False
+        if self.shards is not None:
+            self.shards.flushed(self)
+
+    def _buffer_props(self, nodeID, **attrs):
+        for key in attrs:
+            # last write wins
+            self._pending_props.setdefault(key, {})[nodeID] = attrs[key]
+
+    def _apply_pending(self):
+        """
+        @brief      Applies the write buffers using graph-tool's bulk paths:
+                    one ``add_vertex(n)``, one ``add_edge_list`` and one
+                    ``get_array()`` write per scalar property. Vector and string
+                    properties have no array view and are set per vertex.
+        """
+        if self._pending_nodes:
+            self.graph.add_vertex(self._pending_nodes)
+            self._pending_nodes = 0
+
+        if self._pending_edges:
+            self.graph.add_edge_list(
+                self._pending_edges,
+                eprops=[self.graph.ep[key] for key in self._edge_keys])
+            self._pending_edges = []
+
+        for key, updates in self._pending_props.items():
+            prop = self.graph.vp[key]
+            values = prop.get_array()
+            if values is not None:
+                nodeIDs = numpy.fromiter(updates.keys(), dtype=numpy.int64, count=len(updates))
+                values[nodeIDs] = list(updates.values())
+            else:
+                for nodeID, value in updates.items():
+                    prop[self.graph.vertex(nodeID)] = value
+        self._pending_props = {}
+
+    def prune(self, liveIDs, before_gen, archive=False):
+        if self.shards is not None:
+            # written segments keep their node IDs
+            return AdapterBase.prune(self, liveIDs, before_gen, archive)
+        self._apply_pending()
+        n = self.graph.num_vertices()
+        edges = self.graph.get_edges()
+        seeds = numpy.union1d(numpy.asarray(liveIDs, dtype=numpy.int64),
+                              numpy.flatnonzero(self.graph.vp.gen.get_array() >= before_gen))
+        keep = ancestry_mask(n, edges[:, 0], edges[:, 1], seeds)
+        remap = numpy.full(n, -1, dtype=numpy.int64)
+        remap[keep] = numpy.arange(numpy.count_nonzero(keep))
+        if keep.all():
+            return remap
+
+        removed = numpy.flatnonzero(~keep)
+        if archive:
+            self._archive(self._archive_filename(before_gen), removed, keep)
+        self.graph.remove_vertex(removed, fast=False)
+        # make edge indexes contiguous again, `add_edge` predicts them
+        self.graph.reindex_edges()
+        self._reindex(remap, self.graph.vp.genotype.get_array())
+        return remap
+
+    def _archive(self, filename, removed, keep):
+        """
+        @brief      Writes the ``removed`` vertices and their edges, with their
+                    current IDs, in the ``ArrayAdapter`` format.
+        """
+        vp, ep = self.graph.vp, self.graph.ep
+        vertices = [self.graph.vertex(nodeID) for nodeID in removed.tolist()]
+        # every lost edge ends at a removed vertex, or leaves one for a kept one
+        lost = [e for v in vertices for e in v.in_edges()]
+        lost += [e for v in vertices for e in v.out_edges() if keep[int(e.target())]]
+        labels = sorted({ep.label[e] for e in lost})
+        fitness = [list(vp.fitness[v]) for v in vertices]
+        width = max(map(len, fitness), default=0)
+        numpy.savez_compressed(filename,
+            labels=numpy.array(labels, dtype=str),
+            node_id=removed,
+            node_gen=vp.gen.get_array()[removed],
+            node_genotype=vp.genotype.get_array()[removed],
+            node_fitness=numpy.array([f + [numpy.nan] * (width - len(f)) for f in fitness]),
+            node_score=vp.score.get_array()[removed],
+            edge_src=numpy.array([int(e.source()) for e in lost], dtype=numpy.int64),
+            edge_dst=numpy.array([int(e.target()) for e in lost], dtype=numpy.int64),
+            edge_label=numpy.array([labels.index(ep.label[e]) for e in lost], dtype=numpy.uint8),
+            edge_gen=numpy.array([ep.gen[e] for e in lost], dtype=numpy.int32))
+
+    def node_table(self):
+        """
+        @brief      The node columns, see ``peaviz.adapters.tables``. Fitness
+                    is padded with ``nan`` to the longest fitness.
+        """
+        return self.tables_since(0, 0)[0]
+
+    def edge_table(self):
+        """
+        @brief      The edge columns, ``label`` indexes into ``self.labels``.
+        """
+        return self.tables_since(0, 0)[1]
+
+    def tables_since(self, nodeStart, edgeStart):
+        """
+        @brief      The node table of the vertices after the first
+                    ``nodeStart``, and the edge table of their incoming edges
+                    with an index of at least ``edgeStart``. Scalar columns
+                    are array copies, vector and string ones are read per
+                    vertex or edge.
+        """
+        self._apply_pending()
+        vp, ep = self.graph.vp, self.graph.ep
+        vertices = [self.graph.vertex(nodeID) for nodeID in range(nodeStart, self.graph.num_vertices())]
+        fitness = [list(vp.fitness[v]) for v in vertices]
+        width = max(map(len, fitness), default=0)
+        nodes = {
+            'gen'      : vp.gen.get_array()[nodeStart:].copy(),
+            'genotype' : vp.genotype.get_array()[nodeStart:].astype(numpy.int64),
+            'fitness'  : numpy.array([f + [numpy.nan] * (width - len(f)) for f in fitness]).reshape(-1, width),
+            'score'    : vp.score.get_array()[nodeStart:].astype(numpy.float64)
+        }
+
+        rows = []
+        for v in vertices:
+            for e in v.in_edges():
+                edgeID = self.graph.edge_index[e]
+                if edgeID >= edgeStart:
+                    rows.append((edgeID, int(e.source()), int(e.target()), self._label_code(ep.label[e]), ep.gen[e]))
+        rows.sort()
+        edges = {
+            'src'   : numpy.array([r[1] for r in rows], dtype=numpy.int64),
+            'dst'   : numpy.array([r[2] for r in rows], dtype=numpy.int64),
+            'label' : numpy.array([r[3] for r in rows], dtype=numpy.uint8),
+            'gen'   : numpy.array([r[4] for r in rows], dtype=numpy.int32)
+        }
+        return nodes, edges
+
+    def _label_code(self, TAG):
+        code = self._labelCodes.get(TAG)
+        if code is None:
+            code = self._labelCodes[TAG] = len(self.labels)
+            self.labels.append(TAG)
+        return code
+
     def save(self):
+        if self.shards is not None:
+            return self.shards.close(self)
+        self._apply_pending()
+        # the `genotype` vertex property indexes into this list
+        self.graph.gp.genotypes = self.graph.new_gp('vector<string>')
+        self.graph.gp.genotypes = [
+            str(gene_list(self.genotypes.get(genotypeID)))
+            for genotypeID in range(len(self.genotypes))]
         filename = os.path.join('graphs', self.name) + '.' + self.file_extension
         self.graph.save(filename)
         return filename
 
     def numNodes(self):
-        return self.graph.num_vertices()
+        return self.graph.num_vertices() + self._pending_nodes
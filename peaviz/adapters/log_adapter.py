@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Log Adapter.
+
+Appends every tracking event to binary files as it happens instead of keeping
+the network in memory. A run is a directory ``graphs/<name>.log`` holding
+
+- ``nodes.bin``, ``edges.bin``, ``updates.bin``: fixed-size records, see
+  ``NODE_DTYPE``, ``EDGE_DTYPE`` and ``update_dtype``,
+- ``genes.jsonl``: one distinct gene per line, nodes refer to the line number
+  (their genotype ID),
+- ``meta.json``: seed, name, fitness width and edge labels.
+
+``LogReader`` memory-maps the record files, so a crashed run can be read up to
+its last complete record, and multi-GB runs can be analysed without loading
+them. Genes are flushed before node records, and node records whose gene was
+lost anyway are dropped when reading.
+"""
+
+from .adapter_base import AdapterBase, new_run_directory
+from . import tables
+import json
+import numpy
+import os
+import struct
+
+NODE_DTYPE = numpy.dtype([('id', '<i8'), ('gen', '<i4'), ('genotype', '<i8')])
+EDGE_DTYPE = numpy.dtype([('id', '<i8'), ('src', '<i8'), ('dst', '<i8'), ('label', 'u1'), ('gen', '<i4')])
+
+FITNESS_UPDATE = 0
+SCORE_UPDATE = 1
+
+def update_dtype(fitness_width):
+    return numpy.dtype([('node', '<i8'), ('kind', 'u1'), ('values', '<f8', (fitness_width,))])
+
+def _gene_json(gene):
+    if isinstance(gene, frozenset):
+        return json.dumps({'set': sorted(gene)})
+    return json.dumps(list(gene))
+
+def _gene_from_json(line):
+    gene = json.loads(line)
+    if isinstance(gene, dict):
+        return frozenset(gene['set'])
+    return tuple(gene)
+
+class LogAdapter(AdapterBase):
+    """
+    @brief      Writes nodes, edges and fitness/score updates as append-only
+                binary records.
+
+    @param[(in)] seed_str       The random seed of this session
+    @param[(in)] name           Name of the run, the log directory is
+                                ``graphs/<name>.log``; a previous run of
+                                that name is replaced
+    @param[(in)] fitness_width  Number of fitness components
+    @param[(in)] fsync          Also ``fsync`` the files on every ``flush``
+
+    ``save`` closes the files, a later event opens them again for appending.
+    """
+    def __init__(self, seed_str, name, fitness_width=2, fsync=False, buffering=1 << 16):
+        AdapterBase.__init__(self)
+        self.seed = seed_str
+        self.name = name
+        self.fitness_width = fitness_width
+        self.fsync = fsync
+        self.path = os.path.join('graphs', name) + '.log'
+        new_run_directory(self.path, 'meta.json')
+
+        self._numNodes = 0
+        self._numEdges = 0
+        self._genesWritten = 0
+        self.labels = []
+        self._labelCodes = {}
+
+        # struct layouts matching the (packed) numpy dtypes
+        self._node = struct.Struct('<qiq')
+        self._edge = struct.Struct('<qqqBi')
+        self._update = struct.Struct('<qB%dd' % fitness_width)
+        self._nan = (float('nan'),) * fitness_width
+
+        self.buffering = buffering
+        self._files = {}
+        self._open()
+        self._write_meta()
+
+    def _open(self):
+        # genes first: `flush` writes them before the nodes referring to them
+        self._files = {
+            key: open(os.path.join(self.path, key), 'ab', buffering=self.buffering)
+            for key in ('genes.jsonl', 'nodes.bin', 'edges.bin', 'updates.bin')
+        }
+        return self._files
+
+    def _write_meta(self):
+        meta = {
+            'seed'          : self.seed,
+            'name'          : self.name,
+            'fitness_width' : self.fitness_width,
+            'labels'        : self.labels
+        }
+        filename = os.path.join(self.path, 'meta.json')
+        with open(filename + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(filename + '.tmp', filename)
+
+    def add_node(self, gene, gen=0, attrs={}):
+        nodeID = self._numNodes
+        genotypeID = self.index_gene(gene, nodeID)
+        files = self._files or self._open()
+        if genotypeID == self._genesWritten:
+            files['genes.jsonl'].write(_gene_json(self.genotypes.get(genotypeID)).encode() + b'\n')
+            self._genesWritten += 1
+        files['nodes.bin'].write(self._node.pack(nodeID, gen, genotypeID))
+        self._numNodes += 1
+        if attrs:
+            if 'fitness' in attrs:
+                self.update_fitness(nodeID, attrs['fitness'])
+            if 'score' in attrs:
+                self.update_score(nodeID, attrs['score'])
+        return nodeID
+
+    def add_edge(self, TAG, srcID, destID, attrs={}):
+        edgeID = self._numEdges
+        code = self._labelCodes.get(TAG)
+        if code is None:
+            code = self._labelCodes[TAG] = len(self.labels)
+            self.labels.append(TAG)
+            self._write_meta()
+        (self._files or self._open())['edges.bin'].write(
+            self._edge.pack(edgeID, srcID, destID, code, attrs.get('gen', 0)))
+        self._numEdges += 1
+        self.link_chain(TAG, srcID, destID)
+        return edgeID
+
+    def update_fitness(self, nodeID, fitness):
+        values = tuple(fitness) + self._nan[len(fitness):]
+        (self._files or self._open())['updates.bin'].write(
+            self._update.pack(nodeID, FITNESS_UPDATE, *values))
+
+    def update_score(self, nodeID, score):
+        values = (score,) + self._nan[1:]
+        (self._files or self._open())['updates.bin'].write(
+            self._update.pack(nodeID, SCORE_UPDATE, *values))
+
+    def getNode(self, nodeID):
+        self.flush()
+        return LogReader(self.path).getNode(nodeID)
+
+    def getEdge(self, edgeID):
+        self.flush()
+        return LogReader(self.path).getEdge(edgeID)
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def save(self):
+        self.close()
+        self._write_meta()
+        return self.path
+
+    def numNodes(self):
+        return self._numNodes
+
+class LogReader:
+    """
+    @brief      Reads a ``LogAdapter`` directory. ``nodes``, ``edges`` and
+                ``updates`` are read-only, zero-copy structured arrays over the
+                memory-mapped files. A trailing partial record (crash while
+                writing) is ignored, so are the node records after the first
+                one whose gene was not written.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.seed = meta['seed']
+        self.name = meta['name']
+        self.fitness_width = meta['fitness_width']
+        self.labels = meta['labels']
+
+        self.nodes = self._map('nodes.bin', NODE_DTYPE)
+        lost = numpy.flatnonzero(self.nodes['genotype'] >= self._count_genes())
+        if len(lost):
+            self.nodes = self.nodes[:lost[0]]
+        self.edges = self._map('edges.bin', EDGE_DTYPE)
+        self.updates = self._map('updates.bin', update_dtype(self.fitness_width))
+        self._genes = None
+
+    def _map(self, filename, dtype):
+        filename = os.path.join(self.path, filename)
+        count = os.path.getsize(filename) // dtype.itemsize
+        if count == 0:
+            return numpy.zeros(0, dtype=dtype)
+        return numpy.memmap(filename, dtype=dtype, mode='r', shape=(count,))
+
+    def _count_genes(self):
+        """
+        @brief      Number of complete lines of ``genes.jsonl``, without
+                    parsing them.
+        """
+        count = 0
+        with open(os.path.join(self.path, 'genes.jsonl'), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                count += chunk.count(b'\n')
+        return count
+
+    @property
+    def genes(self):
+        """
+        @brief      The distinct genes, indexed by the ``genotype`` node field.
+        """
+        if self._genes is None:
+            with open(os.path.join(self.path, 'genes.jsonl')) as f:
+                self._genes = [_gene_from_json(line) for line in f if line.endswith('\n')]
+        return self._genes
+
+    def _latest(self, kind):
+        """
+        @brief      The last value written by ``kind`` updates, per node.
+        """
+        values = numpy.full((len(self.nodes), self.fitness_width), numpy.nan)
+        updates = self.updates[self.updates['kind'] == kind]
+        updates = updates[updates['node'] < len(self.nodes)][::-1]
+        nodeIDs, first = numpy.unique(updates['node'], return_index=True)
+        values[nodeIDs] = updates['values'][first]
+        return values
+
+    def node_table(self):
+        return {
+            'gen'      : self.nodes['gen'],
+            'genotype' : self.nodes['genotype'],
+            'fitness'  : self._latest(FITNESS_UPDATE),
+            'score'    : self._latest(SCORE_UPDATE)[:, 0]
+        }
+
+    def edge_table(self):
+        # drop edges whose endpoint records were lost in a crash
+        complete = (self.edges['src'] < len(self.nodes)) & (self.edges['dst'] < len(self.nodes))
+        edges = self.edges if complete.all() else self.edges[complete]
+        return {
+            'src'   : edges['src'],
+            'dst'   : edges['dst'],
+            'label' : edges['label'],
+            'gen'   : edges['gen']
+        }
+
+    def node_genes(self):
+        genes = self.genes
+        return (genes[genotypeID] for genotypeID in self.nodes['genotype'].tolist())
+
+    def getNode(self, nodeID):
+        node = self.nodes[nodeID]
+        updates = self.updates[self.updates['node'] == nodeID]
+        fitness = updates[updates['kind'] == FITNESS_UPDATE]['values']
+        score = updates[updates['kind'] == SCORE_UPDATE]['values']
+        return {
+            'gene'    : self.genes[node['genotype']],
+            'gen'     : int(node['gen']),
+            'fitness' : fitness[-1] if len(fitness) else None,
+            'score'   : score[-1][0] if len(score) else None
+        }
+
+    def getEdge(self, edgeID):
+        edge = self.edges[edgeID]
+        return {
+            'source' : int(edge['src']),
+            'target' : int(edge['dst']),
+            'label'  : self.labels[edge['label']],
+            'gen'    : int(edge['gen'])
+        }
+
+    def to_graph_tool(self):
+        return tables.to_graph_tool(self.node_table(), self.edge_table(),
+            self.labels, self.node_genes(), self.seed, self.name)
+
+    def write_gml(self, filename):
+        return tables.write_gml(filename, self.node_table(), self.edge_table(),
+            self.labels, self.node_genes(), self.seed, self.name)
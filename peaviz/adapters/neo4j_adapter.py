@@ -3,26 +3,53 @@
 """
 Neo4j Adapter.
 
-Nodes can have multiple labels
+Nodes can have multiple labels. Every node gets the ``I`` label and the label
+of its session (the random seed), so many runs can share one database.
+
+Writes are buffered and sent as parameterized ``UNWIND`` statements, one per
+kind of write, in a single transaction per flush. Node-at-a-time ``MERGE``
+would cost a Bolt round trip per node.
 """
 
-import py2neo
+from .adapter_base import AdapterBase
+from .tables import gene_list
 
-class Neo4jAdapter:
+class Neo4jAdapter(AdapterBase):
     """
     @brief      Allows creating and merging nodes on a neo4j instance.
-    
+
     @param[(in)] label  The random seed for this session is used to label all nodes
                         of the graph. Since neo4j allowd 1 graph DB per instance, it
                         must be shared with many graphs.
+    @param[(in)] graph  An already connected py2neo ``Graph``. If ``None``,
+                        ``connect`` is called on the first write or read.
+    @param[(in)] batch_size  Buffered writes that trigger a flush outside of a
+                        tracked generation.
     """
-    def __init__(self, label, host='localhost', port=7474, user='neo4j', passwd=''):
+
+    NODE_LABEL = 'I'
+
+    def __init__(self, label, host='localhost', port=7474, user='neo4j', passwd='',
+        graph=None, batch_size=10000):
+        AdapterBase.__init__(self)
         self.host = host
         self.port = port
         self.user = user
         self.passwd = passwd
-        self._graph = None
+        self._graph = graph
         self.label = label
+        self.batch_size = batch_size
+
+        self._numNodes = 0
+        self._numEdges = 0
+        self._batching = False
+        self._pending = 0
+        self._nodes = []
+        self._edges = {}
+        self._updates = {}
+
+        if graph is not None:
+            self.create_indexes()
 
     """
     @brief      This is the py2neo Graph object.
@@ -32,6 +59,7 @@ class Neo4jAdapter:
         return self._graph
 
     def connect(self, watch=False):
+        import py2neo
         self._graph = py2neo.database.Graph(
             host=self.host,
             port=self.port,
@@ -40,25 +68,112 @@ class Neo4jAdapter:
         )
         if watch:
             py2neo.watch('neo4j.bolt')
+        self.create_indexes()
+
+    def create_indexes(self):
+        """
+        @brief      Indexes the node ``id`` under the session label (used by
+                    every ``MATCH`` of this adapter) and under ``I``.
+        """
+        for label in (self.label, Neo4jAdapter.NODE_LABEL):
+            self._graph.run('CREATE INDEX IF NOT EXISTS FOR (n:`%s`) ON (n.id)' % label)
+
+    def _connected(self):
+        if self._graph is None:
+            self.connect()
+        return self._graph
+
+    def add_node(self, gene, gen=0, attrs={}):
+        nodeID = self._numNodes
+        genotypeID = self.index_gene(gene, nodeID)
+        row = dict(attrs)
+        row.update(id=nodeID, gen=gen, genotype=genotypeID,
+            gene=gene_list(self.genotypes.get(genotypeID)))
+        self._nodes.append(row)
+        self._numNodes += 1
+        self._written()
+        return nodeID
 
-class NeoNode:
+    def add_edge(self, TAG, srcID, destID, attrs={}):
+        edgeID = self._numEdges
+        props = dict(attrs, id=edgeID)
+        self._edges.setdefault(TAG, []).append({'src': srcID, 'dst': destID, 'props': props})
+        self._numEdges += 1
+        self.link_chain(TAG, srcID, destID)
+        self._written()
+        return edgeID
 
-#class NeoNode(py2neo.ogm.GraphObject):
-    # __primary_label__ = "I"
-    # gene = py2neo.ogm.Property("gene")
-    # generation = py2neo.ogm.Property("gen")
-    # fitness = py2neo.ogm.Property("fitness")
-    # score = py2neo.ogm.Property("score")
+    def update_fitness(self, nodeID, fitness):
+        self._updates.setdefault(nodeID, {})['fitness'] = list(fitness)
+        self._written()
 
-    # parents = py2neo.ogm.RelatedFrom("NeoNode", "PARENT_OF")
-    # mirror = py2neo.ogm.RelatedTo("NeoNode", "MIRROR")
-    pass
-    
-class Evolve(py2neo.Relationship):
-    pass
+    def update_score(self, nodeID, score):
+        self._updates.setdefault(nodeID, {})['score'] = score
+        self._written()
 
-class ParentOf(py2neo.Relationship):
-    pass
+    def _written(self):
+        self._pending += 1
+        if not self._batching and self._pending >= self.batch_size:
+            self._write()
+
+    def statements(self):
+        """
+        @brief      The ``(cypher, parameters)`` pairs a flush would run now.
+        """
+        label = self.label
+        statements = []
+        if self._nodes:
+            statements.append((
+                'UNWIND $rows AS row CREATE (n:`%s`:`%s`) SET n = row'
+                % (Neo4jAdapter.NODE_LABEL, label),
+                {'rows': self._nodes}))
+        for TAG, rows in self._edges.items():
+            statements.append((
+                'UNWIND $rows AS row '
+                'MATCH (a:`%s` {id: row.src}), (b:`%s` {id: row.dst}) '
+                'CREATE (a)-[r:`%s`]->(b) SET r = row.props' % (label, label, TAG),
+                {'rows': rows}))
+        if self._updates:
+            statements.append((
+                'UNWIND $rows AS row MATCH (n:`%s` {id: row.id}) SET n += row.props' % label,
+                {'rows': [{'id': nodeID, 'props': props} for nodeID, props in self._updates.items()]}))
+        return statements
+
+    def _write(self):
+        statements = self.statements()
+        if statements:
+            tx = self._connected().begin()
+            for cypher, parameters in statements:
+                tx.run(cypher, parameters)
+            tx.commit()
+        self._pending = 0
+        self._nodes = []
+        self._edges = {}
+        self._updates = {}
+
+    def begin_batch(self):
+        self._batching = True
+
+    def flush(self):
+        self._write()
+        self._batching = False
+
+    def getNode(self, nodeID):
+        self._write()
+        return self._connected().run(
+            'MATCH (n:`%s` {id: $id}) RETURN n' % self.label, {'id': nodeID}).evaluate()
+
+    def getEdge(self, edgeID):
+        self._write()
+        return self._connected().run(
+            'MATCH (:`%s`)-[r {id: $id}]->() RETURN r' % self.label, {'id': edgeID}).evaluate()
+
+    def save(self):
+        self._write()
+        return 'neo4j://%s:%d (label `%s`)' % (self.host, self.port, self.label)
+
+    def numNodes(self):
+        return self._numNodes
 
 if __name__ == '__main__':
     import random
@@ -73,17 +188,14 @@ if __name__ == '__main__':
     print('\nRelationships')
     print(neodb.graph.relationship_types)
 
-    i1 = py2neo.Node("I", gene = [1,2,3], gen = 0)
-    i2 = py2neo.Node("I", gene = [1], gen = 4)
-    i3 = py2neo.Node("I", gene = [4,3], gen = 0)
-
-    r12 = Evolve(i1, i2); r12["gen"] = i2["gen"]
-    r23 = ParentOf(i1, i3); r23["gen"] = i3["gen"]
+    neodb.begin_batch()
+    i1 = neodb.add_node([1,2,3], gen=0)
+    i2 = neodb.add_node([1], gen=4)
+    i3 = neodb.add_node([4,3], gen=0)
+    neodb.add_edge('EVOLVE', i1, i2, {'gen': 4})
+    neodb.add_edge('PARENT_OF', i1, i3, {'gen': 0})
+    neodb.flush()
 
-    t = neodb.graph.begin()
-    #list(map(t.merge, [i1, i2, i3, r12, r23]))
-    t.merge(i1| i2| i3| r12| r23)
-    t.commit()
-    c = neodb.graph.find("I")
+    c = neodb.graph.find(str(SEED))
     result = list(c)
     print(type(result),'\n', result)
@@ -0,0 +1,355 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Generation-sharded storage.
+
+With ``shard_generations=N``, ``ArrayAdapter`` and ``GraphAdapter`` write a
+segment every ``N`` generations instead of one file at the end of the run. A
+run is a directory ``graphs/<name>.shards`` holding
+
+- ``segment-<k>.npz``: the nodes added since the previous segment and their
+  incoming edges (edges always point to a node added in the same generation),
+  with their node and edge IDs, and the genotypes of those nodes,
+- ``updates-<k>.npz``: fitness and score updates of nodes of earlier segments
+  (DEAP re-evaluates mutants under the ID of the individual they were cloned
+  from), applied by the reader,
+- ``manifest.json``: seed, name, edge labels and, per segment, its file, the
+  range of generations of its nodes and its node and edge ID ranges.
+
+``ShardReader`` opens a window of generations and only loads the segments it
+needs; following edges towards older nodes loads their segments on demand.
+"""
+
+from .adapter_base import new_run_directory
+from .genotype import GenotypeStore
+import json
+import numpy
+import os
+
+MANIFEST = 'manifest.json'
+
+def _truncate(segments, count, updates):
+    """
+    @brief      The first ``count`` segments, with the update files numbered
+                ``updates`` or more removed.
+    """
+    segments = [dict(s) for s in segments[:count]]
+    for s in segments:
+        s['updates'] = [filename for filename in s.get('updates', ())
+                        if updates is None or int(filename[8:-4]) < updates]
+    return segments
+
+class ShardWriter:
+    """
+    @brief      Writes the segments of an adapter. Adapters call ``flushed``
+                at the end of every generation and ``close`` on ``save``.
+
+    @param      path    The run directory, a previous run there is replaced
+    @param      every   Generations per segment
+    @param      create  Create ``path``, see ``reopen``
+    """
+    def __init__(self, path, seed, name, every=1, create=True):
+        self.path = path
+        self.seed = seed
+        self.name = name
+        self.every = every
+        self.segments = []
+        self._nodes = 0
+        self._edges = 0
+        self._flushes = 0
+        self._updateFiles = 0
+        # updates of already written nodes
+        self._lateFitness = {}
+        self._lateScores = {}
+        if create:
+            new_run_directory(path, MANIFEST)
+
+    @classmethod
+    def reopen(cls, path, segments, updates):
+        """
+        @brief      Continues writing the run in ``path`` after its first
+                    ``segments`` segments and ``updates`` update files, as
+                    recorded by a checkpoint; anything written later is
+                    dropped.
+        """
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+        writer = cls(path, manifest['seed'], manifest['name'], manifest['every'], create=False)
+        writer.segments = _truncate(manifest['segments'], segments, updates)
+        if writer.segments:
+            writer._nodes = writer.segments[-1]['node_stop']
+            writer._edges = writer.segments[-1]['edge_stop']
+        writer._updateFiles = updates
+        return writer
+
+    def position(self):
+        """
+        @return     ``(segments, update files)`` written so far, see ``reopen``.
+        """
+        return len(self.segments), self._updateFiles
+
+    def updated(self, fitnesses, scores):
+        """
+        @brief      Adapters call this from ``update_evaluations``.
+        """
+        written = self._nodes
+        for nodeID, fitness in fitnesses.items():
+            if nodeID < written:
+                self._lateFitness[nodeID] = fitness
+        for nodeID, score in scores.items():
+            if nodeID < written:
+                self._lateScores[nodeID] = score
+
+    def flushed(self, adapter):
+        self._flushes += 1
+        if self._flushes % self.every == 0:
+            self.write(adapter)
+
+    def write(self, adapter):
+        """
+        @brief      Writes the rows ``adapter`` added since the last segment.
+        """
+        nodes, edges = adapter.tables_since(self._nodes, self._edges)
+        numNodes, numEdges = len(nodes['gen']), len(edges['src'])
+        updates = self._write_updates()
+        if not numNodes and not numEdges:
+            if updates is not None and self.segments:
+                self.segments[-1]['updates'].append(updates)
+                self.write_manifest(adapter.labels)
+            return None
+
+        genotypeIDs, localGenotypes = numpy.unique(nodes['genotype'], return_inverse=True)
+        genotypes = adapter.genotypes.subset(genotypeIDs.tolist())
+        filename = 'segment-%06d.npz' % len(self.segments)
+        numpy.savez_compressed(os.path.join(self.path, filename),
+            node_id=numpy.arange(self._nodes, self._nodes + numNodes),
+            edge_id=numpy.arange(self._edges, self._edges + numEdges),
+            node_local_genotype=localGenotypes,
+            **{'genotypes_' + key: column for key, column in genotypes.to_arrays().items()},
+            **{'node_' + key: column for key, column in nodes.items()},
+            **{'edge_' + key: column for key, column in edges.items()})
+
+        self.segments.append({
+            'file'       : filename,
+            'gen_min'    : int(nodes['gen'].min()) if numNodes else None,
+            'gen_max'    : int(nodes['gen'].max()) if numNodes else None,
+            'node_start' : self._nodes,
+            'node_stop'  : self._nodes + numNodes,
+            'edge_start' : self._edges,
+            'edge_stop'  : self._edges + numEdges,
+            'updates'    : [] if updates is None else [updates]
+        })
+        self._nodes += numNodes
+        self._edges += numEdges
+        self.write_manifest(adapter.labels)
+        return filename
+
+    def _write_updates(self):
+        if not self._lateFitness and not self._lateScores:
+            return None
+        filename = 'updates-%06d.npz' % self._updateFiles
+        self._updateFiles += 1
+        numpy.savez_compressed(os.path.join(self.path, filename),
+            fitness_id=numpy.fromiter(self._lateFitness.keys(), dtype=numpy.int64),
+            fitness=numpy.array(list(self._lateFitness.values()), dtype=numpy.float64),
+            score_id=numpy.fromiter(self._lateScores.keys(), dtype=numpy.int64),
+            score=numpy.array(list(self._lateScores.values()), dtype=numpy.float64))
+        self._lateFitness = {}
+        self._lateScores = {}
+        return filename
+
+    def write_manifest(self, labels):
+        manifest = {
+            'seed'     : self.seed,
+            'name'     : self.name,
+            'every'    : self.every,
+            'labels'   : labels,
+            'segments' : self.segments
+        }
+        filename = os.path.join(self.path, MANIFEST)
+        with open(filename + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(filename + '.tmp', filename)
+
+    def close(self, adapter):
+        self.write(adapter)
+        self.write_manifest(adapter.labels)
+        return self.path
+
+class Segment:
+    """
+    @brief      One loaded segment: ``nodes`` and ``edges`` tables with an
+                ``id`` column, and its ``genotypes``.
+    """
+    def __init__(self, filename):
+        with numpy.load(filename) as data:
+            self.nodes = {key[5:]: data[key] for key in data.files if key.startswith('node_')}
+            self.edges = {key[5:]: data[key] for key in data.files if key.startswith('edge_')}
+            self.genotypes = GenotypeStore.from_arrays(
+                **{key[10:]: data[key] for key in data.files if key.startswith('genotypes_')})
+        # incoming edges grouped by target
+        self._byTarget = numpy.argsort(self.edges['dst'], kind='stable')
+        self._targets = self.edges['dst'][self._byTarget]
+
+    def row(self, nodeID):
+        return nodeID - int(self.nodes['id'][0])
+
+    def gene(self, nodeID):
+        return self.genotypes.get(int(self.nodes['local_genotype'][self.row(nodeID)]))
+
+    def in_edges(self, nodeID):
+        """
+        @return     The rows of the edges pointing to ``nodeID``.
+        """
+        lo, hi = numpy.searchsorted(self._targets, [nodeID, nodeID + 1])
+        return self._byTarget[lo:hi]
+
+class ShardReader:
+    """
+    @brief      Reads a sharded run, loading segments lazily.
+
+                reader = ShardReader('graphs/knapsack.shards')
+                nodes, edges = reader.window(500, 510)
+                reader.ancestors(int(nodes['id'][0]), min_gen=450)
+
+    @param      path      The run directory
+    @param      cache     Number of loaded segments kept in memory
+    @param      segments  Only read that many segments, and only the first
+                          ``updates`` update files (the state of a checkpoint)
+    """
+    def __init__(self, path, cache=64, segments=None, updates=None):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.seed = manifest['seed']
+        self.name = manifest['name']
+        self.labels = manifest['labels']
+        self.segments = manifest['segments']
+        if segments is not None:
+            self.segments = _truncate(self.segments, segments, updates)
+        self.cache = cache
+        self._loaded = {}
+        self._nodeStarts = numpy.array([s['node_start'] for s in self.segments], dtype=numpy.int64)
+        self._late = None
+
+    def late_updates(self):
+        """
+        @brief      ``({nodeID: fitness}, {nodeID: score})`` of the updates
+                    written after the segment of their node, the last one wins.
+        """
+        if self._late is None:
+            fitnesses, scores = {}, {}
+            for s in self.segments:
+                for filename in s.get('updates', ()):
+                    with numpy.load(os.path.join(self.path, filename)) as data:
+                        fitnesses.update(zip(data['fitness_id'].tolist(), data['fitness']))
+                        scores.update(zip(data['score_id'].tolist(), data['score'].tolist()))
+            self._late = fitnesses, scores
+        return self._late
+
+    def _apply_late(self, nodes):
+        fitnesses, scores = self.late_updates()
+        for row, nodeID in enumerate(nodes['id'].tolist()):
+            if nodeID in fitnesses:
+                fitness = fitnesses[nodeID]
+                nodes['fitness'][row, :len(fitness)] = fitness
+            if nodeID in scores:
+                nodes['score'][row] = scores[nodeID]
+
+    def numNodes(self):
+        return self.segments[-1]['node_stop'] if self.segments else 0
+
+    def segment(self, index):
+        """
+        @brief      Loads segment ``index``, or returns it from the cache.
+        """
+        segment = self._loaded.pop(index, None)
+        if segment is None:
+            segment = Segment(os.path.join(self.path, self.segments[index]['file']))
+            if len(self._loaded) >= self.cache:
+                # least recently used
+                del self._loaded[next(iter(self._loaded))]
+        self._loaded[index] = segment
+        return segment
+
+    def segment_of(self, nodeID):
+        """
+        @brief      The segment holding ``nodeID`` (and its incoming edges).
+        """
+        index = int(numpy.searchsorted(self._nodeStarts, nodeID, side='right')) - 1
+        if index < 0 or nodeID >= self.segments[index]['node_stop']:
+            raise IndexError('no node %d in %s' % (nodeID, self.path))
+        return self.segment(index)
+
+    def window(self, gen_min, gen_max):
+        """
+        @brief      The nodes of generations ``gen_min`` to ``gen_max``
+                    (inclusive), and their incoming edges.
+
+        @return     ``(nodes, edges)`` tables with an ``id`` column, see
+                    ``tables``.
+        """
+        parts = []
+        for index, s in enumerate(self.segments):
+            if s['gen_min'] is None or s['gen_max'] < gen_min or s['gen_min'] > gen_max:
+                continue
+            segment = self.segment(index)
+            inWindow = (segment.nodes['gen'] >= gen_min) & (segment.nodes['gen'] <= gen_max)
+            keepEdge = numpy.isin(segment.edges['dst'], segment.nodes['id'][inWindow])
+            parts.append((
+                {key: column[inWindow] for key, column in segment.nodes.items() if key != 'local_genotype'},
+                {key: column[keepEdge] for key, column in segment.edges.items()}))
+        if not parts:
+            return {}, {}
+        nodes = {key: numpy.concatenate([n[key] for n, _ in parts]) for key in parts[0][0]}
+        edges = {key: numpy.concatenate([e[key] for _, e in parts]) for key in parts[0][1]}
+        self._apply_late(nodes)
+        return nodes, edges
+
+    def getNode(self, nodeID):
+        segment = self.segment_of(nodeID)
+        row = segment.row(nodeID)
+        fitnesses, scores = self.late_updates()
+        fitness = segment.nodes['fitness'][row]
+        if nodeID in fitnesses:
+            fitness = fitness.copy()
+            fitness[:len(fitnesses[nodeID])] = fitnesses[nodeID]
+        return {
+            'gene'    : segment.gene(nodeID),
+            'gen'     : int(segment.nodes['gen'][row]),
+            'fitness' : fitness,
+            'score'   : scores.get(nodeID, segment.nodes['score'][row])
+        }
+
+    def in_edges(self, nodeID, TAG=None):
+        """
+        @return     ``(edgeID, source, label)`` of the edges pointing to
+                    ``nodeID``, only ``TAG`` edges if given.
+        """
+        segment = self.segment_of(nodeID)
+        edges = []
+        for row in segment.in_edges(nodeID).tolist():
+            label = self.labels[segment.edges['label'][row]]
+            if TAG is None or label == TAG:
+                edges.append((int(segment.edges['id'][row]), int(segment.edges['src'][row]), label))
+        return edges
+
+    def parents(self, nodeID, TAG='PARENT_OF'):
+        return [src for _, src, _ in self.in_edges(nodeID, TAG)]
+
+    def ancestors(self, nodeID, min_gen=None, TAG='PARENT_OF'):
+        """
+        @brief      The ancestors of ``nodeID`` born in ``min_gen`` or later,
+                    loading the segments of older nodes as they are reached.
+        """
+        seen = set()
+        stack = [nodeID]
+        while stack:
+            for parentID in self.parents(stack.pop(), TAG):
+                if parentID in seen:
+                    continue
+                if min_gen is not None and self.getNode(parentID)['gen'] < min_gen:
+                    continue
+                seen.add(parentID)
+                stack.append(parentID)
+        return sorted(seen)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Conversions of columnar node/edge tables into graphs and files.
+
+A node table maps ``gen``, ``genotype``, ``fitness`` (2-D) and ``score`` to
+arrays where row ``i`` is node ``i``. An edge table maps ``src``, ``dst``,
+``label`` (an index into a list of labels) and ``gen`` to arrays where row
+``i`` is edge ``i``. Genes are given as one (canonical) gene per node.
+"""
+
+import numpy
+
+def gene_list(gene):
+    """
+    @brief      Plain list form of a canonical gene, sets are sorted.
+    """
+    return sorted(gene) if isinstance(gene, frozenset) else list(gene)
+
+def to_graph_tool(nodes, edges, labels, genes, seed, name):
+    """
+    @brief      Materializes a graph-tool ``Graph`` with the same schema as
+                ``GraphAdapter`` (fitness is stored as ``vector<double>``).
+    """
+    from graph_tool import Graph
+
+    graph = Graph()
+    graph.gp.labels = graph.new_gp('vector<string>')
+    graph.gp.labels = [seed]
+    graph.gp.name = graph.new_gp('string')
+    graph.gp.name = name
+
+    graph.add_vertex(len(nodes['gen']))
+    graph.vp.gene = graph.new_vp('vector<int>')
+    graph.vp.genotype = graph.new_vp('long')
+    graph.vp.gen = graph.new_vp('int')
+    graph.vp.fitness = graph.new_vp('vector<double>')
+    graph.vp.score = graph.new_vp('double')
+    graph.vp.gen.get_array()[:] = nodes['gen']
+    graph.vp.genotype.get_array()[:] = nodes['genotype']
+    graph.vp.score.get_array()[:] = nodes['score']
+    graph.vp.fitness.set_2d_array(numpy.asarray(nodes['fitness']).T)
+    for v, gene in zip(graph.vertices(), genes):
+        graph.vp.gene[v] = gene_list(gene)
+
+    graph.add_edge_list(numpy.column_stack([edges['src'], edges['dst']]))
+    graph.ep.label = graph.new_ep('string')
+    graph.ep.gen = graph.new_ep('int')
+    graph.ep.gen.get_array()[:] = edges['gen']
+    for e in graph.edges():
+        graph.ep.label[e] = labels[edges['label'][graph.edge_index[e]]]
+    return graph
+
+def _gml_value(value):
+    if isinstance(value, str):
+        return '"%s"' % value.replace('"', "'")
+    if value != value:
+        # GML has no NaN literal
+        return '"nan"'
+    return repr(value)
+
+def write_gml(filename, nodes, edges, labels, genes, seed, name, chunk=65536):
+    """
+    @brief      Writes the tables as GML one record at a time, so the tables can
+                be memory-mapped and larger than RAM. Vector values (gene,
+                fitness) are written as strings.
+    """
+    with open(filename, 'w') as f:
+        f.write('graph [\n  directed 1\n  labels %s\n  name %s\n'
+            % (_gml_value(str([seed])), _gml_value(name)))
+
+        genes = iter(genes)
+        for start in range(0, len(nodes['gen']), chunk):
+            gens = nodes['gen'][start:start + chunk].tolist()
+            genotypes = nodes['genotype'][start:start + chunk].tolist()
+            fitnesses = numpy.asarray(nodes['fitness'][start:start + chunk]).tolist()
+            scores = nodes['score'][start:start + chunk].tolist()
+            rows = zip(gens, genotypes, fitnesses, scores)
+            for offset, (gen, genotype, fitness, score) in enumerate(rows):
+                f.write('  node [\n    id %d\n    gene %s\n    genotype %d\n    gen %d\n    fitness %s\n    score %s\n  ]\n'
+                    % (start + offset, _gml_value(str(gene_list(next(genes)))),
+                       genotype, gen, _gml_value(str(fitness)), _gml_value(score)))
+
+        for start in range(0, len(edges['src']), chunk):
+            rows = zip(edges['src'][start:start + chunk].tolist(),
+                       edges['dst'][start:start + chunk].tolist(),
+                       edges['label'][start:start + chunk].tolist(),
+                       edges['gen'][start:start + chunk].tolist())
+            for src, dst, label, gen in rows:
+                f.write('  edge [\n    source %d\n    target %d\n    label %s\n    gen %d\n  ]\n'
+                    % (src, dst, _gml_value(labels[label]), gen))
+        f.write(']\n')
+    return filename
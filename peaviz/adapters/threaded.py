@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Threaded Adapter.
+
+Moves the writes of an adapter off the GA loop. ``add_node`` and ``add_edge``
+hand out the next IDs right away (adapters number nodes and edges in order)
+and queue the event; a writer thread drains the queue into the adapter.
+
+The gene index and the chain caches are kept on the caller's side, so
+``fetchIndividual`` and ``walk_edge`` (``checkAndAddMirror``) never wait for
+the writer. The caller packs each gene once (see ``pack_gene``) and hands the
+packed gene to the adapter, which does not pack it again. Everything else that
+reads the adapter waits until the queue is drained first, as do ``flush``
+(unless ``flush_barrier=False``) and ``save``; ``save`` also stops the writer
+thread until the next event.
+
+Gene packing stays on the GA loop, so this pays off for adapters whose writes
+cost more than that (graph-tool, log files, Neo4j), see
+``python -m benchmarks.tracking --adapters array array-threaded log log-threaded``.
+
+    tracker = TrackerBase(GraphAdapter, threaded=True, seed_str=SEED, name='knapsack')
+"""
+
+import collections
+import threading
+
+from .adapter_base import AdapterBase
+from .genotype import PackedGene, pack_gene
+
+_STOP = ('_stop', (), None)
+
+class Writer:
+    """
+    @brief      A writer thread draining a bounded queue of events into
+                ``apply(event)``.
+
+                Putting an event is a ``collections.deque`` append. The caller
+                and the writer only synchronize, on a ``threading.Condition``,
+                when one of them has to sleep: the writer when the queue is
+                empty, the caller when it is full or on ``wait``. An idle
+                writer is only woken up once ``batch`` events are queued (or
+                by ``wait``), so it drains them in bursts instead of taking
+                the GIL for every event. The thread is started by the first
+                event and stopped by ``close``, a later event starts a new one.
+
+    @param      maxsize  Capacity of the queue, ``put`` blocks while it is full
+    @param      batch    Queued events that wake up an idle writer
+    """
+    def __init__(self, apply, maxsize=65536, name='peaviz-writer', batch=256):
+        self.apply = apply
+        self.maxsize = maxsize
+        self.batch = batch
+        self.name = name
+        self.error = None
+        self.thread = None
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        # events put / applied, only written by the caller / the writer
+        self._put = 0
+        self._done = 0
+        # set, under the condition, by a side about to sleep on it. Each side
+        # updates the queue or its counter before reading the other's flag,
+        # so at least one of them sees the other (the GIL orders them).
+        self._writerIdle = False
+        self._callerWaiting = False
+
+    def _start(self):
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def put(self, event):
+        if self.thread is None:
+            self._start()
+        queue = self._queue
+        if len(queue) >= self.maxsize:
+            self._sleep(lambda: len(queue) < self.maxsize)
+        queue.append(event)
+        self._put += 1
+        if self._writerIdle and len(queue) >= self.batch:
+            with self._condition:
+                self._condition.notify_all()
+
+    def _sleep(self, ready):
+        """
+        @brief      Blocks the caller until ``ready()``, the writer notifies
+                    after every event while the caller waits.
+        """
+        with self._condition:
+            # the writer may sleep on a partial batch
+            self._condition.notify_all()
+            self._callerWaiting = True
+            while not ready():
+                self._condition.wait()
+            self._callerWaiting = False
+
+    def _run(self):
+        queue = self._queue
+        condition = self._condition
+        while True:
+            try:
+                event = queue.popleft()
+            except IndexError:
+                with condition:
+                    self._writerIdle = True
+                    while not queue:
+                        condition.wait()
+                    self._writerIdle = False
+                continue
+            if event is _STOP:
+                return
+            if self.error is None:
+                try:
+                    self.apply(event)
+                except Exception as error:
+                    # reported by `wait`, later events are dropped
+                    self.error = error
+            self._done += 1
+            if self._callerWaiting:
+                with condition:
+                    condition.notify_all()
+
+    def wait(self):
+        """
+        @brief      Blocks until every event put so far was applied.
+        """
+        if self._done < self._put:
+            self._sleep(lambda: self._done >= self._put)
+        if self.error is not None:
+            raise RuntimeError('%s failed' % self.name) from self.error
+
+    def close(self):
+        """
+        @brief      Applies the queued events and stops the thread.
+        """
+        if self.thread is not None:
+            self._queue.append(_STOP)
+            with self._condition:
+                self._condition.notify_all()
+            self.thread.join()
+            self.thread = None
+
+class ThreadedAdapter(AdapterBase):
+    """
+    @brief      Writes to ``adapter`` from a background thread.
+
+    @param      maxsize        Capacity of the event queue
+    @param      flush_barrier  ``flush`` waits for the writer; else it only
+                               queues the adapter's flush and the GA never
+                               waits before ``save``
+    """
+    def __init__(self, adapter, maxsize=65536, flush_barrier=True):
+        AdapterBase.__init__(self, chain_tags=tuple(adapter._chain_heads))
+        self.adapter = adapter
+        self.flush_barrier = flush_barrier
+        self._numNodes = adapter.numNodes()
+        self._numEdges = getattr(adapter, '_numEdges', 0)
+        self._sync_index()
+        self.writer = Writer(self._apply, maxsize, 'peaviz-%s' % type(adapter).__name__)
+
+    def _apply(self, event):
+        method, args, expectedID = event
+        result = getattr(self.adapter, method)(*args)
+        if expectedID is not None and result != expectedID:
+            raise RuntimeError('%s returned ID %r for %s, %r was handed out'
+                               % (type(self.adapter).__name__, result, method, expectedID))
+
+    def _sync_index(self):
+        """
+        @brief      Copies the gene index and the chain caches of the (idle)
+                    adapter, after it renumbered its nodes.
+        """
+        adapter = self.adapter
+        self.genotypes = adapter.genotypes.subset(range(len(adapter.genotypes)))
+        self._gene_index = dict(adapter._gene_index)
+        self._shadowed = dict(adapter._shadowed)
+        self._chain_heads = {TAG: dict(heads) for TAG, heads in adapter._chain_heads.items()}
+        self._chain_tails = {TAG: dict(tails) for TAG, tails in adapter._chain_tails.items()}
+        self._numNodes = adapter.numNodes()
+        if hasattr(adapter, 'edge_table'):
+            self._numEdges = len(adapter.edge_table()['src'])
+
+    def __getattr__(self, name):
+        # anything else reads the adapter: wait for the writer first
+        if 'writer' not in self.__dict__:
+            raise AttributeError(name)
+        self.wait()
+        return getattr(self.adapter, name)
+
+    def add_node(self, gene, gen=0, attrs={}):
+        # packing snapshots the gene, the individual may be mutated before the
+        # writer gets to it
+        gene = PackedGene(pack_gene(gene))
+        nodeID = self._numNodes
+        self._numNodes += 1
+        self.index_gene(gene, nodeID)
+        self.writer.put(('add_node', (gene, gen, dict(attrs)), nodeID))
+        return nodeID
+
+    def add_edge(self, TAG, srcID, destID, attrs={}):
+        edgeID = self._numEdges
+        self._numEdges += 1
+        self.link_chain(TAG, srcID, destID)
+        self.writer.put(('add_edge', (TAG, srcID, destID, dict(attrs)), edgeID))
+        return edgeID
+
+    def update_fitness(self, nodeID, fitness):
+        self.writer.put(('update_fitness', (nodeID, fitness), None))
+
+    def update_score(self, nodeID, score):
+        self.writer.put(('update_score', (nodeID, score), None))
+
+    def update_evaluations(self, fitnesses, scores):
+        self.writer.put(('update_evaluations', (dict(fitnesses), dict(scores)), None))
+
+    def begin_batch(self):
+        self.writer.put(('begin_batch', (), None))
+
+    def flush(self):
+        self.writer.put(('flush', (), None))
+        if self.flush_barrier:
+            self.wait()
+
+    def wait(self):
+        """
+        @brief      Barrier: returns once the adapter applied every event.
+        """
+        self.writer.wait()
+
+    def getNode(self, nodeID):
+        self.wait()
+        return self.adapter.getNode(nodeID)
+
+    def getEdge(self, edgeID):
+        self.wait()
+        return self.adapter.getEdge(edgeID)
+
+    def prune(self, liveIDs, before_gen, archive=False):
+        self.wait()
+        remap = self.adapter.prune(liveIDs, before_gen, archive)
+        self._sync_index()
+        return remap
+
+    def load_tables(self, nodes, edges, labels, genotypes):
+        self.wait()
+        firstID = self.adapter.load_tables(nodes, edges, labels, genotypes)
+        self._sync_index()
+        return firstID
+
+    def save(self):
+        self.wait()
+        filename = self.adapter.save()
+        # no thread left behind once the run is saved, the next event starts one
+        self.writer.close()
+        return filename
+
+    def close(self):
+        """
+        @brief      Stops the writer thread, after applying the queued events.
+        """
+        self.writer.close()
+
+    def numNodes(self):
+        return self._numNodes
@@ -1,6 +1,8 @@
 import random
 
-def varAnd(population, toolbox, cxpb, mutpb, generation, otherAttrs={}):
+import numpy
+
+def varAnd(population, toolbox, cxpb, mutpb, generation, otherAttrs={}, rng=None):
     """Part of an evolutionary algorithm applying only the variation part
     (crossover **and** mutation). The modified individuals have their
     fitness invalidated. The individuals are cloned so returned population is
@@ -13,6 +15,10 @@ def varAnd(population, toolbox, cxpb, mutpb, generation, otherAttrs={}):
     :param mutpb: The probability of mutating an individual.
     :param generation: The current evolution generation, needed for tracking.
     :param otherAttrs: Any other optional attributes for all `PARENT_OF` edges in this generation.
+    :param rng: A :class:`numpy.random.Generator`. If given, all crossover and
+                mutation decisions of the generation are drawn from it at once
+                and only the individuals that are varied get cloned, see
+                below.
     :returns: A list of varied individuals that are independent of their
               parents.
 
@@ -36,7 +42,15 @@ def varAnd(population, toolbox, cxpb, mutpb, generation, otherAttrs={}):
     crossover only, mutation only, crossover and mutation, and reproduction
     according to the given probabilities. Both probabilities should be in
     :math:`[0, 1]`.
+
+    With *rng*, the variation is the same but the decisions come from *rng*
+    instead of :mod:`random` (so results are reproducible from the seed of
+    *rng*) and individuals that are neither mated nor mutated are not cloned:
+    the returned list holds the very same objects as *population* for them.
     """
+    if rng is not None:
+        return _varAndFast(population, toolbox, cxpb, mutpb, generation, otherAttrs, rng)
+
     offspring = [toolbox.clone(ind) for ind in population]
 
     # Apply crossover and mutation on the offspring
@@ -55,7 +69,32 @@ def varAnd(population, toolbox, cxpb, mutpb, generation, otherAttrs={}):
 
     return offspring
 
-def varOr(population, toolbox, lambda_, cxpb, mutpb, generation, otherAttrs={}):
+def _varAndFast(population, toolbox, cxpb, mutpb, generation, otherAttrs, rng):
+    mate = rng.random(len(population) // 2) < cxpb
+    mutate = rng.random(len(population)) < mutpb
+
+    # clone only what is going to be modified in-place
+    varied = mutate.copy()
+    pairs = numpy.flatnonzero(mate)
+    varied[2 * pairs] = varied[2 * pairs + 1] = True
+    offspring = list(population)
+    for i in numpy.flatnonzero(varied).tolist():
+        offspring[i] = toolbox.clone(offspring[i])
+
+    for i in (2 * pairs + 1).tolist():
+        offspring[i - 1], offspring[i] = toolbox.mate(
+            offspring[i - 1], offspring[i],
+            generation=generation,
+            otherAttrs=otherAttrs)
+        del offspring[i - 1].fitness.values, offspring[i].fitness.values
+
+    for i in numpy.flatnonzero(mutate).tolist():
+        offspring[i], = toolbox.mutate(offspring[i])
+        del offspring[i].fitness.values
+
+    return offspring
+
+def varOr(population, toolbox, lambda_, cxpb, mutpb, generation, otherAttrs={}, rng=None):
     """Part of an evolutionary algorithm applying only the variation part
     (crossover, mutation **or** reproduction). The modified individuals have
     their fitness invalidated. The individuals are cloned so returned
@@ -67,6 +106,11 @@ def varOr(population, toolbox, lambda_, cxpb, mutpb, generation, otherAttrs={}):
     :param lambda\_: The number of children to produce
     :param cxpb: The probability of mating two individuals.
     :param mutpb: The probability of mutating an individual.
+    :param generation: The current evolution generation, needed for tracking.
+    :param otherAttrs: Any other optional attributes for all `PARENT_OF` edges in this generation.
+    :param rng: A :class:`numpy.random.Generator`. If given, the operator
+                choices and parent indices of all *lambda_* children are drawn
+                from it at once.
     :returns: The final population
     :returns: A class:`~deap.tools.Logbook` with the statistics of the
               evolution
@@ -89,10 +133,16 @@ def varOr(population, toolbox, lambda_, cxpb, mutpb, generation, otherAttrs={}):
     both operations crossover and mutation. The sum of both probabilities
     shall be in :math:`[0, 1]`, the reproduction probability is
     1 - *cxpb* - *mutpb*.
+
+    With *rng*, the draws come from *rng* instead of :mod:`random`, so results
+    are reproducible from the seed of *rng*.
     """
     assert (cxpb + mutpb) <= 1.0, ("The sum of the crossover and mutation "
                                    "probabilities must be smaller or equal to 1.0.")
 
+    if rng is not None:
+        return _varOrFast(population, toolbox, lambda_, cxpb, mutpb, generation, otherAttrs, rng)
+
     offspring = []
     for _ in range(lambda_):
         op_choice = random.random()
@@ -112,3 +162,35 @@ def varOr(population, toolbox, lambda_, cxpb, mutpb, generation, otherAttrs={}):
             offspring.append(random.choice(population))
 
     return offspring
+
+def _varOrFast(population, toolbox, lambda_, cxpb, mutpb, generation, otherAttrs, rng):
+    op_choices = rng.random(lambda_).tolist()
+    first = rng.integers(len(population), size=lambda_)
+    if len(population) > 1:
+        # a second, different, parent for crossovers
+        second = rng.integers(len(population) - 1, size=lambda_)
+        second += second >= first
+        first, second = first.tolist(), second.tolist()
+    elif any(op_choice < cxpb for op_choice in op_choices):
+        raise ValueError('crossover needs a population of at least 2 individuals')
+    else:
+        first = second = first.tolist()
+
+    offspring = []
+    for op_choice, i, j in zip(op_choices, first, second):
+        if op_choice < cxpb:            # Apply crossover
+            ind1, ind2 = toolbox.clone(population[i]), toolbox.clone(population[j])
+            ind1, ind2 = toolbox.mate(ind1, ind2,
+                generation=generation,
+                otherAttrs=otherAttrs)
+            del ind1.fitness.values
+            offspring.append(ind1)
+        elif op_choice < cxpb + mutpb:  # Apply mutation
+            ind = toolbox.clone(population[i])
+            ind, = toolbox.mutate(ind)
+            del ind.fitness.values
+            offspring.append(ind)
+        else:                           # Apply reproduction
+            offspring.append(population[i])
+
+    return offspring
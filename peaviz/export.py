@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Exports a run as Parquet tables, for pandas, Polars or DuckDB.
+
+Parsing the GML of a big run is slow and reads everything; the Parquet tables
+are compressed, columnar and split into row groups of ``gens_per_group``
+generations, so readers only load the columns and generations they ask for:
+
+- ``nodes.parquet``: ``id``, ``gen``, ``fitness_0``... ``fitness_<k>``,
+  ``score``, ``genotype`` (an ``id`` of ``genotypes.parquet``),
+- ``edges.parquet``: ``src``, ``dst``, ``label`` (dictionary encoded), ``gen``
+  (the later of the edge's own generation and its endpoints', as in
+  ``peaviz.replay``),
+- ``genotypes.parquet``: ``id``, ``gene``, each distinct gene once.
+
+Rows are ordered by generation. The run's name and edge labels are kept in the
+schema metadata.
+
+    python -m peaviz.export graphs/knapsack.npz exports/knapsack
+    duckdb -c "SELECT gen, max(fitness_0) FROM 'exports/knapsack/nodes.parquet' WHERE gen >= 50 GROUP BY gen"
+
+``pyarrow`` is only needed here, it is not a dependency of PEAviz.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy
+
+from . import replay
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError('exporting to Parquet needs pyarrow (pip install pyarrow)') from error
+    return pyarrow, pyarrow.parquet
+
+def _run(source):
+    """
+    @brief      ``source`` as a ``replay.Run``: a saved run, a ``Run`` or an
+                adapter with tables (``ArrayAdapter``, ``LogAdapter``).
+    """
+    if isinstance(source, replay.Run):
+        return source
+    if isinstance(source, str):
+        return replay.load(source)
+    if not hasattr(source, 'node_table'):
+        raise TypeError('%s has no tables, save it and export the file' % type(source).__name__)
+    return replay.Run(source.node_table(), source.edge_table(), source.labels,
+        replay._strings(source.node_genes()), source.name)
+
+def _intern(genes):
+    index = {}
+    genotypeIDs = numpy.fromiter((index.setdefault(gene, len(index)) for gene in genes),
+                                 dtype=numpy.int64, count=len(genes))
+    return genotypeIDs, list(index)
+
+def _groups(gens, gens_per_group):
+    """
+    @brief      Bounds of the row groups of rows sorted by ``gens``.
+    """
+    starts = numpy.arange(int(gens[0]), int(gens[-1]) + 1, gens_per_group)
+    return numpy.searchsorted(gens, starts).tolist() + [len(gens)]
+
+def _write(pq, table, filename, gens, gens_per_group, compression):
+    """
+    @brief      Writes ``table`` (sorted by generation) with one row group per
+                ``gens_per_group`` generations, so that the statistics of the
+                row groups skip the generations a reader filters out.
+    """
+    if not len(gens):
+        pq.write_table(table, filename, compression=compression)
+        return
+    bounds = _groups(gens, gens_per_group)
+    with pq.ParquetWriter(filename, table.schema, compression=compression) as writer:
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if stop > start:
+                writer.write_table(table.slice(start, stop - start), row_group_size=stop - start)
+
+def export(source, directory, gens_per_group=10, compression='zstd', genes=True):
+    """
+    @brief      Writes the node, edge and genotype tables of ``source`` to
+                ``directory``.
+
+    @param      source          A saved run (see ``peaviz.replay.load``), a
+                                ``peaviz.replay.Run`` or an adapter with tables
+    @param      gens_per_group  Generations per row group
+    @param      compression     Parquet codec: ``zstd``, ``snappy``, ``none``...
+    @param      genes           Write ``genotypes.parquet``
+
+    @return     The paths of the tables written.
+    """
+    pa, pq = _pyarrow()
+    run = _run(source)
+    if gens_per_group < 1:
+        raise ValueError('gens_per_group must be at least 1')
+    os.makedirs(directory, exist_ok=True)
+    metadata = {'peaviz.name': run.name, 'peaviz.labels': json.dumps(run.labels)}
+
+    nodeGen = numpy.asarray(run.nodes['gen'], dtype=numpy.int64)
+    order = numpy.argsort(nodeGen, kind='stable')
+    fitness = numpy.asarray(run.nodes['fitness'], dtype=numpy.float64)
+    if fitness.ndim != 2:
+        fitness = fitness.reshape(len(nodeGen), -1) if len(nodeGen) else fitness.reshape(0, 0)
+    genotypeIDs, distinct = _intern(run.genes)
+    columns = {'id': order, 'gen': nodeGen[order].astype(numpy.int32)}
+    for component in range(fitness.shape[1]):
+        columns['fitness_%d' % component] = fitness[order, component]
+    columns['score'] = numpy.asarray(run.nodes['score'], dtype=numpy.float64)[order]
+    columns['genotype'] = genotypeIDs[order]
+    nodes = pa.table(columns).replace_schema_metadata(metadata)
+
+    src, dst = run.edges['src'], run.edges['dst']
+    edgeGen = numpy.asarray(run.edges['gen'], dtype=numpy.int64)
+    if len(edgeGen):
+        edgeGen = numpy.maximum(edgeGen, numpy.maximum(nodeGen[src], nodeGen[dst]))
+    edgeOrder = numpy.argsort(edgeGen, kind='stable')
+    labels = pa.DictionaryArray.from_arrays(
+        pa.array(numpy.asarray(run.edges['label'], dtype=numpy.int32)[edgeOrder]),
+        pa.array(run.labels, type=pa.string()))
+    edges = pa.table({
+        'src'   : numpy.asarray(src, dtype=numpy.int64)[edgeOrder],
+        'dst'   : numpy.asarray(dst, dtype=numpy.int64)[edgeOrder],
+        'label' : labels,
+        'gen'   : edgeGen[edgeOrder].astype(numpy.int32)
+    }).replace_schema_metadata(metadata)
+
+    written = []
+    for tableName, table, gens in (('nodes', nodes, nodeGen[order]), ('edges', edges, edgeGen[edgeOrder])):
+        filename = os.path.join(directory, tableName + '.parquet')
+        _write(pq, table, filename, gens, gens_per_group, compression)
+        written.append(filename)
+    if genes:
+        filename = os.path.join(directory, 'genotypes.parquet')
+        pq.write_table(pa.table({'id': numpy.arange(len(distinct), dtype=numpy.int64),
+                                 'gene': pa.array(distinct, type=pa.string())}),
+                       filename, compression=compression)
+        written.append(filename)
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m peaviz.export', description=__doc__.split('\n\n')[0])
+    parser.add_argument('path', help='saved run (.gml, .npz, .log, .shards...)')
+    parser.add_argument('directory', help='output directory')
+    parser.add_argument('--gens-per-group', type=int, default=10, help='generations per row group')
+    parser.add_argument('--compression', default='zstd')
+    parser.add_argument('--no-genes', action='store_true', help='skip genotypes.parquet')
+    args = parser.parse_args(argv)
+
+    if args.gens_per_group < 1:
+        parser.error('--gens-per-group must be at least 1')
+    for filename in export(args.path, args.directory, args.gens_per_group, args.compression,
+                           not args.no_genes):
+        print(filename)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
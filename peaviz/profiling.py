@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation of trackers and adapters.
+
+``Profiler.instrument`` shadows methods of one object with timed wrappers, so
+nothing is wrapped (and nothing costs anything) unless profiling was asked
+for:
+
+    tracker = TrackerBase(ArrayAdapter, profile=True, seed_str=..., name=...)
+    ...
+    print(tracker.profiler.table())
+    tracker.profiler.dump('profile.json')
+
+Times are inclusive: ``tracker.setParents`` includes the ``adapter.add_edge``
+calls it makes.
+"""
+
+import functools
+import json
+import time
+
+# latencies are bucketed by powers of 2 nanoseconds, bucket k holds
+# latencies in [2**(k-1), 2**k)
+BUCKETS = 64
+
+class Operation:
+    """
+    @brief      Call count, cumulative time and latency histogram of one
+                operation.
+    """
+    __slots__ = ('count', 'total', 'min', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.histogram = [0] * BUCKETS
+
+    def add(self, ns):
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if ns > self.max:
+            self.max = ns
+        self.histogram[min(ns.bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, q):
+        """
+        @brief      Upper bound of the bucket holding the ``q``-th percentile,
+                    in nanoseconds.
+        """
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= rank:
+                return min(1 << bucket, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count'         : self.count,
+            'total_seconds' : self.total / 1e9,
+            'mean_ns'       : self.total / self.count if self.count else 0,
+            'min_ns'        : self.min,
+            'max_ns'        : self.max,
+            'p50_ns'        : self.percentile(50),
+            'p99_ns'        : self.percentile(99),
+            'histogram'     : {'<%d' % (1 << bucket): count
+                               for bucket, count in enumerate(self.histogram) if count}
+        }
+
+class Profiler:
+    """
+    @brief      Records timed calls per operation, and per generation.
+
+                ``generation`` is the key calls are currently recorded under,
+                ``TrackerBase.begin_generation`` sets it.
+    """
+    def __init__(self):
+        self.operations = {}
+        self.generations = {}
+        self.generation = None
+        self._clock = time.perf_counter_ns
+
+    def instrument(self, obj, names, prefix=''):
+        """
+        @brief      Times every call of the methods ``names`` of ``obj`` as the
+                    operation ``prefix + name``. Missing methods are skipped.
+        """
+        for name in names:
+            method = getattr(obj, name, None)
+            if callable(method):
+                setattr(obj, name, self.timed(prefix + name, method))
+        return obj
+
+    def timed(self, operation, method):
+        clock = self._clock
+        record = self.record
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(operation, clock() - start)
+        return timed
+
+    def record(self, operation, ns):
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = Operation()
+        stats.add(ns)
+
+        perGeneration = self.generations.get(self.generation)
+        if perGeneration is None:
+            perGeneration = self.generations[self.generation] = {}
+        counters = perGeneration.get(operation)
+        if counters is None:
+            perGeneration[operation] = [1, ns]
+        else:
+            counters[0] += 1
+            counters[1] += ns
+
+    def as_dict(self):
+        return {
+            'operations'  : {name: stats.as_dict() for name, stats in sorted(self.operations.items())},
+            'generations' : [
+                {
+                    'gen'        : gen,
+                    'operations' : {name: {'count': count, 'total_seconds': total / 1e9}
+                                    for name, (count, total) in sorted(counters.items())}
+                }
+                for gen, counters in self.generations.items()
+            ]
+        }
+
+    def dump(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+        return filename
+
+    def table(self):
+        """
+        @brief      The operations as a text table, slowest first.
+        """
+        rows = [('operation', 'calls', 'total s', 'mean ns', 'p50 ns', 'p99 ns', 'max ns')]
+        for name, stats in sorted(self.operations.items(), key=lambda item: -item[1].total):
+            rows.append((name, str(stats.count), '%.4f' % (stats.total / 1e9),
+                '%.0f' % (stats.total / stats.count), str(stats.percentile(50)),
+                str(stats.percentile(99)), str(stats.max)))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return '\n'.join(
+            '  '.join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                      for i, (cell, width) in enumerate(zip(row, widths)))
+            for row in rows)
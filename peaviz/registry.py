@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Adapters and streamers by name, imported on first use.
+
+Backends are registered as ``'module:attribute'`` strings, so that naming one
+costs nothing until it is resolved: ``import peaviz`` does not load
+graph-tool, neo4j or gephistreamer, only the backend a run uses is imported.
+
+    tracker = TrackerBase('array', seed_str=SEED, name='knapsack')
+    hub = TrackerHub(streamer('batched', batch_size=500))
+
+Third-party backends register themselves with ``register_adapter`` (or
+``register_streamer``), or through the ``peaviz.adapters`` /
+``peaviz.streamers`` entry point groups of their package.
+"""
+
+import importlib
+
+ADAPTERS = {
+    'array' : 'peaviz.adapters.array_adapter:ArrayAdapter',
+    'graph' : 'peaviz.adapters.graph_adapter:GraphAdapter',
+    'log'   : 'peaviz.adapters.log_adapter:LogAdapter',
+    'neo4j' : 'peaviz.adapters.neo4j_adapter:Neo4jAdapter'
+}
+
+STREAMERS = {
+    'gephi'   : 'peaviz.registry:gephi_streamer',
+    'batched' : 'peaviz.streaming:BatchedStreamer'
+}
+
+def load(target):
+    """
+    @brief      Imports ``'module:attribute'`` and returns the attribute.
+                Anything else is returned as is.
+    """
+    if not isinstance(target, str):
+        return target
+    module, _, attribute = target.partition(':')
+    return getattr(importlib.import_module(module), attribute)
+
+def _entry_point(group, name):
+    from importlib.metadata import entry_points
+
+    for entry in entry_points(group=group):
+        if entry.name == name:
+            return entry.value
+    return None
+
+def _resolve(registry, group, name):
+    target = registry.get(name)
+    if target is None:
+        target = _entry_point(group, name)
+        if target is None:
+            raise KeyError('unknown %s %r, known: %s' % (group[7:-1], name, ', '.join(sorted(registry))))
+    value = load(target)
+    # later lookups skip the import machinery
+    registry[name] = value
+    return value
+
+def register_adapter(name, target):
+    """
+    @brief      Registers an adapter class, or the ``'module:attribute'``
+                string naming it.
+    """
+    ADAPTERS[name] = target
+
+def register_streamer(name, target):
+    """
+    @brief      Registers a streamer factory, or the ``'module:attribute'``
+                string naming it. It is called with the keyword arguments of
+                ``streamer``.
+    """
+    STREAMERS[name] = target
+
+def adapter(name):
+    """
+    @brief      The adapter class registered as ``name``; classes are returned
+                as is, so ``TrackerBase`` accepts both.
+    """
+    if not isinstance(name, str):
+        return name
+    return _resolve(ADAPTERS, 'peaviz.adapters', name)
+
+def streamer(name='gephi', **kwargs):
+    """
+    @brief      Builds the streamer registered as ``name``.
+    """
+    return _resolve(STREAMERS, 'peaviz.streamers', name)(**kwargs)
+
+def gephi_streamer(**kwargs):
+    """
+    @brief      ``gephistreamer``'s blocking ``Streamer`` over ``GephiREST``,
+                the default streamer of ``TrackerHub``.
+    """
+    from gephistreamer import streamer
+
+    return streamer.Streamer(streamer.GephiREST(**kwargs))
@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Replays a saved run into Gephi, generation by generation.
+
+Streaming live from ``TrackerHub`` slows the GA down; replaying the saved run
+afterwards gives the same animated growth, at any pace and as many times as
+needed. Reads every format PEAviz saves:
+
+- ``.npz`` (``ArrayAdapter``, ``peaviz.runner`` merges),
+- ``.log`` directories (``LogAdapter``) and ``.shards`` directories,
+- GML and the other graph-tool formats (``GraphAdapter``; networkx is used for
+  GML when graph-tool is missing).
+
+Nodes and edges are grouped into frames of ``coalesce`` generations. Each
+frame is sent as ``an`` and ``ae`` GraphStream actions of up to ``chunk``
+entities (see ``BatchedStreamer.payload``), then the replay waits for the next
+frame:
+
+    python -m peaviz.replay graphs/knapsack.gml --fps 4 --gen-min 10 --gen-max 60
+    python -m peaviz.replay graphs/knapsack.npz --coalesce 5 --output frames.json
+"""
+
+import argparse
+import ast
+import json
+import os.path
+import sys
+import time
+
+import numpy
+
+from .adapters.tables import gene_list
+from .streaming import BatchedStreamer
+
+class Run:
+    """
+    @brief      A saved run as tables: ``nodes`` (``gen``, ``fitness``,
+                ``score``), ``edges`` (``src``, ``dst``, ``label`` indexing
+                ``labels``, ``gen``) and ``genes``, the gene of node ``i`` as a
+                string. Node ``i`` has ID ``i``.
+    """
+    def __init__(self, nodes, edges, labels, genes, name=''):
+        self.nodes = nodes
+        self.edges = edges
+        self.labels = list(labels)
+        self.genes = genes
+        self.name = name
+
+def _strings(genes):
+    return [str(gene_list(gene)) for gene in genes]
+
+def _load_npz(path):
+    from .adapters.genotype import GenotypeStore
+
+    with numpy.load(path) as data:
+        nodes = {key[5:]: data[key] for key in data.files if key.startswith('node_')}
+        edges = {key[5:]: data[key] for key in data.files if key.startswith('edge_')}
+        store = GenotypeStore.from_arrays(
+            **{key[10:]: data[key] for key in data.files if key.startswith('genotypes_')})
+        labels = data['labels'].tolist()
+    genes = _strings(store.get(genotypeID) for genotypeID in nodes['genotype'].tolist())
+    return Run(nodes, edges, labels, genes, os.path.basename(path))
+
+def _load_log(path):
+    from .adapters.log_adapter import LogReader
+
+    reader = LogReader(path)
+    return Run(reader.node_table(), reader.edge_table(), reader.labels,
+        _strings(reader.node_genes()), reader.name)
+
+def _load_shards(path):
+    from .adapters.shards import ShardReader
+
+    reader = ShardReader(path, cache=1)
+    nodes, edges = reader.window(-numpy.inf, numpy.inf)
+    genes = []
+    for index in range(len(reader.segments)):
+        segment = reader.segment(index)
+        genes.extend(_strings(segment.gene(nodeID) for nodeID in segment.nodes['id'].tolist()))
+    return Run(nodes, edges, reader.labels, genes, reader.name)
+
+def _vector(value):
+    # GML stores vectors as strings
+    if isinstance(value, str):
+        value = ast.literal_eval(value) if value not in ('', 'nan') else []
+    return list(value) if hasattr(value, '__iter__') else [value]
+
+def _table(gens, fitnesses, scores, src, dst, labels, edgeGens):
+    width = max(map(len, fitnesses), default=0)
+    names = sorted(set(labels))
+    nodes = {
+        'gen'     : numpy.array(gens, dtype=numpy.int64),
+        'fitness' : numpy.array([f + [numpy.nan] * (width - len(f)) for f in fitnesses],
+                                dtype=numpy.float64).reshape(-1, width),
+        'score'   : numpy.array(scores, dtype=numpy.float64)
+    }
+    edges = {
+        'src'   : numpy.array(src, dtype=numpy.int64),
+        'dst'   : numpy.array(dst, dtype=numpy.int64),
+        'label' : numpy.array([names.index(label) for label in labels], dtype=numpy.uint8),
+        'gen'   : numpy.array(edgeGens, dtype=numpy.int64)
+    }
+    return nodes, edges, names
+
+def _load_graph_tool(path):
+    from graph_tool import load_graph
+
+    graph = load_graph(path)
+    vp, ep = graph.vp, graph.ep
+    vertices = list(graph.vertices())
+    if 'gene' in vp:
+        genes = [str(_vector(vp.gene[v])) for v in vertices]
+    elif 'genotypes' in graph.gp:
+        genotypes = list(graph.gp.genotypes)
+        genes = [genotypes[int(vp.genotype[v])] for v in vertices]
+    else:
+        genes = [''] * len(vertices)
+    edgeList = list(graph.edges())
+    nodes, edges, labels = _table(
+        [int(vp.gen[v]) for v in vertices],
+        [[float(f) for f in _vector(vp.fitness[v])] for v in vertices],
+        [float(vp.score[v]) for v in vertices],
+        [int(e.source()) for e in edgeList], [int(e.target()) for e in edgeList],
+        [str(ep.label[e]) for e in edgeList], [int(ep.gen[e]) for e in edgeList])
+    return Run(nodes, edges, labels, genes, os.path.basename(path))
+
+def _load_networkx(path):
+    import networkx
+
+    graph = networkx.read_gml(path, label='id')
+    nodeIDs = sorted(graph.nodes)
+    index = {nodeID: i for i, nodeID in enumerate(nodeIDs)}
+    data = [graph.nodes[nodeID] for nodeID in nodeIDs]
+    edgeList = list(graph.edges(data=True))
+    nodes, edges, labels = _table(
+        [int(d.get('gen', 0)) for d in data],
+        [[float(f) for f in _vector(d.get('fitness', []))] for d in data],
+        [float(d.get('score', 'nan')) for d in data],
+        [index[src] for src, _, _ in edgeList], [index[dst] for _, dst, _ in edgeList],
+        [str(d.get('label', '')) for _, _, d in edgeList],
+        [int(d.get('gen', 0)) for _, _, d in edgeList])
+    return Run(nodes, edges, labels, [str(d.get('gene', '')) for d in data],
+        os.path.basename(path))
+
+def load(path):
+    """
+    @brief      Reads a saved run, see the module documentation for the
+                formats.
+    """
+    path = path.rstrip(os.sep)
+    if path.endswith('.npz'):
+        return _load_npz(path)
+    if os.path.isdir(path):
+        if os.path.exists(os.path.join(path, 'manifest.json')):
+            return _load_shards(path)
+        return _load_log(path)
+    try:
+        return _load_graph_tool(path)
+    except ImportError:
+        if not path.endswith('.gml'):
+            raise
+        return _load_networkx(path)
+
+def frames(run, gen_min=None, gen_max=None, coalesce=1):
+    """
+    @brief      Groups the run into frames of ``coalesce`` generations.
+
+                An edge is shown with the later of its endpoints, and never
+                before its own generation.
+
+    @return     ``(first gen, last gen, node IDs, edge IDs)`` per frame, in
+                generation order.
+    """
+    nodeGen = numpy.asarray(run.nodes['gen'], dtype=numpy.int64)
+    if not len(nodeGen):
+        return
+    src, dst = run.edges['src'], run.edges['dst']
+    edgeGen = numpy.maximum(numpy.asarray(run.edges['gen'], dtype=numpy.int64),
+                            numpy.maximum(nodeGen[src], nodeGen[dst]))
+    lo = int(nodeGen.min()) if gen_min is None else gen_min
+    hi = int(nodeGen.max()) if gen_max is None else gen_max
+    numFrames = max((hi - lo) // coalesce + 1, 0)
+    inWindow = (edgeGen >= lo) & (edgeGen <= hi)
+    edgeFrame = numpy.where(inWindow, (edgeGen - lo) // coalesce, numFrames)
+    nodeFrame = numpy.where((nodeGen >= lo) & (nodeGen <= hi), (nodeGen - lo) // coalesce, numFrames)
+    # older endpoints of the edges of the window come with the first frame
+    older = numpy.zeros(len(nodeGen), dtype=bool)
+    older[src[inWindow]] = True
+    older[dst[inWindow]] = True
+    nodeFrame[older & (nodeGen < lo)] = 0
+    nodeOrder = numpy.argsort(nodeFrame, kind='stable')
+    edgeOrder = numpy.argsort(edgeFrame, kind='stable')
+    nodeBounds = numpy.searchsorted(nodeFrame[nodeOrder], numpy.arange(numFrames + 1))
+    edgeBounds = numpy.searchsorted(edgeFrame[edgeOrder], numpy.arange(numFrames + 1))
+    for frame in range(numFrames):
+        first = lo + frame * coalesce
+        yield (first, min(first + coalesce - 1, hi),
+               nodeOrder[nodeBounds[frame]:nodeBounds[frame + 1]],
+               edgeOrder[edgeBounds[frame]:edgeBounds[frame + 1]])
+
+def _number(value):
+    # GraphStream JSON has no NaN
+    return None if value != value else value
+
+def node_attributes(run, nodeID, genes=False):
+    """
+    @brief      GraphStream attributes of a node. Vectors are flattened to
+                strings, GraphStream rejects compound values.
+    """
+    fitness = run.nodes['fitness'][nodeID]
+    attributes = {
+        'gen'     : int(run.nodes['gen'][nodeID]),
+        'score'   : _number(float(run.nodes['score'][nodeID])),
+        'fitness' : ','.join('%g' % f for f in fitness if f == f)
+    }
+    if genes:
+        attributes['gene'] = run.genes[nodeID]
+    return attributes
+
+def edge_attributes(run, edgeID):
+    return {
+        'source'   : str(int(run.edges['src'][edgeID])),
+        'target'   : str(int(run.edges['dst'][edgeID])),
+        'directed' : True,
+        'label'    : run.labels[run.edges['label'][edgeID]],
+        'gen'      : int(run.edges['gen'][edgeID])
+    }
+
+def _chunks(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+def replay(run, streamer, fps=1.0, gen_min=None, gen_max=None, coalesce=1, genes=False,
+    chunk=1000, verbose=False):
+    """
+    @brief      Streams ``run`` into ``streamer`` (anything with ``put`` and
+                ``flush``, like ``BatchedStreamer``), ``fps`` frames per second
+                at most (``0``: as fast as possible).
+
+    @param      chunk  Entities per GraphStream action
+
+    @return     The number of frames sent.
+    """
+    interval = 1.0 / fps if fps else 0.0
+    count = 0
+    for first, last, nodeIDs, edgeIDs in frames(run, gen_min, gen_max, coalesce):
+        start = time.monotonic()
+        for ids in _chunks(nodeIDs.tolist(), chunk):
+            streamer.put('an', {str(nodeID): node_attributes(run, nodeID, genes) for nodeID in ids})
+        for ids in _chunks(edgeIDs.tolist(), chunk):
+            streamer.put('ae', {str(edgeID): edge_attributes(run, edgeID) for edgeID in ids})
+        streamer.flush()
+        count += 1
+        if verbose:
+            print('gen %d-%d: %d nodes, %d edges' % (first, last, len(nodeIDs), len(edgeIDs)))
+        remaining = interval - (time.monotonic() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+    return count
+
+class FileStreamer:
+    """
+    @brief      Writes the GraphStream actions to a file, one JSON object per
+                line, instead of sending them.
+    """
+    def __init__(self, filename):
+        self.file = open(filename, 'w')
+
+    def put(self, event, entities):
+        self.file.write(json.dumps({event: entities}) + '\n')
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m peaviz.replay', description=__doc__.split('\n\n')[0])
+    parser.add_argument('path', help='saved run (.gml, .npz, .log, .shards...)')
+    parser.add_argument('--hostname', default='localhost')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workspace', default='workspace1')
+    parser.add_argument('--fps', type=float, default=1.0, help='frames per second, 0 for no limit')
+    parser.add_argument('--coalesce', type=int, default=1, help='generations per frame')
+    parser.add_argument('--gen-min', type=int)
+    parser.add_argument('--gen-max', type=int)
+    parser.add_argument('--batch-size', type=int, default=500, help='actions per request')
+    parser.add_argument('--chunk', type=int, default=1000, help='nodes or edges per action')
+    parser.add_argument('--genes', action='store_true', help='send the genes as node attributes')
+    parser.add_argument('--output', help='write the actions to this file instead of Gephi')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.coalesce < 1:
+        parser.error('--coalesce must be at least 1')
+    run = load(args.path)
+    if args.output:
+        streamer = FileStreamer(args.output)
+    else:
+        streamer = BatchedStreamer(args.hostname, args.port, args.workspace,
+            batch_size=args.batch_size)
+    try:
+        count = replay(run, streamer, args.fps, args.gen_min, args.gen_max, args.coalesce,
+            args.genes, args.chunk, not args.quiet)
+    finally:
+        streamer.close()
+    if not args.quiet:
+        print('%d frames, %d nodes, %d edges' % (count, len(run.nodes['gen']), len(run.edges['src'])))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Runs one experiment for many seeds on a process pool.
+
+Each worker seeds ``random`` and ``numpy.random``, builds its own tracker (and
+adapter) through a ``TrackerFactory`` and saves its own graph, named
+``<name>-<seed>`` and labelled with the seed (``gp.labels``). The summaries are
+merged once all seeds are done, the graphs too if asked:
+
+    def experiment(seed, tracker):
+        toolbox = makeToolbox(tracker)   # registers `breedAndTrack`, ...
+        pop = ...
+        return {'best': max(ind.fitness.values[1] for ind in pop)}
+
+    results = run_seeds(experiment, range(32),
+        TrackerFactory(peaviz.adapters.ArrayAdapter, 'knapsack', metrics=True),
+        merge_graphs=True)
+
+``experiment`` and the factory are sent to the workers, they must be picklable
+(module level functions, ``functools.partial`` of them).
+"""
+
+import multiprocessing
+import numbers
+import os.path
+import random
+
+import numpy
+
+from .trackers import TrackerBase
+
+class TrackerFactory:
+    """
+    @brief      Builds the tracker of one seed: ``trackerClass(adapterClass,
+                seed_str=str(seed), name='<name>-<seed>', **kwargs)``.
+    """
+    def __init__(self, adapterClass, name, trackerClass=TrackerBase, **kwargs):
+        self.adapterClass = adapterClass
+        self.name = name
+        self.trackerClass = trackerClass
+        self.kwargs = kwargs
+
+    def __call__(self, seed):
+        return self.trackerClass(self.adapterClass,
+            seed_str=str(seed), name='%s-%s' % (self.name, seed), **self.kwargs)
+
+def run_seed(experiment, factory, seed):
+    """
+    @brief      Runs ``experiment`` for ``seed`` in the current process.
+
+    @return     The summary of the run: ``seed``, ``graph`` (the saved file),
+                ``nodes``, ``result`` (what ``experiment`` returned) and, if
+                the tracker keeps them, ``metrics`` per generation.
+    """
+    random.seed(seed)
+    numpy.random.seed(seed)
+    tracker = factory(seed)
+    result = experiment(seed, tracker)
+    summary = {
+        'seed'   : seed,
+        'graph'  : tracker.save(),
+        'nodes'  : tracker.numNodes(),
+        'result' : result
+    }
+    if tracker.metrics is not None:
+        summary['metrics'] = tracker.metrics.history
+    return summary
+
+def _run_seed(args):
+    return run_seed(*args)
+
+def merge_summaries(summaries):
+    """
+    @brief      One result set for many seeds: the summaries in seed order, and
+                the mean and standard deviation across seeds of every numeric
+                field of the results.
+    """
+    results = [s['result'] for s in summaries if isinstance(s['result'], dict)]
+    fields = sorted({key for result in results for key, value in result.items()
+                     if isinstance(value, numbers.Number)})
+    values = {key: [r[key] for r in results if isinstance(r.get(key), numbers.Number)]
+              for key in fields}
+    return {
+        'seeds' : [s['seed'] for s in summaries],
+        'runs'  : summaries,
+        'mean'  : {key: float(numpy.mean(v)) for key, v in values.items()},
+        'std'   : {key: float(numpy.std(v)) for key, v in values.items()}
+    }
+
+def merge_graph_files(filenames, seeds, output):
+    """
+    @brief      Merges per-seed graphs into ``output``. Node and edge IDs are
+                offset run after run, a ``seed`` column (vertex property)
+                tells the runs apart and the seeds are the graph labels.
+
+                ``.npz`` files of ``ArrayAdapter`` and ``.log`` directories of
+                ``LogAdapter`` are merged column-wise into an ``.npz`` file,
+                genotypes are re-interned and fitness is padded with ``nan``
+                to the widest run; other files are loaded with graph-tool.
+                Sharded runs are not merged, see ``ShardReader`` or
+                ``peaviz.export``.
+    """
+    tabular = [filename.endswith('.npz') or os.path.isdir(filename) for filename in filenames]
+    if all(tabular):
+        return _merge_arrays(filenames, seeds, output)
+    if any(tabular):
+        raise ValueError('.npz files and .log directories cannot be merged with graph-tool files')
+    return _merge_graph_tool(filenames, seeds, output)
+
+def _read_tables(filename):
+    """
+    @brief      ``(nodes, edges, labels, genes)`` of a saved ``.npz`` file or
+                ``.log`` directory, ``genes[i]`` being the gene of genotype
+                ``i``.
+    """
+    if os.path.isdir(filename):
+        if os.path.exists(os.path.join(filename, 'manifest.json')):
+            raise ValueError('%s is a sharded run, read it with ShardReader or export it '
+                             'with peaviz.export' % filename)
+        from .adapters.log_adapter import LogReader
+
+        reader = LogReader(filename)
+        return reader.node_table(), reader.edge_table(), reader.labels, reader.genes
+
+    from .adapters.genotype import GenotypeStore
+
+    with numpy.load(filename) as data:
+        store = GenotypeStore.from_arrays(
+            **{key[10:]: data[key] for key in data.files if key.startswith('genotypes_')})
+        return ({key[5:]: data[key] for key in data.files if key.startswith('node_')},
+                {key[5:]: data[key] for key in data.files if key.startswith('edge_')},
+                data['labels'].tolist(), [store.get(i) for i in range(len(store))])
+
+def _merge_arrays(filenames, seeds, output):
+    from .adapters.genotype import GenotypeStore
+
+    genotypes = GenotypeStore()
+    labels = []
+    nodes, edges = {}, {}
+    numNodes = 0
+    for filename, seed in zip(filenames, seeds):
+        run, runEdges, runLabels, genes = _read_tables(filename)
+        genotypeMap = numpy.array([genotypes.intern(gene) for gene in genes], dtype=numpy.int64)
+        for label in runLabels:
+            if label not in labels:
+                labels.append(label)
+        labelMap = numpy.array([labels.index(label) for label in runLabels], dtype=numpy.uint8)
+        run = dict(run)
+        run['genotype'] = genotypeMap[run['genotype']] if len(genotypeMap) else run['genotype']
+        run['seed'] = numpy.full(len(run['gen']), str(seed))
+        for key, column in run.items():
+            nodes.setdefault(key, []).append(column)
+        run = dict(runEdges)
+        run['src'] = run['src'] + numNodes
+        run['dst'] = run['dst'] + numNodes
+        run['label'] = labelMap[run['label']] if len(labelMap) else run['label']
+        for key, column in run.items():
+            edges.setdefault(key, []).append(column)
+        numNodes += len(nodes['gen'][-1])
+    if 'fitness' in nodes:
+        nodes['fitness'] = _pad_fitness(nodes['fitness'])
+    numpy.savez_compressed(output,
+        seed=numpy.array([str(seed) for seed in seeds]),
+        labels=numpy.array(labels, dtype=str),
+        **{'genotypes_' + key: column for key, column in genotypes.to_arrays().items()},
+        **{'node_' + key: numpy.concatenate(columns) for key, columns in nodes.items()},
+        **{'edge_' + key: numpy.concatenate(columns) for key, columns in edges.items()})
+    return output
+
+def _pad_fitness(blocks):
+    """
+    @brief      The fitness blocks of many runs, padded with ``nan`` to the
+                widest one.
+    """
+    width = max(block.shape[1] for block in blocks)
+    return [numpy.pad(block, ((0, 0), (0, width - block.shape[1])), constant_values=numpy.nan)
+            for block in blocks]
+
+def _merge_graph_tool(filenames, seeds, output):
+    from graph_tool import Graph, load_graph
+    from graph_tool.generation import graph_union
+
+    merged = None
+    # gene string -> genotype ID in the merged graph; `graph_union` only keeps
+    # the graph properties of the first graph, so every run's `genotype`
+    # vertex property is remapped before the union
+    genotypes = {}
+    for filename, seed in zip(filenames, seeds):
+        graph = load_graph(filename)
+        if 'genotypes' in graph.gp:
+            genotypeMap = numpy.array([genotypes.setdefault(gene, len(genotypes))
+                                       for gene in graph.gp.genotypes], dtype=numpy.int64)
+            if len(genotypeMap):
+                graph.vp.genotype.a = genotypeMap[graph.vp.genotype.a]
+        graph.vp.seed = graph.new_vp('string', vals=[str(seed)] * graph.num_vertices())
+        if merged is None:
+            merged = Graph(graph)
+        else:
+            merged = graph_union(merged, graph, internal_props=True)
+    merged.gp.labels = merged.new_gp('vector<string>')
+    merged.gp.labels = [str(seed) for seed in seeds]
+    if genotypes:
+        merged.gp.genotypes = merged.new_gp('vector<string>')
+        merged.gp.genotypes = list(genotypes)
+    merged.save(output)
+    return output
+
+def run_seeds(experiment, seeds, factory, processes=None, merge_graphs=False, output=None):
+    """
+    @brief      Runs ``experiment(seed, tracker)`` for every seed, on
+                ``processes`` worker processes (all cores by default, ``1``
+                runs in this process).
+
+    @param      merge_graphs  Also merge the saved graphs into ``output``,
+                              ``graphs/<name>-merged.<ext>`` by default
+    @return     The merged summaries, see ``merge_summaries``; ``graph`` is
+                the merged graph if any.
+    """
+    seeds = list(seeds)
+    tasks = [(experiment, factory, seed) for seed in seeds]
+    if processes == 1:
+        summaries = list(map(_run_seed, tasks))
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            summaries = pool.map(_run_seed, tasks, chunksize=1)
+
+    results = merge_summaries(summaries)
+    if merge_graphs and summaries:
+        if output is None:
+            graph = summaries[0]['graph']
+            # log directories are merged into an ArrayAdapter file
+            extension = '.npz' if os.path.isdir(graph) else os.path.splitext(graph)[1]
+            output = os.path.join('graphs', '%s-merged%s' % (factory.name, extension))
+        results['graph'] = merge_graph_files([s['graph'] for s in summaries], seeds, output)
+    return results
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Asynchronous, batched GraphStream client.
+
+``BatchedStreamer`` is a drop-in replacement for ``gephistreamer``'s
+``Streamer`` in ``TrackerHub``. Instead of one blocking HTTP request per node
+or edge, events are queued and a background worker coalesces them into
+multi-action GraphStream payloads sent over a single keep-alive connection.
+"""
+
+import http.client
+import json
+import queue
+import threading
+import time
+
+_STOP = object()
+
+POLICIES = ('block', 'drop', 'sample')
+
+class BatchedStreamer:
+    """
+    @brief      Queues GraphStream actions and sends them in batches from a
+                worker thread.
+
+    @param[(in)] hostname        Gephi host
+    @param[(in)] port            Gephi GraphStreaming port
+    @param[(in)] workspace       Gephi workspace
+    @param[(in)] batch_size      Maximum number of actions per request
+    @param[(in)] flush_interval  Maximum seconds an action waits for its batch
+                                 to fill up
+    @param[(in)] maxsize         Capacity of the queue
+    @param[(in)] policy          What to do when the GA outpaces Gephi:
+                                 ``'block'`` waits for room in the queue,
+                                 ``'drop'`` discards actions while it is full,
+                                 ``'sample'`` keeps one in ``sample`` actions
+                                 once it is half full and drops when full.
+    @param[(in)] sample          Sampling period of the ``'sample'`` policy
+    """
+    def __init__(self, hostname='localhost', port=8080, workspace='workspace1',
+        batch_size=500, flush_interval=0.1, maxsize=10000, policy='block',
+        sample=10, timeout=10):
+
+        if policy not in POLICIES:
+            raise ValueError("policy must be one of %s" % (POLICIES,))
+        self.hostname = hostname
+        self.port = port
+        self.path = '/%s?operation=updateGraph' % workspace
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.sample = sample
+        self.timeout = timeout
+
+        self.sent_actions = 0
+        self.sent_requests = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        # ID of the last batch sent, see `_send`
+        self._batches = 0
+
+        self._queue = queue.Queue(maxsize)
+        self._highWater = maxsize // 2
+        self._seen = 0
+        self._connection = None
+        self._worker = threading.Thread(target=self._run, name='BatchedStreamer', daemon=True)
+        self._worker.start()
+
+    def add_node(self, *nodes):
+        for node in nodes:
+            self.put('an', node.object)
+
+    def change_node(self, *nodes):
+        for node in nodes:
+            self.put('cn', node.object)
+
+    def delete_node(self, *nodes):
+        for node in nodes:
+            self.put('dn', node.object)
+
+    def add_edge(self, *edges):
+        for edge in edges:
+            self.put('ae', edge.object)
+
+    def change_edge(self, *edges):
+        for edge in edges:
+            self.put('ce', edge.object)
+
+    def delete_edge(self, *edges):
+        for edge in edges:
+            self.put('de', edge.object)
+
+    def put(self, event, entities):
+        """
+        @brief      Queues one GraphStream action.
+
+        @param      event     The GraphStream event, like ``'an'`` or ``'ae'``
+        @param      entities  ``{id: attributes}`` of the entities
+        """
+        if self.policy == 'block':
+            self._queue.put((event, entities))
+            return
+
+        if self.policy == 'sample' and self._queue.qsize() >= self._highWater:
+            self._seen += 1
+            if self._seen % self.sample:
+                self.dropped += 1
+                return
+        try:
+            self._queue.put_nowait((event, entities))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """
+        @brief      Blocks until every queued action has been sent.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        @brief      Sends the remaining actions and stops the worker.
+        """
+        self._queue.put(_STOP)
+        self._worker.join()
+        if self._connection is not None:
+            self._connection.close()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._send(batch)
+            except Exception as error:
+                # say an attribute json cannot encode: the batch is lost, but
+                # the worker must go on or `flush` and `close` would hang
+                self.errors += 1
+                self.last_error = error
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def payload(batch):
+        """
+        @brief      Coalesces consecutive actions of the same event into one
+                    GraphStream object, one object per line.
+        """
+        events = []
+        for event, entities in batch:
+            if events and event in events[-1]:
+                events[-1][event].update(entities)
+            else:
+                events.append({event: dict(entities)})
+        return '\r\n'.join(json.dumps(e) for e in events)
+
+    def _send(self, batch):
+        """
+        @brief      POSTs ``batch``, retrying once on a connection error (a
+                    stale keep-alive connection) or a 5xx response. Actions
+                    are keyed by node and edge ID, so a replayed batch adds no
+                    duplicates, and the request carries the ID of the batch
+                    (``X-Batch-Id``), the same on the retry. The batch counts
+                    as sent on a 2xx response only.
+        """
+        body = self.payload(batch).encode()
+        self._batches += 1
+        headers = {'Content-Type': 'application/json', 'X-Batch-Id': str(self._batches)}
+        for attempt in range(2):
+            try:
+                if self._connection is None:
+                    self._connection = http.client.HTTPConnection(
+                        self.hostname, self.port, timeout=self.timeout)
+                self._connection.request('POST', self.path, body, headers)
+                response = self._connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as error:
+                if self._connection is not None:
+                    self._connection.close()
+                self._connection = None
+                self.last_error = error
+                continue
+            if 200 <= response.status < 300:
+                self.sent_requests += 1
+                self.sent_actions += sum(len(entities) for _, entities in batch)
+                return
+            self.last_error = http.client.HTTPException(
+                'Gephi GraphStream error [status=%d]' % response.status)
+            if response.status < 500:
+                break
+        self.errors += 1
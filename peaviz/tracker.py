@@ -5,8 +5,7 @@ Track evolution dynamics like individual interactions, fitness statistics. This
 information is used to create the Complex Network.
 """
 import random
-import gephistreamer.graph as graph
-import gephistreamer.streamer as streamer
+from .registry import streamer as make_streamer
 
 def compact_str(container):
 	if type(container) in [list, tuple, set]:
@@ -17,11 +16,27 @@ def compact_str(container):
 class TrackerHub:
 	"""
 	@brief      Coordinates all trackers for a (sub) population.
+
+	Pass a `peaviz.streaming.BatchedStreamer` as `streamer` to queue nodes and
+	edges on a background worker instead of making one request per emit. A
+	streamer name is built by `peaviz.registry.streamer`; by default, a
+	`gephistreamer` REST streamer is created on the first emit.
 	"""	
-	def __init__(self, streamer=streamer.Streamer(streamer.GephiREST())):
-		self.streamer = streamer
+	def __init__(self, streamer=None):
+		if isinstance(streamer, str):
+			streamer = make_streamer(streamer)
+		self._streamer = streamer
 		self._bucket = {}
 
+	@property
+	def streamer(self):
+		if self._streamer is None:
+			self._streamer = make_streamer()
+		return self._streamer
+	@streamer.setter
+	def streamer(self, newStreamer):
+		self._streamer = newStreamer
+
 	@property
 	def bucket(self):
 		return self._bucket
@@ -34,16 +49,24 @@ class TrackerHub:
 
 	def emitNode(self, node):
 		response = self.streamer.add_node(node)
-		if response.status_code != 200:
-			print("Gephi GraphStream error. [status=%d]" % response.status)
+		# a `BatchedStreamer` queues the node and returns no response
+		if response is not None and response.status_code != 200:
+			print("Gephi GraphStream error. [status=%d]" % response.status_code)
 		return response
 
 	def emitEdge(self, edge):
 		response = self.streamer.add_edge(edge)
-		if response.status_code != 200:
-			print("Gephi GraphStream error. [status=%d]" % response.status)
+		if response is not None and response.status_code != 200:
+			print("Gephi GraphStream error. [status=%d]" % response.status_code)
 		return response
 
+	def flush(self):
+		"""
+		@brief      Waits until a `BatchedStreamer` has sent everything queued.
+		"""
+		if hasattr(self._streamer, 'flush'):
+			self.streamer.flush()
+
 	def __getitem__(self, tracker_index):
 		return self.bucket.get(tracker_index, None)
 
@@ -105,11 +128,13 @@ class Tracker:
 				# this will (correctly) overwrite
 				attributes.update(k, compact_str(self.attributes[k]))
 
+		from gephistreamer import graph
 		node = graph.Node(str(self.index), **attributes)
 		response = self.hub.emitNode(node)
 		#print(response.content)
 
 	def insertEdge(self, directed=True, **kwargs):
+		from gephistreamer import graph
 		for parent in self.parents:
 			assert(isinstance(parent, int))
 			eid = str(self.index) + '>' + str(parent)
@@ -1 +1,6 @@
 from .tracker_base import TrackerBase, PEAvizTrackerAttributeError
+from .proxy import TrackerProxy, TrackedEvaluation
+from .ancestry import AncestryIndex
+from .metrics import NetworkMetrics
+from .sampling import UNTRACKED, LineageSampledTracker, TopKTracker
+from .checkpoint import Checkpointer
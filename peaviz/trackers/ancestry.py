@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Ancestry index, built while tracking.
+
+Every node gets a bitset of its ancestors (itself included) over node IDs,
+the union of its parents' bitsets. Since parents are always deployed before
+their children, node ``i`` only needs the bits ``0..i``.
+
+- ``is_ancestor`` tests one bit, O(1).
+- ``common_ancestors`` ANDs the bitsets of a group.
+- ``mrca`` is the most recent common ancestor, the highest set bit of that AND
+  (node IDs grow with time).
+
+The bitsets take about ``n**2 / 16`` bytes for ``n`` nodes; for large runs,
+combine the index with ``TrackerBase.collect`` or a sampling tracker.
+
+    tracker = TrackerBase(ArrayAdapter, ancestry=True, ...)
+    ...
+    front = [ind.cid for ind in tools.sortNondominated(pop, len(pop), True)[0]]
+    tracker.ancestry.mrca(front)
+"""
+
+import numpy
+
+def _bit(nodeID):
+    return nodeID >> 3, 1 << (nodeID & 7)
+
+class AncestryIndex:
+    """
+    @brief      Ancestor bitsets of every node that got parents through
+                ``add``. Nodes without parents are their own only ancestor.
+    """
+    def __init__(self):
+        # node ID -> numpy.uint8 bitset, bit `i & 7` of byte `i >> 3` is node `i`
+        self._rows = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def row(self, nodeID):
+        """
+        @brief      The ancestor bitset of ``nodeID``, read-only.
+        """
+        row = self._rows.get(nodeID)
+        if row is None:
+            byte, mask = _bit(nodeID)
+            row = numpy.zeros(byte + 1, dtype=numpy.uint8)
+            row[byte] = mask
+        return row
+
+    def add(self, childID, parentIDs):
+        """
+        @brief      Records that ``parentIDs`` are parents of ``childID``.
+                    ``TrackerBase.setParents`` calls this.
+        """
+        parentRows = [self.row(parentID) for parentID in parentIDs]
+        row = self._rows.get(childID)
+        size = max([len(r) for r in parentRows] + [(childID >> 3) + 1])
+        if row is None:
+            row = numpy.zeros(size, dtype=numpy.uint8)
+            byte, mask = _bit(childID)
+            row[byte] = mask
+        elif len(row) < size:
+            row = numpy.concatenate([row, numpy.zeros(size - len(row), dtype=numpy.uint8)])
+        for parentRow in parentRows:
+            row[:len(parentRow)] |= parentRow
+        self._rows[childID] = row
+
+    def is_ancestor(self, ancestorID, nodeID):
+        """
+        @return     ``True`` if ``nodeID`` descends from ``ancestorID``. A node
+                    is not its own ancestor.
+        """
+        if ancestorID == nodeID:
+            return False
+        row = self._rows.get(nodeID)
+        if row is None:
+            return False
+        byte, mask = _bit(ancestorID)
+        return byte < len(row) and bool(row[byte] & mask)
+
+    def ancestors(self, nodeID):
+        """
+        @return     The IDs of the ancestors of ``nodeID``, ascending.
+        """
+        row = self.row(nodeID)
+        ancestors = numpy.flatnonzero(numpy.unpackbits(row, bitorder='little'))
+        return ancestors[ancestors != nodeID]
+
+    def _common(self, nodeIDs):
+        rows = [self.row(nodeID) for nodeID in nodeIDs]
+        if not rows:
+            raise ValueError('no node IDs given')
+        common = rows[0][:min(map(len, rows))].copy()
+        for row in rows[1:]:
+            common &= row[:len(common)]
+        return common
+
+    def common_ancestors(self, nodeIDs):
+        """
+        @return     The IDs of the nodes that are ancestors of all ``nodeIDs``
+                    (or one of them), ascending.
+        """
+        return numpy.flatnonzero(numpy.unpackbits(self._common(nodeIDs), bitorder='little'))
+
+    def mrca(self, nodeIDs):
+        """
+        @return     The most recent common ancestor of ``nodeIDs``, ``None`` if
+                    they share none. It is one of them if it is the ancestor
+                    of all the others.
+        """
+        common = self._common(nodeIDs)
+        nonzero = numpy.flatnonzero(common)
+        if not len(nonzero):
+            return None
+        byte = int(nonzero[-1])
+        return (byte << 3) + int(common[byte]).bit_length() - 1
+
+    def mrca_batch(self, groups):
+        """
+        @return     ``mrca`` of every group of node IDs.
+        """
+        return [self.mrca(group) for group in groups]
+
+    def remap(self, remap):
+        """
+        @brief      Renumbers the index after ``TrackerBase.collect``.
+
+        @param      remap  Old node ID -> new node ID, ``-1`` if removed
+        """
+        remap = numpy.asarray(remap)
+        kept = numpy.flatnonzero(remap >= 0)
+        rows = {}
+        for nodeID, row in self._rows.items():
+            newID = int(remap[nodeID]) if nodeID < len(remap) else -1
+            if newID < 0:
+                continue
+            bits = numpy.unpackbits(row, bitorder='little')
+            # ancestors of a kept node are kept
+            bits = bits[kept[kept < len(bits)]]
+            rows[newID] = numpy.packbits(bits, bitorder='little')
+        self._rows = rows
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Checkpoints of a tracked run, so that a crashed or pre-empted run can go on
+where it stopped.
+
+A checkpoint directory holds
+
+- ``graph-<epoch>/``: the graph, as generation segments (see
+  ``peaviz.adapters.shards``). Every checkpoint only appends the nodes and
+  edges added since the previous one, and the fitness and score updates of
+  older nodes.
+- ``state.pkl``: how many segments and update files belong to the latest
+  checkpoint, the population and the concrete ID of each individual, the
+  generation, the tracker's own state (ID counters, metrics), the states of
+  ``random`` and ``numpy.random`` and any extra objects (logbook, hall of
+  fame...). It is small and rewritten atomically.
+
+``TrackerBase.collect`` renumbers the nodes, the next checkpoint then starts a
+new epoch and writes the whole graph once. The ancestry index is not written,
+``resume`` rebuilds it from the PARENT_OF edges.
+
+    tracker = TrackerBase(ArrayAdapter, seed_str=..., name=..., checkpoint=True, checkpoint_every=10)
+    if os.path.exists(tracker.checkpointer.path):
+        pop, start, extra = tracker.resume()
+        logbook = extra['logbook']
+    ...
+    for gen in range(start + 1, NGEN + 1):
+        ...
+        tracker.checkpoint(pop, gen, logbook=logbook)
+"""
+
+import os
+import pickle
+import random
+import shutil
+
+import numpy
+
+from ..adapters.shards import ShardReader, ShardWriter
+
+STATE = 'state.pkl'
+
+class Checkpointer:
+    """
+    @brief      Writes and reads the checkpoints of a tracker.
+
+    @param      path   The checkpoint directory
+    @param      every  Generations between checkpoints
+    """
+    def __init__(self, path, every=1):
+        self.path = path
+        self.every = every
+        self.epoch = 0
+        # the ShardWriter of the current epoch, created on the first write
+        self.writer = None
+
+    def _graph_path(self, epoch):
+        return os.path.join(self.path, 'graph-%d' % epoch)
+
+    def updated(self, fitnesses, scores):
+        """
+        @brief      ``TrackerBase.flushUpdates`` calls this with the updates it
+                    sends to the adapter.
+        """
+        if self.writer is not None:
+            self.writer.updated(fitnesses, scores)
+
+    def reset(self):
+        """
+        @brief      Node IDs changed, the next checkpoint writes the whole
+                    graph again.
+        """
+        if self.writer is not None:
+            self.epoch += 1
+            self.writer = None
+
+    def due(self, gen):
+        return gen % self.every == 0
+
+    def write(self, tracker, population, gen, extra):
+        """
+        @brief      Writes a checkpoint, see ``TrackerBase.checkpoint``.
+
+        @return     The path of the state file.
+        """
+        adapter = tracker.adapter
+        tracker.flushUpdates()
+        if self.writer is None:
+            graphPath = self._graph_path(self.epoch)
+            if os.path.exists(graphPath):
+                # left by a crash before the first checkpoint of this epoch
+                shutil.rmtree(graphPath)
+            os.makedirs(self.path, exist_ok=True)
+            self.writer = ShardWriter(graphPath, adapter.seed, adapter.name)
+        self.writer.write(adapter)
+        segments, updates = self.writer.position()
+
+        state = {
+            'epoch'      : self.epoch,
+            'segments'   : segments,
+            'updates'    : updates,
+            'gen'        : gen,
+            'population' : population,
+            'cids'       : [individual.cid for individual in population],
+            'tracker'    : tracker.checkpoint_state(),
+            'random'     : random.getstate(),
+            'numpy'      : numpy.random.get_state(),
+            'extra'      : extra
+        }
+        filename = os.path.join(self.path, STATE)
+        with open(filename + '.tmp', 'wb') as f:
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(filename + '.tmp', filename)
+
+        # the previous epochs are no longer referenced
+        for epoch in range(self.epoch):
+            if os.path.exists(self._graph_path(epoch)):
+                shutil.rmtree(self._graph_path(epoch))
+        return filename
+
+    def read(self, tracker):
+        """
+        @brief      Loads the latest checkpoint into ``tracker``, whose adapter
+                    must be empty, see ``TrackerBase.resume``.
+        """
+        with open(os.path.join(self.path, STATE), 'rb') as f:
+            state = pickle.load(f)
+        adapter = tracker.adapter
+        if adapter.numNodes():
+            raise ValueError('checkpoints are restored into an empty adapter')
+
+        graphPath = self._graph_path(state['epoch'])
+        reader = ShardReader(graphPath, cache=1, segments=state['segments'], updates=state['updates'])
+        for index in range(len(reader.segments)):
+            segment = reader.segment(index)
+            nodes = dict(segment.nodes, genotype=segment.nodes['local_genotype'])
+            firstID = adapter.load_tables(nodes, segment.edges, reader.labels, segment.genotypes)
+            if len(nodes['id']) and firstID != nodes['id'][0]:
+                raise ValueError('segment %d starts at node %d, not %d'
+                                 % (index, nodes['id'][0], firstID))
+            if tracker.ancestry is not None:
+                _add_parents(tracker.ancestry, segment.edges, reader.labels.index(tracker.PARENT_TAG)
+                             if tracker.PARENT_TAG in reader.labels else None)
+        fitnesses, scores = reader.late_updates()
+        adapter.update_evaluations({nodeID: fitness.tolist() for nodeID, fitness in fitnesses.items()}, scores)
+
+        self.epoch = state['epoch']
+        self.writer = ShardWriter.reopen(graphPath, state['segments'], state['updates'])
+        tracker.restore_state(state['tracker'])
+        random.setstate(state['random'])
+        numpy.random.set_state(state['numpy'])
+        population = state['population']
+        for individual, cid in zip(population, state['cids']):
+            individual.cid = cid
+        return population, state['gen'], state['extra']
+
+def _add_parents(ancestry, edges, code):
+    """
+    @brief      Replays the PARENT_OF edges of a segment into ``ancestry``.
+    """
+    if code is None:
+        return
+    parentOf = edges['label'] == code
+    src, dst = edges['src'][parentOf], edges['dst'][parentOf]
+    order = numpy.argsort(dst, kind='stable')
+    src, dst = src[order], dst[order]
+    children, starts = numpy.unique(dst, return_index=True)
+    for childID, parentIDs in zip(children.tolist(), numpy.split(src, starts[1:])):
+        ancestry.add(childID, parentIDs.tolist())
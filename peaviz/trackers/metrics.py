@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Network statistics kept up to date while tracking, so that runs can be
+characterized without loading the graph.
+
+Every node and edge insertion is O(1). ``compile`` summarizes the current
+generation and fits the DEAP logbook:
+
+    tracker = TrackerBase(ArrayAdapter, metrics=True, ...)
+    logbook.header = ['gen', 'nevals'] + NetworkMetrics.FIELDS
+    for gen in range(1, NGEN+1):
+        with tracker.generation(gen, population=len(pop)):
+            ...
+        logbook.record(gen=gen, nevals=nevals, **tracker.metrics.compile())
+"""
+
+def _move(histogram, old, new):
+    """
+    @brief      Moves one count from bin ``old`` to bin ``new``.
+    """
+    histogram[old] -= 1
+    if new == len(histogram):
+        histogram.append(0)
+    histogram[new] += 1
+
+class NetworkMetrics:
+    """
+    @brief      Degree distributions, offspring counts, selection pressure and
+                lineage depth of the tracked network.
+
+                The depth of a node is 0 for individuals without parents, else
+                one more than the deepest of its parents.
+
+                Offspring statistics are taken over the parental population,
+                individuals without offspring included. Its size is given to
+                ``begin`` (or ``compile``); if it is not, the parental
+                population is taken to be the nodes born in the previous
+                generation, plus any older node that got offspring.
+    """
+
+    FIELDS = ['births', 'edges', 'population', 'parents', 'offspring_mean',
+              'offspring_per_parent', 'offspring_max', 'crow_index', 'depth_mean', 'depth_max']
+
+    def __init__(self):
+        # per node
+        self._inDegree = []
+        self._outDegree = []
+        self._depth = []
+        # number of nodes per in/out-degree, offspring count is the out-degree
+        # over PARENT_OF edges
+        self.in_degrees = [0]
+        self.out_degrees = [0]
+        self.offspring = [0]
+        self._offspring = []
+        self.nodes = 0
+        self.edges = 0
+        self.mirrors = 0
+        self.history = []
+        # node IDs born in the current and in the previous generation
+        self._born = []
+        self._previous = []
+        self._reset(None)
+
+    def _reset(self, gen, population=None):
+        self.gen = gen
+        self._population = population
+        self._births = 0
+        self._edges = 0
+        self._depthSum = 0
+        self._depthMax = 0
+        # parent ID -> children in this generation
+        self._children = {}
+
+    def _grow(self, nodeID):
+        missing = nodeID + 1 - len(self._depth)
+        if missing > 0:
+            self._inDegree.extend([0] * missing)
+            self._outDegree.extend([0] * missing)
+            self._offspring.extend([0] * missing)
+            self._depth.extend([0] * missing)
+            self.in_degrees[0] += missing
+            self.out_degrees[0] += missing
+            self.offspring[0] += missing
+
+    def begin(self, gen, population=None):
+        """
+        @param      population  Size of the population the offspring of this
+                                generation are bred from
+        """
+        self._previous, self._born = self._born, []
+        self._reset(gen, population)
+
+    def node(self, nodeID):
+        """
+        @brief      Counts a new node.
+        """
+        self._grow(nodeID)
+        self.nodes += 1
+        self._births += 1
+        self._born.append(nodeID)
+
+    def edge(self, srcID, destID):
+        """
+        @brief      Counts an edge for the degree distributions.
+        """
+        self._grow(max(srcID, destID))
+        degree = self._outDegree[srcID]
+        self._outDegree[srcID] = degree + 1
+        _move(self.out_degrees, degree, degree + 1)
+        degree = self._inDegree[destID]
+        self._inDegree[destID] = degree + 1
+        _move(self.in_degrees, degree, degree + 1)
+        self.edges += 1
+        self._edges += 1
+
+    def mirror(self, srcID, destID):
+        self.edge(srcID, destID)
+        self.mirrors += 1
+
+    def parents(self, childID, parentIDs):
+        """
+        @brief      Counts the PARENT_OF edges of ``childID``.
+        """
+        depth = self._depth
+        self._grow(max([childID] + list(parentIDs)))
+        childDepth = depth[childID]
+        for parentID in parentIDs:
+            self.edge(parentID, childID)
+            count = self._offspring[parentID]
+            self._offspring[parentID] = count + 1
+            _move(self.offspring, count, count + 1)
+            self._children[parentID] = self._children.get(parentID, 0) + 1
+            if depth[parentID] + 1 > childDepth:
+                childDepth = depth[parentID] + 1
+        # depth only grows if parents are added in several calls
+        self._depthSum += childDepth - depth[childID]
+        depth[childID] = childDepth
+        if childDepth > self._depthMax:
+            self._depthMax = childDepth
+
+    def depth(self, nodeID):
+        return self._depth[nodeID]
+
+    def compile(self, population=None):
+        """
+        @brief      Statistics of the current generation, see ``FIELDS``.
+
+                    - ``population``: size of the parental population
+                    - ``parents``: distinct individuals that got offspring
+                    - ``offspring_mean``: offspring per individual of the
+                      parental population
+                    - ``offspring_per_parent``, ``offspring_max``: offspring
+                      per individual that got some
+                    - ``crow_index``: variance over squared mean of the
+                      offspring counts of the parental population, Crow's
+                      opportunity for selection
+                    - ``depth_mean``, ``depth_max``: lineage depth of the
+                      nodes born in this generation
+
+        @param      population  Size of the parental population, overrides
+                                the one given to ``begin``
+        """
+        counts = self._children.values()
+        parents = len(counts)
+        total = sum(counts)
+        if population is None:
+            population = self._population
+        if population is None:
+            children = self._children
+            population = parents + sum(1 for nodeID in self._previous if nodeID not in children)
+        # parents from outside the given population still count
+        population = max(population, parents)
+        mean = total / population if population else 0.0
+        variance = max(sum(c * c for c in counts) / population - mean ** 2, 0.0) if population else 0.0
+        return {
+            'births'               : self._births,
+            'edges'                : self._edges,
+            'population'           : population,
+            'parents'              : parents,
+            'offspring_mean'       : mean,
+            'offspring_per_parent' : total / parents if parents else 0.0,
+            'offspring_max'        : max(counts, default=0),
+            'crow_index'           : variance / mean ** 2 if mean else 0.0,
+            'depth_mean'           : self._depthSum / self._births if self._births else 0.0,
+            'depth_max'            : self._depthMax
+        }
+
+    def end(self, population=None):
+        """
+        @brief      Appends the compiled generation to ``history``.
+        """
+        record = self.compile(population)
+        record['gen'] = self.gen
+        self.history.append(record)
+        return record
+
+    def summary(self):
+        """
+        @brief      Whole-run statistics and distributions.
+        """
+        return {
+            'nodes'       : self.nodes,
+            'edges'       : self.edges,
+            'mirrors'     : self.mirrors,
+            'in_degrees'  : list(self.in_degrees),
+            'out_degrees' : list(self.out_degrees),
+            'offspring'   : list(self.offspring),
+            'depth_max'   : max(self._depth, default=0)
+        }
+
+    def remap(self, remap):
+        """
+        @brief      Renumbers the per-node state after ``TrackerBase.collect``.
+                    Distributions keep counting the removed nodes, they
+                    describe every birth of the run.
+        """
+        kept = [nodeID for nodeID, newID in enumerate(remap.tolist()) if newID >= 0]
+        self._inDegree = [self._inDegree[nodeID] for nodeID in kept]
+        self._outDegree = [self._outDegree[nodeID] for nodeID in kept]
+        self._offspring = [self._offspring[nodeID] for nodeID in kept]
+        self._depth = [self._depth[nodeID] for nodeID in kept]
+        remap = remap.tolist()
+        self._born = [remap[nodeID] for nodeID in self._born if remap[nodeID] >= 0]
+        self._previous = [remap[nodeID] for nodeID in self._previous if remap[nodeID] >= 0]
+        self._children = {remap[nodeID]: count for nodeID, count in self._children.items()
+                          if remap[nodeID] >= 0}
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tracking from worker processes.
+
+A ``TrackerBase`` (and its adapter) lives in the parent process, workers of a
+``multiprocessing.Pool`` would only update a copy of it. Instead, evaluation
+functions running in workers get a ``TrackerProxy`` that records their updates;
+the records travel back with the results and the parent applies them, see
+``TrackerBase.mapEvaluate``.
+"""
+
+FITNESS_UPDATE = 0
+SCORE_UPDATE = 1
+EVALUATION_UPDATE = 2
+
+class TrackerProxy:
+    """
+    @brief      Picklable stand-in for ``TrackerBase`` exposing the calls made
+                during evaluation. Updates are only recorded.
+    """
+    def __init__(self):
+        self.records = []
+
+    def updateFitness(self, indID, fitness):
+        self.records.append((FITNESS_UPDATE, indID, tuple(fitness)))
+
+    def updateScore(self, indID, score):
+        self.records.append((SCORE_UPDATE, indID, score))
+
+    def updateEvaluation(self, indID, fitness, score):
+        self.records.append((EVALUATION_UPDATE, indID, (tuple(fitness), score)))
+
+class TrackedEvaluation:
+    """
+    @brief      Wraps an ``evaluate(individual, tracker)`` function so that it
+                can be sent to worker processes.
+
+                Calling it evaluates ``individual`` against a fresh
+                ``TrackerProxy`` and returns ``(fitness, records)``.
+                ``evaluate`` must be picklable, ie. a module level function
+                (or a ``functools.partial`` of one).
+    """
+    def __init__(self, evaluate):
+        self.evaluate = evaluate
+
+    def __call__(self, individual):
+        proxy = TrackerProxy()
+        fitness = self.evaluate(individual, proxy)
+        return fitness, proxy.records
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Trackers recording a sample of the evolution, so that the graph grows with the
+sample instead of with the population.
+
+- ``LineageSampledTracker`` tracks a random fraction of the lineages.
+- ``TopKTracker`` tracks the ``k`` best individuals of every generation and
+  their ancestors.
+
+Untracked individuals get the concrete ID ``UNTRACKED``. ``setParents``,
+``checkAndAddMirror`` and the fitness/score updates return immediately for
+them, ``breedAndTrack`` needs no change besides passing the parent IDs to
+``deploy``:
+
+    newConcreteIds.append(tracker.deploy(c, generation, parentConcreteIds))
+"""
+
+import collections
+import heapq
+import random
+
+from .tracker_base import TrackerBase
+from ..adapters.genotype import canonical_gene
+
+UNTRACKED = -1
+
+class LineageSampledTracker(TrackerBase):
+    """
+    @brief      Tracks a random ``fraction`` of the initial individuals (and of
+                individuals deployed without parents), and every descendant
+                of a tracked individual through its first parent. Following a
+                single parent keeps the tracked fraction of the population
+                stable, as crossover would otherwise spread tracking to the
+                whole population within a few generations.
+
+                Edges from untracked parents are dropped.
+
+    @param      fraction  Probability that a founder is tracked
+    @param      seed      Seed of the sampling, independent of ``random``
+    """
+    def __init__(self, adapterClass, fraction, seed=None, **kwargs):
+        TrackerBase.__init__(self, adapterClass, **kwargs)
+        self.fraction = fraction
+        self.random = random.Random(seed)
+
+    def deploy(self, individual, gen=0, parentIDs=None):
+        if parentIDs:
+            if parentIDs[0] == UNTRACKED:
+                return UNTRACKED
+        elif self.random.random() >= self.fraction:
+            return UNTRACKED
+        return TrackerBase.deploy(self, individual, gen)
+
+    def setParents(self, childID, parentIDs, gen, otherAttrs={}):
+        if childID == UNTRACKED:
+            return []
+        if UNTRACKED in parentIDs:
+            if type(otherAttrs) == list:
+                otherAttrs = [a for p, a in zip(parentIDs, otherAttrs) if p != UNTRACKED]
+            parentIDs = [p for p in parentIDs if p != UNTRACKED]
+        return TrackerBase.setParents(self, childID, parentIDs, gen, otherAttrs)
+
+    def checkAndAddMirror(self, newID, individual, gen, otherAttrs):
+        if newID == UNTRACKED:
+            return None
+        return TrackerBase.checkAndAddMirror(self, newID, individual, gen, otherAttrs)
+
+    def checkpoint_state(self):
+        return dict(TrackerBase.checkpoint_state(self), random=self.random.getstate())
+
+    def restore_state(self, state):
+        TrackerBase.restore_state(self, state)
+        self.random.setstate(state['random'])
+
+    def flushUpdates(self):
+        # updates of untracked individuals all landed on the same key
+        self._dirtyFitness.pop(UNTRACKED, None)
+        self._dirtyScores.pop(UNTRACKED, None)
+        TrackerBase.flushUpdates(self)
+
+# fields of a shadow record
+_GENE, _GEN, _PARENTS, _MIRROR, _FITNESS, _SCORE = range(6)
+
+class TopKTracker(TrackerBase):
+    """
+    @brief      Tracks the ``k`` individuals of each generation with the
+                highest score, and their ancestors.
+
+                Individuals are first given a provisional (negative) concrete
+                ID and kept in a shadow table. Tracking calls must happen
+                inside ``generation`` blocks: at the end of each, the top
+                ``k`` individuals deployed during the generation are promoted
+                to the adapter together with their shadowed ancestors, in
+                creation order. Shadow records that were not promoted within
+                ``horizon`` generations are discarded, their individuals stay
+                untracked and ancestry is cut there.
+
+                Individuals keep their provisional ID, ``resolve`` maps it to
+                the node ID.
+
+    @param      k        Individuals promoted per generation
+    @param      horizon  Generations an individual can wait in the shadow
+                         table for a promoted descendant
+    """
+    def __init__(self, adapterClass, k, horizon=10, **kwargs):
+        TrackerBase.__init__(self, adapterClass, **kwargs)
+        self.k = k
+        self.horizon = horizon
+        self._nextID = UNTRACKED - 1
+        # provisional ID -> record, see the _GENE.. fields
+        self._shadow = {}
+        # provisional IDs deployed in the current generation, and in each of
+        # the last `horizon` generations
+        self._recent = []
+        self._history = collections.deque()
+        # provisional ID -> node ID
+        self._promoted = {}
+
+    def resolve(self, indID):
+        """
+        @return     The node ID of a concrete ID, ``None`` if untracked.
+        """
+        if indID > UNTRACKED:
+            return indID
+        return self._promoted.get(indID)
+
+    def deploy(self, individual, gen=0, parentIDs=None):
+        provisionalID = self._nextID
+        self._nextID -= 1
+        self._shadow[provisionalID] = [canonical_gene(individual), gen, [], None, None, None]
+        self._recent.append(provisionalID)
+        return provisionalID
+
+    def setParents(self, childID, parentIDs, gen, otherAttrs={}):
+        record = self._shadow.get(childID)
+        if record is None:
+            return []
+        if type(otherAttrs) == dict:
+            otherAttrs = [otherAttrs] * len(parentIDs)
+        record[_PARENTS].extend(
+            (parentID, dict(attrs, gen=gen)) for parentID, attrs in zip(parentIDs, otherAttrs))
+        return []
+
+    def checkAndAddMirror(self, newID, individual, gen, otherAttrs):
+        record = self._shadow.get(newID)
+        if record is not None:
+            record[_MIRROR] = dict(otherAttrs)
+        return None
+
+    def updateFitness(self, indID, fitness):
+        record = self._shadow.get(indID)
+        if record is not None:
+            record[_FITNESS] = fitness
+        elif indID in self._promoted:
+            TrackerBase.updateFitness(self, self._promoted[indID], fitness)
+
+    def updateScore(self, indID, score):
+        record = self._shadow.get(indID)
+        if record is not None:
+            record[_SCORE] = score
+        elif indID in self._promoted:
+            TrackerBase.updateScore(self, self._promoted[indID], score)
+
+    def updateEvaluation(self, indID, fitness, score):
+        self.updateFitness(indID, fitness)
+        self.updateScore(indID, score)
+
+    def end_generation(self):
+        self.promote()
+        TrackerBase.end_generation(self)
+
+    def promote(self):
+        """
+        @brief      Sends the top ``k`` individuals deployed since the last
+                    ``promote`` and their shadowed ancestors to the adapter,
+                    then expires the shadow records older than ``horizon``
+                    generations.
+        """
+        shadow = self._shadow
+        candidates = [p for p in self._recent if p in shadow and shadow[p][_SCORE] is not None]
+        best = heapq.nlargest(self.k, candidates, key=lambda p: shadow[p][_SCORE])
+
+        selected = set()
+        stack = list(best)
+        while stack:
+            provisionalID = stack.pop()
+            if provisionalID in selected or provisionalID not in shadow:
+                continue
+            selected.add(provisionalID)
+            stack.extend(p for p, _ in shadow[provisionalID][_PARENTS] if p < UNTRACKED)
+
+        # provisional IDs decrease with creation, parents come first
+        for provisionalID in sorted(selected, reverse=True):
+            self._materialize(provisionalID)
+
+        self._history.append(self._recent)
+        self._recent = []
+        while len(self._history) > self.horizon:
+            for provisionalID in self._history.popleft():
+                shadow.pop(provisionalID, None)
+
+    def _materialize(self, provisionalID):
+        gene, gen, parents, mirror, fitness, score = self._shadow.pop(provisionalID)
+        nodeID = TrackerBase.deploy(self, gene, gen)
+        self._promoted[provisionalID] = nodeID
+        parentIDs = []
+        for parentID, attrs in parents:
+            parentID = self.resolve(parentID)
+            if parentID is not None:
+                self.add_edge(TrackerBase.PARENT_TAG, parentID, nodeID, attrs['gen'], attrs)
+                parentIDs.append(parentID)
+        if self.ancestry is not None and parentIDs:
+            self.ancestry.add(nodeID, parentIDs)
+        if self.metrics is not None and parentIDs:
+            self.metrics.parents(nodeID, parentIDs)
+        if mirror is not None:
+            TrackerBase.checkAndAddMirror(self, nodeID, gene, gen, mirror)
+        if fitness is not None:
+            TrackerBase.updateFitness(self, nodeID, fitness)
+        if score is not None:
+            TrackerBase.updateScore(self, nodeID, score)
+
+    def rebind(self, individuals, remap):
+        # individuals keep their provisional ID, the promotions are renumbered
+        self._promoted = {provisionalID: int(remap[nodeID])
+                          for provisionalID, nodeID in self._promoted.items()
+                          if remap[nodeID] >= 0}
+        TrackerBase.rebind(self, individuals, remap)
+
+    def checkpoint_state(self):
+        return dict(TrackerBase.checkpoint_state(self), nextID=self._nextID, shadow=self._shadow,
+            recent=self._recent, history=self._history, promoted=self._promoted)
+
+    def restore_state(self, state):
+        TrackerBase.restore_state(self, state)
+        self._nextID = state['nextID']
+        self._shadow = state['shadow']
+        self._recent = state['recent']
+        self._history = state['history']
+        self._promoted = state['promoted']
+
+    def getRawNode(self, indID):
+        return TrackerBase.getRawNode(self, self.resolve(indID))
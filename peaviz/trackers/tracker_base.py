@@ -7,6 +7,18 @@ information is used to create the Complex Network.
 As long as DEAP individuals remember their concrete ID, this should work :)
 """
 
+import contextlib
+import os.path
+
+from .proxy import TrackedEvaluation, FITNESS_UPDATE, SCORE_UPDATE, EVALUATION_UPDATE
+from .ancestry import AncestryIndex
+from .metrics import NetworkMetrics
+from .checkpoint import Checkpointer
+from ..profiling import Profiler
+from .. import registry
+from ..adapters.fanout import FanOutAdapter
+from ..adapters.threaded import ThreadedAdapter
+
 class PEAvizTrackerAttributeError(TypeError):
     """
     Supplied attribute is not of expected type (list, dict) or in case of list
@@ -18,39 +30,139 @@ class TrackerBase:
     MIRROR_TAG = 'EVOLVE'
     PARENT_TAG = 'PARENT_OF'
 
-    def __init__(self, adapterClass, **kwargs):
+    # methods timed when profiling, see ``peaviz.profiling``
+    OPERATIONS = ('deploy', 'setParents', 'checkAndAddMirror', 'updateFitness',
+        'updateScore', 'updateEvaluation', 'flushUpdates', 'applyUpdates',
+        'end_generation', 'collect', 'checkpoint', 'save')
+
+    def __init__(self, adapterClass, profile=False, ancestry=False, metrics=False,
+        checkpoint=None, checkpoint_every=1, threaded=False, **kwargs):
         """
         @brief      Constructs the object.
         
-        @param      adapterClass  The adapter class to use
+        @param      adapterClass  The adapter class to use, or its name in
+                                  ``peaviz.registry``. A list of them sends
+                                  every event to all, see
+                                  ``peaviz.adapters.fanout``.
+        @param      profile       ``True`` or a ``Profiler`` to time the
+                                  tracker and adapter operations, see
+                                  ``self.profiler``
+        @param      ancestry      Maintain ``self.ancestry``, an
+                                  ``AncestryIndex`` of the PARENT_OF edges
+        @param      metrics       Maintain ``self.metrics``, the
+                                  ``NetworkMetrics`` of the tracked network
+        @param      checkpoint    Directory of the checkpoints, ``True`` for
+                                  ``checkpoints/<name>``, see ``checkpoint``
+        @param      checkpoint_every  Generations between checkpoints
+        @param      threaded      Write to the adapter from a background
+                                  thread, ``True`` or the capacity of the
+                                  event queue, see
+                                  ``peaviz.adapters.threaded``
         @param      kwargs        The arguments to the adapter class constructor
         """
-        self.adapter = adapterClass(**kwargs)
+        if isinstance(adapterClass, list):
+            self.adapter = FanOutAdapter.build(adapterClass, **kwargs)
+        else:
+            self.adapter = registry.adapter(adapterClass)(**kwargs)
+        if threaded:
+            self.adapter = ThreadedAdapter(self.adapter) if threaded is True \
+                else ThreadedAdapter(self.adapter, maxsize=threaded)
+        self.currentGen = None
+        # fitness and score updates not yet sent to the adapter, see `flushUpdates`
+        self._dirtyFitness = {}
+        self._dirtyScores = {}
+        self.ancestry = AncestryIndex() if ancestry else None
+        self.metrics = NetworkMetrics() if metrics else None
+        self.checkpointer = None
+        if checkpoint:
+            if not hasattr(self.adapter, 'tables_since'):
+                raise ValueError('%s cannot be checkpointed' % type(self.adapter).__name__)
+            if self.adapter.shards is not None:
+                raise ValueError('sharded adapters are already on disk, checkpoint the population only')
+            if checkpoint is True:
+                checkpoint = os.path.join('checkpoints', self.adapter.name)
+            self.checkpointer = Checkpointer(checkpoint, checkpoint_every)
+        self.profiler = None
+        if profile:
+            self.profiler = profile if isinstance(profile, Profiler) else Profiler()
+            self.profiler.instrument(self, self.OPERATIONS, 'tracker.')
+            self.profiler.instrument(self.adapter, self.adapter.OPERATIONS, 'adapter.')
+
+    def begin_generation(self, gen=None, population=None):
+        """
+        @brief      Starts buffering all tracking calls until
+                    ``end_generation``. Concrete IDs returned in between are
+                    valid immediately, but the adapter applies the writes in
+                    bulk when the generation ends.
+
+        @param      gen         The generation being tracked
+        @param      population  Size of the population the offspring are bred
+                                from, for the offspring statistics of
+                                ``self.metrics``
+        """
+        self.currentGen = gen
+        if self.profiler is not None:
+            self.profiler.generation = gen
+        if self.metrics is not None:
+            self.metrics.begin(gen, population)
+        self.adapter.begin_batch()
 
-    def deploy(self, individual, gen=0):
+    def end_generation(self):
+        """
+        @brief      Flushes everything buffered since ``begin_generation``.
+        """
+        self.flushUpdates()
+        self.adapter.flush()
+        if self.metrics is not None:
+            self.metrics.end()
+        self.currentGen = None
+
+    @contextlib.contextmanager
+    def generation(self, gen=None, population=None):
+        """
+        @brief      Context manager wrapping ``begin_generation`` and
+                    ``end_generation``.
+
+                    with tracker.generation(gen, population=len(pop)):
+                        offspring = varOr(...)
+        """
+        self.begin_generation(gen, population)
+        try:
+            yield self
+        finally:
+            self.end_generation()
+
+    def deploy(self, individual, gen=0, parentIDs=None):
         """
         @brief      Creates a binding uusing the Adapter to a concrete Node
                     object.
         
         @param      individual  The individual (DEAP objects are usually the genes) is set as the **gene**
         @param      gen         The generation in which the individual was created.
+        @param      parentIDs   The concrete IDs of the parents, if known. Only
+                                used by sampling trackers, see
+                                ``peaviz.trackers.sampling``.
         
         @return     The **concrete ID** of this individual.
         """
         concreteID = self.adapter.add_node(
             gene = individual,
             gen  = gen)
+        if self.metrics is not None:
+            self.metrics.node(concreteID)
         return concreteID
 
     def updateFitness(self, indID, fitness):
         """
         @brief      Used to update/set fitness of an individual that has been
-                    **deployed**.
+                    **deployed**. The update is sent to the adapter by
+                    ``flushUpdates``; until then, a later update of the same
+                    individual replaces it.
         
         @param      indID    The individual ID
         @param      fitness  The new fitness
         """
-        self.adapter.update_fitness(indID, fitness)
+        self._dirtyFitness[indID] = fitness
 
     def updateScore(self, indID, score):
         """
@@ -60,7 +172,63 @@ class TrackerBase:
         @param      indID  The individual ID
         @param      score  The score
         """
-        self.adapter.update_score(indID, score)
+        self._dirtyScores[indID] = score
+
+    def updateEvaluation(self, indID, fitness, score):
+        """
+        @brief      ``updateFitness`` and ``updateScore`` in one call.
+        """
+        self._dirtyFitness[indID] = fitness
+        self._dirtyScores[indID] = score
+
+    def flushUpdates(self):
+        """
+        @brief      Sends the pending fitness and score updates to the adapter
+                    in one ``update_evaluations`` call. Called by
+                    ``end_generation`` and ``save``.
+        """
+        if self._dirtyFitness or self._dirtyScores:
+            if self.checkpointer is not None:
+                self.checkpointer.updated(self._dirtyFitness, self._dirtyScores)
+            self.adapter.update_evaluations(self._dirtyFitness, self._dirtyScores)
+            self._dirtyFitness = {}
+            self._dirtyScores = {}
+
+    def applyUpdates(self, records):
+        """
+        @brief      Applies updates recorded by a ``TrackerProxy``.
+
+        @param      records  The ``TrackerProxy.records``
+        """
+        for kind, indID, value in records:
+            if kind == FITNESS_UPDATE:
+                self.updateFitness(indID, value)
+            elif kind == SCORE_UPDATE:
+                self.updateScore(indID, value)
+            elif kind == EVALUATION_UPDATE:
+                self.updateEvaluation(indID, *value)
+
+    def mapEvaluate(self, map, evaluate, individuals):
+        """
+        @brief      Evaluates ``individuals`` with any ``map`` (like
+                    ``multiprocessing.Pool.map``) while keeping the tracked
+                    graph consistent.
+
+                    ``evaluate(individual, tracker)`` is called in the workers
+                    with a ``TrackerProxy`` as ``tracker``; the updates it
+                    records are applied here, in the order of ``individuals``.
+
+        @param      map          The map function, ``toolbox.map`` usually
+        @param      evaluate     The evaluation function
+        @param      individuals  The individuals to evaluate
+
+        @return     The list of fitnesses
+        """
+        fitnesses = []
+        for fitness, records in map(TrackedEvaluation(evaluate), individuals):
+            self.applyUpdates(records)
+            fitnesses.append(fitness)
+        return fitnesses
 
     def setParents(self, childID, parentIDs, gen, otherAttrs={}):
         """
@@ -87,24 +255,35 @@ class TrackerBase:
         for parentID, otherAttr in zip(parentIDs, _otherAttrs):
             edgeID = self.add_edge(TrackerBase.PARENT_TAG, parentID, childID, gen, otherAttr)
             edgeIDs.append(edgeID)
+        if self.ancestry is not None:
+            self.ancestry.add(childID, parentIDs)
+        if self.metrics is not None:
+            self.metrics.parents(childID, parentIDs)
         return edgeIDs
 
     def checkAndAddMirror(self, newID, individual, gen, otherAttrs):
         """
         @brief      Checks with adapter if this individual already exists. If
                     so, adds an appropriate edge to maintain the chain of EVOLVE nodes.
+                    Both lookups are dict hits in the adapter, so this is cheap
+                    enough to call for every offspring.
         
-        @param      newID       The new id
+        @param      newID       The new id, as returned by ``deploy``
         @param      individual  The individual
         @param      gen         The generation
         @param      otherAttrs  The attributes
         
         @return     Edge ID if an edge was added, else None
         """
-        oldID = self.adapter.fetchIndivdual(individual)
+        oldID = self.adapter.fetchIndividual(individual, exclude=newID)
         if oldID is not None:
-            lastID = self.adapter.walk_edge(MIRROR_TAG, oldID)
-            edgeID = self.add_edge(TrackerBase.MIRROR_TAG, lastID, newID, otherAttrs)
+            lastID = self.adapter.walk_edge(TrackerBase.MIRROR_TAG, oldID)
+            if lastID == newID:
+                # already chained
+                return None
+            edgeID = self.add_edge(TrackerBase.MIRROR_TAG, lastID, newID, gen, otherAttrs)
+            if self.metrics is not None:
+                self.metrics.mirror(lastID, newID)
             return edgeID
         else:
             return None
@@ -113,15 +292,124 @@ class TrackerBase:
         attrs['gen'] = gen
         return self.adapter.add_edge(TAG, srcID, destID, attrs)
 
+    def resolve(self, indID):
+        """
+        @return     The node ID of a concrete ID, ``None`` if untracked.
+        """
+        return indID if indID >= 0 else None
+
+    def collect(self, survivors, gen, delay=1, archive=False):
+        """
+        @brief      Prunes extinct lineages: removes the nodes with no path to
+                    a survivor, unless they were created in the last ``delay``
+                    generations. Memory then follows the surviving genealogy
+                    instead of the total number of births.
+
+                    Call it between generations, with the population returned
+                    by ``toolbox.select``. Nodes are renumbered, the ``cid`` of
+                    the survivors is updated and concrete IDs held anywhere
+                    else become invalid. Adapters that cannot renumber their
+                    nodes (``LogAdapter``, ``Neo4jAdapter``, sharded runs)
+                    keep them all, ``collect`` then removes nothing.
+
+                    for gen in range(1, NGEN+1):
+                        with tracker.generation(gen):
+                            pop[:] = ...
+                        tracker.collect(pop, gen, delay=3)
+
+        @param      survivors  The living individuals
+        @param      gen        The current generation
+        @param      delay      Generations a node is kept without descendants
+        @param      archive    Write the removed nodes to disk, see
+                               ``AdapterBase.prune``
+
+        @return     The number of removed nodes.
+        """
+        self.flushUpdates()
+        self.adapter.flush()
+        # the same individual can be selected many times
+        individuals = list({id(ind): ind for ind in survivors}.values())
+        liveIDs = [nodeID for nodeID in map(self.resolve, (ind.cid for ind in individuals))
+                   if nodeID is not None]
+        remap = self.adapter.prune(liveIDs, gen - delay + 1, archive)
+        self.rebind(individuals, remap)
+        if self.ancestry is not None:
+            self.ancestry.remap(remap)
+        if self.metrics is not None:
+            self.metrics.remap(remap)
+        removed = int((remap < 0).sum())
+        if self.checkpointer is not None and removed:
+            self.checkpointer.reset()
+        return removed
+
+    def rebind(self, individuals, remap):
+        """
+        @brief      Renumbers the ``cid`` of ``individuals`` after a ``collect``.
+
+        @param      remap  Old node ID -> new node ID
+        """
+        for ind in individuals:
+            if ind.cid >= 0:
+                ind.cid = int(remap[ind.cid])
+
+    def checkpoint(self, population, gen, force=False, **extra):
+        """
+        @brief      Writes a checkpoint every ``checkpoint_every`` generations:
+                    the graph added since the previous checkpoint, the
+                    ``population`` with the ``cid`` of every individual, and
+                    the tracker state. Call it between generations.
+
+                    ``population`` and ``extra`` (logbook, hall of fame...)
+                    are pickled, the DEAP ``creator`` classes must exist when
+                    resuming.
+
+        @param      gen    The generation that just ended
+        @param      force  Write even if ``gen`` is not a multiple of
+                           ``checkpoint_every``
+
+        @return     The state file written, ``None`` if not due.
+        """
+        if self.checkpointer is None:
+            raise ValueError('checkpoints are off, pass checkpoint= to the tracker')
+        if not force and not self.checkpointer.due(gen):
+            return None
+        return self.checkpointer.write(self, population, gen, extra)
+
+    def resume(self):
+        """
+        @brief      Restores the latest checkpoint into this (new) tracker,
+                    built with the same arguments as the checkpointed one. The
+                    individuals are bound to their existing node IDs again.
+
+        @return     ``(population, gen, extra)``, ``gen`` being the last
+                    generation of the checkpoint.
+        """
+        if self.checkpointer is None:
+            raise ValueError('checkpoints are off, pass checkpoint= to the tracker')
+        return self.checkpointer.read(self)
+
+    def checkpoint_state(self):
+        """
+        @brief      The tracker state that is not in the graph, saved with
+                    every checkpoint. Trackers with own counters extend it.
+        """
+        return {'metrics': self.metrics}
+
+    def restore_state(self, state):
+        self.metrics = state['metrics']
+
     def getRawNode(self, indID):
+        self.flushUpdates()
         return self.adapter.getNode(indID)
 
     def getRawEdge(self, edgeID):
         return self.adapter.getEdge(edgeID)
 
     def save(self):
+        self.flushUpdates()
         file_location = self.adapter.save()
         print('GRAPH SAVED TO:', file_location)
+        return file_location
 
     def numNodes(self):
         return self.adapter.numNodes()
@@ -1,3 +1,4 @@
+import multiprocessing
 import random
 
 import numpy
@@ -25,7 +26,7 @@ def maker(icls, attr, dimension):
     individual.cid = tracker.deploy(individual)
     return individual
 
-def evalKnapsack(individual):
+def evalKnapsack(individual, tracker):
     weight = 0.0
     value = 0.0
     for item in individual:
@@ -34,8 +35,8 @@ def evalKnapsack(individual):
     if len(individual) > MAX_ITEM or weight > MAX_WEIGHT:
         return 10000, 0             # Ensure overweighted bags are dominated
     fitness = weight, value
-    tracker.updateFitness(individual.cid, fitness)
-    tracker.updateScore(individual.cid, sum(map(operator.mul, individual.fitness.weights, fitness)))
+    tracker.updateEvaluation(individual.cid, fitness,
+        sum(map(operator.mul, individual.fitness.weights, fitness)))
     return fitness
 
 def breedAndTrack(algorithm, *parents, generation, otherAttrs):
@@ -50,7 +51,7 @@ def breedAndTrack(algorithm, *parents, generation, otherAttrs):
     # newConcreteIds = map(tracker.deploy, children, generation)
     newConcreteIds = []
     for c in children:
-        newConcreteIds.append(tracker.deploy(c, generation))
+        newConcreteIds.append(tracker.deploy(c, generation, parentConcreteIds))
 
     for child, newCid in zip(children, newConcreteIds):
         child.cid = newCid
@@ -58,6 +59,7 @@ def breedAndTrack(algorithm, *parents, generation, otherAttrs):
             newCid,
             parentConcreteIds,
             generation, otherAttrs)
+        tracker.checkAndAddMirror(newCid, child, generation, otherAttrs)
         # print('made (%03d, %03d) --%03d, %03d--> *(%03d)*' % (parentConcreteIds[0], parentConcreteIds[1], edgeIDs[0], edgeIDs[1], child.cid))
     return children
 
@@ -111,6 +113,7 @@ toolbox.register("select", tools.selNSGA2)
 
 tracker = peaviz.trackers.TrackerBase(
     peaviz.adapters.GraphAdapter,
+    metrics=True,
     seed_str=str(SEED),
     name='small/knapsack0')
 
@@ -126,7 +129,7 @@ def doNSGA(pop, gen):
         
     # Evaluate the individuals with an invalid fitness
     invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
-    fitnesses = toolbox.map(toolbox.evaluate, invalid_ind)
+    fitnesses = tracker.mapEvaluate(toolbox.map, toolbox.evaluate, invalid_ind)
     for ind, fit in zip(invalid_ind, fitnesses):
         ind.fitness.values = fit
     d = toolbox.clone(offspring)
@@ -137,20 +140,22 @@ def doWithNSGA2(seed, logbook, stats):
     
     random.seed(seed)
     
-    pop = toolbox.population(n=MU)
-    # Evaluate the individuals with an invalid fitness
-    fitnesses = toolbox.map(toolbox.evaluate, pop)
-    for ind, fit in zip(pop, fitnesses):
-        ind.fitness.values = fit
+    with tracker.generation(0):
+        pop = toolbox.population(n=MU)
+        # Evaluate the individuals with an invalid fitness
+        fitnesses = tracker.mapEvaluate(toolbox.map, toolbox.evaluate, pop)
+        for ind, fit in zip(pop, fitnesses):
+            ind.fitness.values = fit
 
     record = stats.compile(pop)
-    logbook.record(gen=0, nevals=MU, **record)
+    logbook.record(gen=0, nevals=MU, **record, **tracker.metrics.compile())
     print(logbook.stream)
 
     for gen in range(1, NGEN+1):
-        nevals, pop[:], o = doNSGA(pop, gen)
+        with tracker.generation(gen, population=len(pop)):
+            nevals, pop[:], o = doNSGA(pop, gen)
         record = stats.compile(pop)
-        logbook.record(gen=gen, nevals=nevals, **record)
+        logbook.record(gen=gen, nevals=nevals, **record, **tracker.metrics.compile())
         print(logbook.stream)
     
     print('Total: %d' % tracker.numNodes())
@@ -159,6 +164,10 @@ def doWithNSGA2(seed, logbook, stats):
     return pop
                  
 if __name__ == "__main__":
+    # evaluate on all cores, the tracking updates are applied by `tracker`
+    pool = multiprocessing.Pool()
+    toolbox.register("map", pool.map)
+
     logbook = tools.Logbook()
     logbook.header = ['gen', 'nevals']
 
@@ -169,6 +178,7 @@ if __name__ == "__main__":
     stats.register("max", numpy.max, axis=0)
 
     logbook.header.extend(stats.fields)
+    logbook.header.extend(['parents', 'crow_index', 'depth_mean'])
     
     pop = doWithNSGA2(SEED, logbook, stats)
     #print(len(gs))
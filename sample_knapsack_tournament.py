@@ -26,7 +26,7 @@ def maker(icls, attr, dimension):
     individual.cid = tracker.deploy(individual)
     return individual
 
-def evalKnapsack(individual):
+def evalKnapsack(individual, tracker):
     weight = 0.0
     value = 0.0
     for item in individual:
@@ -35,8 +35,8 @@ def evalKnapsack(individual):
     if len(individual) > MAX_ITEM or weight > MAX_WEIGHT:
         return 10000, 0             # Ensure overweighted bags are dominated
     fitness = weight, value
-    tracker.updateFitness(individual.cid, fitness)
-    tracker.updateScore(individual.cid, sum(map(operator.mul, individual.fitness.weights, fitness)))
+    tracker.updateEvaluation(individual.cid, fitness,
+        sum(map(operator.mul, individual.fitness.weights, fitness)))
     return fitness
 
 def breedAndTrack(algorithm, *parents, generation, otherAttrs):
@@ -48,7 +48,7 @@ def breedAndTrack(algorithm, *parents, generation, otherAttrs):
     # this does not set Cids but just creates nodes in the adapter We can lazy
     # evaluate here, as this is expanded in the for loop below, luckily at the
     # right time.
-    newConcreteIds = map(tracker.deploy, children)
+    newConcreteIds = map(lambda c: tracker.deploy(c, generation, parentConcreteIds), children)
 
     for child, newCid in zip(children, newConcreteIds):
         child.cid = newCid
@@ -56,6 +56,7 @@ def breedAndTrack(algorithm, *parents, generation, otherAttrs):
             newCid,
             parentConcreteIds,
             generation, otherAttrs)
+        tracker.checkAndAddMirror(newCid, child, generation, otherAttrs)
         # print('made (%03d, %03d) --%03d, %03d--> *(%03d)*' % (parentConcreteIds[0], parentConcreteIds[1], edgeIDs[0], edgeIDs[1], child.cid))
     return children
 
@@ -128,7 +129,7 @@ def doTournament(pop, gen):
 
     # Evaluate the individuals with an invalid fitness
     invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
-    fitnesses = toolbox.map(toolbox.evaluate, invalid_ind)
+    fitnesses = tracker.mapEvaluate(toolbox.map, toolbox.evaluate, invalid_ind)
     for ind, fit in zip(invalid_ind, fitnesses):
         ind.fitness.values = fit
 
@@ -138,17 +139,19 @@ def doTournament(pop, gen):
 def doWithTournament(seed, logbook, stats):
     random.seed(seed)
     
-    pop = toolbox.population(n=MU)
-    # Evaluate the individuals with an invalid fitness
-    fitnesses = toolbox.map(toolbox.evaluate, pop)
-    for ind, fit in zip(pop, fitnesses):
-        ind.fitness.values = fit
+    with tracker.generation(0):
+        pop = toolbox.population(n=MU)
+        # Evaluate the individuals with an invalid fitness
+        fitnesses = tracker.mapEvaluate(toolbox.map, toolbox.evaluate, pop)
+        for ind, fit in zip(pop, fitnesses):
+            ind.fitness.values = fit
     record = stats.compile(pop)
     logbook.record(gen=0, nevals=MU, **record)
     print(logbook.stream)
 
     for gen in range(1, NGEN+1):
-        nevals, pop[:] = doTournament(pop, gen)
+        with tracker.generation(gen):
+            nevals, pop[:] = doTournament(pop, gen)
         record = stats.compile(pop)
         logbook.record(gen=gen, nevals=nevals, **record)
         print(logbook.stream)
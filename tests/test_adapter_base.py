@@ -0,0 +1,39 @@
+import numpy
+import pytest
+
+from peaviz.adapters import ArrayAdapter
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+def test_fetch_matches_equal_genes_across_containers():
+    adapter = ArrayAdapter('0', 'index')
+    vectorID = adapter.add_node([3, 1, 2])
+    setID = adapter.add_node({5, 7})
+    assert adapter.fetchIndividual((3, 1, 2)) == vectorID
+    assert adapter.fetchIndividual(numpy.array([3, 1, 2])) == vectorID
+    assert adapter.fetchIndividual({7, 5}) == setID
+    assert adapter.fetchIndividual(frozenset({5, 7})) == setID
+    assert adapter.fetchIndividual([1, 2, 3]) is None
+
+def test_fetch_returns_the_latest_node():
+    adapter = ArrayAdapter('0', 'latest')
+    firstID, otherID, lastID = adapter.add_node([1, 0]), adapter.add_node([0, 1]), adapter.add_node([1, 0])
+    assert adapter.fetchIndividual([1, 0]) == lastID
+    assert adapter.fetchIndividual([1, 0], exclude=lastID) == firstID
+    assert adapter.fetchIndividual([1, 0], exclude=firstID) is None
+    assert adapter.fetchIndividual([0, 1], exclude=lastID) == otherID
+
+def test_index_follows_prune():
+    adapter = ArrayAdapter('0', 'pruned')
+    adapter.add_node([1, 1], gen=0)
+    liveID = adapter.add_node([2, 2], gen=0)
+    cloneID = adapter.add_node([2, 2], gen=1)
+    adapter.add_edge('PARENT_OF', liveID, cloneID, {'gen': 1})
+    remap = adapter.prune([cloneID], before_gen=1)
+    assert remap.tolist() == [-1, 0, 1]
+    assert adapter.fetchIndividual([1, 1]) is None
+    assert adapter.fetchIndividual([2, 2]) == 1
+    assert adapter.fetchIndividual([2, 2], exclude=1) == 0
@@ -0,0 +1,37 @@
+import numpy
+import pytest
+from deap import base, creator
+
+from peaviz import algorithms
+
+creator.create('TestFitness', base.Fitness, weights=(1.0,))
+creator.create('TestIndividual', list, fitness=creator.TestFitness)
+
+def make_toolbox():
+    toolbox = base.Toolbox()
+    toolbox.register('mate', lambda ind1, ind2, generation, otherAttrs: (ind1, ind2))
+    toolbox.register('mutate', lambda ind: (ind,))
+    return toolbox
+
+def population(size):
+    individuals = [creator.TestIndividual([i]) for i in range(size)]
+    for individual in individuals:
+        individual.fitness.values = (1.0,)
+    return individuals
+
+def test_var_or_single_individual_without_crossover():
+    pop = population(1)
+    offspring = algorithms.varOr(pop, make_toolbox(), 5, 0.0, 0.5, 1, rng=numpy.random.default_rng(0))
+    assert len(offspring) == 5
+    assert all(child == [0] for child in offspring)
+
+def test_var_or_single_individual_crossover():
+    with pytest.raises(ValueError):
+        algorithms.varOr(population(1), make_toolbox(), 5, 1.0, 0.0, 1, rng=numpy.random.default_rng(0))
+
+def test_var_or_crossover_mates_distinct_parents():
+    mated = []
+    toolbox = make_toolbox()
+    toolbox.register('mate', lambda ind1, ind2, generation, otherAttrs: mated.append((ind1[0], ind2[0])) or (ind1, ind2))
+    algorithms.varOr(population(3), toolbox, 50, 1.0, 0.0, 1, rng=numpy.random.default_rng(0))
+    assert len(mated) == 50 and all(i != j for i, j in mated)
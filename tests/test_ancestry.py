@@ -0,0 +1,80 @@
+import pytest
+
+from peaviz.adapters import ArrayAdapter
+from peaviz.trackers import AncestryIndex, TrackerBase
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+class Individual(list):
+    cid = None
+
+def family():
+    """
+    0   1   2       roots
+     \\ / \\ /
+      3   4        children
+       \\ /
+        5          grandchild, 9 is far enough to need more bytes
+    """
+    index = AncestryIndex()
+    index.add(3, [0, 1])
+    index.add(4, [1, 2])
+    index.add(5, [3, 4])
+    index.add(9, [5])
+    return index
+
+def test_is_ancestor():
+    index = family()
+    assert index.is_ancestor(0, 5) and index.is_ancestor(3, 9)
+    assert not index.is_ancestor(0, 4)
+    assert not index.is_ancestor(5, 5)
+    assert not index.is_ancestor(5, 3)
+    # IDs past the end of the bitset
+    assert not index.is_ancestor(12, 9)
+
+def test_ancestors():
+    index = family()
+    assert index.ancestors(5).tolist() == [0, 1, 2, 3, 4]
+    assert index.ancestors(9).tolist() == [0, 1, 2, 3, 4, 5]
+    assert index.ancestors(2).tolist() == []
+
+def test_common_ancestors_and_mrca():
+    index = family()
+    assert index.common_ancestors([3, 4]).tolist() == [1]
+    assert index.mrca([3, 4]) == 1
+    assert index.mrca([9, 4]) == 4
+    assert index.mrca([0, 2]) is None
+    assert index.mrca_batch([[3, 4], [5, 9]]) == [1, 5]
+    with pytest.raises(ValueError):
+        index.mrca([])
+
+def test_tracker_keeps_the_index():
+    tracker = TrackerBase(ArrayAdapter, seed_str='0', name='ancestry', ancestry=True)
+    with tracker.generation(0):
+        roots = [tracker.deploy([i], 0) for i in range(3)]
+    with tracker.generation(1):
+        childID = tracker.deploy([3], 1)
+        tracker.setParents(childID, roots[:2], 1)
+    assert tracker.ancestry.ancestors(childID).tolist() == roots[:2]
+
+def test_remap_after_collect():
+    tracker = TrackerBase(ArrayAdapter, seed_str='0', name='remap', ancestry=True)
+    with tracker.generation(0):
+        roots = [Individual([i]) for i in range(4)]
+        for root in roots:
+            root.cid = tracker.deploy(root, 0)
+    with tracker.generation(1):
+        children = [Individual([4]), Individual([5])]
+        for child, parents in zip(children, (roots[:2], roots[1:3])):
+            child.cid = tracker.deploy(child, 1)
+            tracker.setParents(child.cid, [parent.cid for parent in parents], 1)
+    # root 3 has no descendant left
+    tracker.collect(children, 1)
+    first, second = (child.cid for child in children)
+    assert tracker.numNodes() == 5
+    assert tracker.ancestry.ancestors(first).tolist() == [0, 1]
+    assert tracker.ancestry.ancestors(second).tolist() == [1, 2]
+    assert tracker.ancestry.mrca([first, second]) == 1
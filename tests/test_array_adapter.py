@@ -0,0 +1,46 @@
+import numpy
+import pytest
+
+from peaviz.adapters import ArrayAdapter
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+def test_columns_grow():
+    adapter = ArrayAdapter('0', 'grow', capacity=1)
+    nodeIDs = [adapter.add_node([i, 1], gen=i) for i in range(5)]
+    edgeIDs = [adapter.add_edge('PARENT_OF', a, b, {'gen': b}) for a, b in zip(nodeIDs, nodeIDs[1:])]
+    assert nodeIDs == [0, 1, 2, 3, 4] and edgeIDs == [0, 1, 2, 3]
+    assert adapter.node_table()['gen'].tolist() == [0, 1, 2, 3, 4]
+    assert numpy.isnan(adapter.node_table()['fitness']).all()
+    assert adapter.getEdge(3) == {'source': 3, 'target': 4, 'label': 'PARENT_OF', 'gen': 4}
+
+def test_narrower_fitness_is_padded():
+    adapter = ArrayAdapter('0', 'narrow', fitness_width=3)
+    nodeID = adapter.add_node([1])
+    adapter.update_evaluations({nodeID: (1.0, 2.0)}, {nodeID: 0.5})
+    assert adapter.getNode(nodeID)['fitness'][:2].tolist() == [1.0, 2.0]
+    assert numpy.isnan(adapter.getNode(nodeID)['fitness'][2])
+
+@pytest.mark.parametrize('update', [
+    lambda adapter, nodeID: adapter.update_fitness(nodeID, (1.0, 2.0, 3.0)),
+    lambda adapter, nodeID: adapter.update_evaluations({nodeID: (1.0, 2.0, 3.0)}, {}),
+    lambda adapter, nodeID: adapter.update_evaluations({nodeID: (1.0, 2.0, 3.0), nodeID + 1: (1.0,)}, {})])
+def test_wider_fitness_names_fitness_width(update):
+    adapter = ArrayAdapter('0', 'wide')
+    nodeID = adapter.add_node([1])
+    adapter.add_node([2])
+    with pytest.raises(ValueError, match='fitness_width=2'):
+        update(adapter, nodeID)
+
+def test_update_evaluations_mixed_widths():
+    adapter = ArrayAdapter('0', 'mixed')
+    nodeIDs = [adapter.add_node([i]) for i in range(3)]
+    adapter.update_evaluations({nodeIDs[0]: (1.0,), nodeIDs[2]: (3.0, 4.0)}, {nodeIDs[1]: 2.0})
+    fitness = adapter.node_table()['fitness']
+    assert fitness[0, 0] == 1.0 and numpy.isnan(fitness[0, 1])
+    assert numpy.isnan(fitness[1]).all() and fitness[2].tolist() == [3.0, 4.0]
+    assert numpy.isnan(adapter.node_table()['score'][[0, 2]]).all()
+    assert adapter.node_table()['score'][1] == 2.0
@@ -0,0 +1,86 @@
+import random
+
+import numpy
+import pytest
+
+from peaviz.adapters import ArrayAdapter
+from peaviz.trackers import TrackerBase
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+class Individual(list):
+    cid = None
+
+def breed(tracker, pop, gen):
+    with tracker.generation(gen, population=len(pop)):
+        offspring = []
+        for _ in range(len(pop)):
+            parent1, parent2 = random.sample(pop, 2)
+            child = Individual(parent1[:3] + parent2[3:])
+            child[random.randrange(6)] ^= 1
+            child.cid = tracker.deploy(child, gen)
+            tracker.setParents(child.cid, [parent1.cid, parent2.cid], gen)
+            tracker.checkAndAddMirror(child.cid, child, gen, {})
+            tracker.updateEvaluation(child.cid, (float(sum(child)),), float(sum(child)))
+            offspring.append(child)
+        # re-evaluates a survivor, an update of an older segment
+        tracker.updateEvaluation(pop[0].cid, (-1.0,), -float(gen))
+    return offspring
+
+def run(tracker, generations, pop=None, start=0, crash=None):
+    if pop is None:
+        # `resume` restores the state of `random`
+        random.seed(1)
+        with tracker.generation(0):
+            pop = []
+            for _ in range(10):
+                individual = Individual(random.randint(0, 1) for _ in range(6))
+                individual.cid = tracker.deploy(individual, 0)
+                pop.append(individual)
+    for gen in range(start + 1, generations + 1):
+        pop = breed(tracker, pop, gen)
+        if gen == crash:
+            return pop
+        if tracker.checkpointer is not None:
+            tracker.checkpoint(pop, gen)
+    return pop
+
+def assert_same_tables(left, right):
+    for table in ('node_table', 'edge_table'):
+        expected, actual = getattr(left, table)(), getattr(right, table)()
+        for key in expected:
+            numpy.testing.assert_array_equal(expected[key], actual[key])
+    assert list(left.node_genes()) == list(right.node_genes())
+
+def resumed(specs, **kwargs):
+    tracker = TrackerBase(specs, seed_str='0', name='run', checkpoint=True, checkpoint_every=2,
+                          fitness_width=1, **kwargs)
+    pop, gen, _ = tracker.resume()
+    return tracker, run(tracker, 8, pop, gen)
+
+def test_round_trip():
+    reference = TrackerBase(ArrayAdapter, seed_str='0', name='reference', fitness_width=1)
+    run(reference, 8)
+
+    crashed = TrackerBase(ArrayAdapter, seed_str='0', name='run', checkpoint=True,
+                          checkpoint_every=2, fitness_width=1)
+    run(crashed, 8, crash=5)
+    tracker, pop = resumed(ArrayAdapter)
+    assert_same_tables(reference.adapter, tracker.adapter)
+    assert [ind.cid for ind in pop] == list(range(tracker.numNodes() - 10, tracker.numNodes()))
+
+def test_fanout_round_trip():
+    reference = TrackerBase(ArrayAdapter, seed_str='0', name='reference', fitness_width=1)
+    run(reference, 8)
+
+    specs = [ArrayAdapter, ('array', {'seed_str': '0', 'name': 'mirror', 'fitness_width': 1})]
+    crashed = TrackerBase(specs, seed_str='0', name='run', checkpoint=True, checkpoint_every=2,
+                          fitness_width=1)
+    run(crashed, 8, crash=5)
+    tracker, _ = resumed(specs)
+    tracker.adapter.wait()
+    assert_same_tables(reference.adapter, tracker.adapter.primary)
+    assert_same_tables(reference.adapter, tracker.adapter.mirrors[0].adapter)
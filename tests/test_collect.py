@@ -0,0 +1,78 @@
+import random
+
+import numpy
+import pytest
+
+from peaviz.adapters import ArrayAdapter
+from peaviz.adapters.adapter_base import ancestry_mask
+from peaviz.trackers import TrackerBase
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+class Individual(list):
+    cid = None
+
+def generation(tracker, pop, gen, rng):
+    with tracker.generation(gen):
+        offspring = []
+        for _ in range(len(pop)):
+            parent1, parent2 = rng.sample(pop, 2)
+            child = Individual(parent1[:4] + parent2[4:])
+            child[rng.randrange(8)] ^= 1
+            child.cid = tracker.deploy(child, gen)
+            tracker.setParents(child.cid, [parent1.cid, parent2.cid], gen)
+            tracker.checkAndAddMirror(child.cid, child, gen, {})
+            offspring.append(child)
+    # truncation selection: many lineages die out
+    return sorted(pop + offspring, key=sum)[-len(pop):]
+
+def test_collect_keeps_the_lineage_of_survivors():
+    rng = random.Random(2)
+    tracker = TrackerBase(ArrayAdapter, ancestry=True, seed_str='0', name='collect')
+    with tracker.generation(0):
+        pop = [Individual(rng.randint(0, 1) for _ in range(8)) for _ in range(12)]
+        for individual in pop:
+            individual.cid = tracker.deploy(individual, 0)
+    removed = 0
+    for gen in range(1, 9):
+        pop = generation(tracker, pop, gen, rng)
+        removed += tracker.collect(pop, gen, delay=2)
+    assert removed > 0
+
+    adapter = tracker.adapter
+    nodes, edges = adapter.node_table(), adapter.edge_table()
+    # every node left was born recently, or is an ancestor of a survivor or
+    # of a recent node
+    seeds = [individual.cid for individual in pop] + numpy.flatnonzero(nodes['gen'] >= 7).tolist()
+    assert ancestry_mask(adapter.numNodes(), edges['src'], edges['dst'], seeds).all()
+    # survivors were renumbered with their node
+    for individual in pop:
+        assert adapter.getNode(individual.cid)['gene'] == tuple(individual)
+    # so were the ancestry index and the gene index
+    parentOf = edges['label'] == adapter.labels.index(TrackerBase.PARENT_TAG)
+    for individual in pop:
+        parents = edges['src'][parentOf & (edges['dst'] == individual.cid)]
+        for parentID in parents.tolist():
+            assert tracker.ancestry.is_ancestor(parentID, individual.cid)
+    for individual in pop:
+        olderID = adapter.fetchIndividual(individual, exclude=individual.cid)
+        assert olderID is None or adapter.getNode(olderID)['gene'] == tuple(individual)
+
+def test_collect_archives_removed_nodes():
+    tracker = TrackerBase(ArrayAdapter, seed_str='0', name='archive')
+    with tracker.generation(0):
+        pop = [Individual([i]) for i in range(3)]
+        for individual in pop:
+            individual.cid = tracker.deploy(individual, 0)
+    with tracker.generation(1):
+        child = Individual([9])
+        child.cid = tracker.deploy(child, 1)
+        tracker.setParents(child.cid, [pop[0].cid], 1)
+    assert tracker.collect([child], 1, archive=True) == 2
+    assert child.cid == 1
+    with numpy.load('graphs/archive.pruned-1.npz') as data:
+        assert data['node_id'].tolist() == [1, 2]
+        assert data['node_gen'].tolist() == [0, 0]
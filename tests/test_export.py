@@ -0,0 +1,76 @@
+import json
+
+import numpy
+import pytest
+
+from peaviz import export, replay
+from peaviz.adapters import ArrayAdapter
+from peaviz.trackers import TrackerBase
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+def track(name, generations=5):
+    """
+    Two nodes per generation, the second one a clone of the first, each with
+    the first node of the previous generation as parent.
+    """
+    tracker = TrackerBase(ArrayAdapter, seed_str='0', name=name, fitness_width=2)
+    parentID = None
+    for gen in range(generations):
+        with tracker.generation(gen):
+            nodeIDs = [tracker.deploy([gen], gen), tracker.deploy([gen], gen)]
+            for nodeID in nodeIDs:
+                if parentID is not None:
+                    tracker.setParents(nodeID, [parentID], gen)
+                tracker.updateEvaluation(nodeID, (float(gen), -float(gen)), float(nodeID))
+        parentID = nodeIDs[0]
+    return tracker
+
+def test_intern():
+    genotypeIDs, distinct = export._intern(['[1]', '[0]', '[1]', '[2]', '[0]'])
+    assert genotypeIDs.tolist() == [0, 1, 0, 2, 1]
+    assert distinct == ['[1]', '[0]', '[2]']
+
+def test_groups():
+    gens = numpy.array([0, 0, 1, 3, 3, 4, 7])
+    assert export._groups(gens, 2) == [0, 3, 5, 6, 7]
+    assert export._groups(gens, 10) == [0, 7]
+
+def test_adapters_without_tables_are_rejected():
+    with pytest.raises(TypeError, match='has no tables'):
+        export._run(object())
+
+def test_export():
+    pq = pytest.importorskip('pyarrow.parquet')
+    tracker = track('export')
+    run = replay.load(tracker.save())
+    nodes, edges, genotypes = export.export(tracker.adapter, 'exports', gens_per_group=2)
+
+    table = pq.read_table(nodes)
+    assert table.column_names == ['id', 'gen', 'fitness_0', 'fitness_1', 'score', 'genotype']
+    assert table['id'].to_pylist() == list(range(10))
+    numpy.testing.assert_array_equal(table['fitness_1'].to_numpy(), run.nodes['fitness'][:, 1])
+    metadata = table.schema.metadata
+    assert metadata[b'peaviz.name'] == b'export'
+    assert json.loads(metadata[b'peaviz.labels']) == run.labels
+    # one row group per two generations
+    assert pq.ParquetFile(nodes).num_row_groups == 3
+
+    genes = pq.read_table(genotypes).to_pydict()
+    assert genes['gene'] == ['[%d]' % gen for gen in range(5)]
+    assert [genes['gene'][genotypeID] for genotypeID in table['genotype'].to_pylist()] == run.genes
+
+    table = pq.read_table(edges)
+    parents = numpy.array(run.labels)[run.edges['label']] == 'PARENT_OF'
+    assert table['label'].to_pylist().count('PARENT_OF') == numpy.count_nonzero(parents)
+    assert table['gen'].to_pylist() == sorted(table['gen'].to_pylist())
+
+def test_main_reads_saved_runs(capsys):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = track('main', generations=2).save()
+    assert export.main([path, 'exports', '--no-genes', '--compression', 'none']) == 0
+    assert capsys.readouterr().out.splitlines()[-2:] == ['exports/nodes.parquet', 'exports/edges.parquet']
+    assert pq.read_table('exports/nodes.parquet').num_rows == 4
@@ -0,0 +1,104 @@
+import random
+
+import numpy
+import pytest
+
+from peaviz.adapters import ArrayAdapter, FanOutAdapter, LogAdapter, LogReader
+from peaviz.trackers import TrackerBase
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+class Individual(list):
+    cid = None
+
+def evolve(tracker, pop, generations, rng):
+    start = tracker.adapter.primary.node_table()['gen'].max() + 1
+    for gen in range(start, start + generations):
+        with tracker.generation(gen):
+            offspring = []
+            for _ in range(len(pop)):
+                parent1, parent2 = rng.sample(pop, 2)
+                child = Individual(parent1[:2] + parent2[2:])
+                child[rng.randrange(4)] ^= 1
+                child.cid = tracker.deploy(child, gen)
+                tracker.setParents(child.cid, [parent1.cid, parent2.cid], gen)
+                tracker.checkAndAddMirror(child.cid, child, gen, {})
+                tracker.updateEvaluation(child.cid, (float(sum(child)),), float(gen))
+                offspring.append(child)
+            tracker.updateFitness(pop[0].cid, (-1.0,))
+        pop = offspring
+    return pop
+
+def fanout(background):
+    tracker = TrackerBase(FanOutAdapter.build, specs=[ArrayAdapter, ArrayAdapter],
+                          background=background, seed_str='0', name='fanout', fitness_width=1)
+    rng = random.Random(2)
+    with tracker.generation(0):
+        pop = [Individual(rng.randint(0, 1) for _ in range(4)) for _ in range(8)]
+        for individual in pop:
+            individual.cid = tracker.deploy(individual, 0)
+    return tracker, pop, rng
+
+def assert_mirrored(primary, mirror, ids):
+    """
+    Compares the rows of the primary with the mirror rows ``ids`` maps them to.
+    """
+    order = numpy.array([ids[nodeID] for nodeID in range(primary.numNodes())], dtype=numpy.int64)
+    expected, actual = primary.node_table(), mirror.node_table()
+    for key in expected:
+        numpy.testing.assert_array_equal(expected[key], actual[key][order])
+    genes = list(mirror.node_genes())
+    assert list(primary.node_genes()) == [genes[localID] for localID in order.tolist()]
+
+    reverse = numpy.full(len(actual['gen']), -1, dtype=numpy.int64)
+    reverse[order] = numpy.arange(len(order))
+    expected, actual = primary.edge_table(), mirror.edge_table()
+    src, dst = reverse[actual['src']], reverse[actual['dst']]
+    kept = (src >= 0) & (dst >= 0)
+    labels = numpy.array(mirror.labels)[actual['label'][kept]]
+    assert sorted(zip(src[kept].tolist(), dst[kept].tolist(), labels.tolist())) == sorted(
+        zip(expected['src'].tolist(), expected['dst'].tolist(),
+            numpy.array(primary.labels)[expected['label']].tolist()))
+
+@pytest.mark.parametrize('background', [True, False])
+def test_mirror_equals_primary(background):
+    tracker, pop, rng = fanout(background)
+    evolve(tracker, pop, 5, rng)
+    tracker.adapter.wait()
+    primary, mirror = tracker.adapter.primary, tracker.adapter.mirrors[0]
+    assert mirror.ids == {nodeID: nodeID for nodeID in range(primary.numNodes())}
+    for table in ('node_table', 'edge_table'):
+        expected, actual = getattr(primary, table)(), getattr(mirror.adapter, table)()
+        for key in expected:
+            numpy.testing.assert_array_equal(expected[key], actual[key])
+    assert list(primary.node_genes()) == list(mirror.adapter.node_genes())
+    tracker.save()
+
+@pytest.mark.parametrize('background', [True, False])
+def test_mirror_follows_collect(background):
+    tracker, pop, rng = fanout(background)
+    pop = evolve(tracker, pop, 5, rng)
+    before = tracker.numNodes()
+    tracker.collect(pop, 4)
+    assert tracker.numNodes() < before
+    # new events after the renumbering land on the right mirror nodes
+    evolve(tracker, pop, 2, rng)
+    tracker.adapter.wait()
+    primary, mirror = tracker.adapter.primary, tracker.adapter.mirrors[0]
+    assert mirror.adapter.numNodes() == before + 16
+    assert_mirrored(primary, mirror.adapter, mirror.ids)
+
+def test_mirrors_of_another_kind():
+    adapters = [ArrayAdapter('0', 'primary', fitness_width=1), LogAdapter('0', 'log', fitness_width=1)]
+    tracker = TrackerBase(lambda seed_str, name: FanOutAdapter(adapters), seed_str='0', name='kinds')
+    rng = random.Random(3)
+    with tracker.generation(0):
+        pop = [Individual(rng.randint(0, 1) for _ in range(4)) for _ in range(6)]
+        for individual in pop:
+            individual.cid = tracker.deploy(individual, 0)
+    evolve(tracker, pop, 3, rng)
+    tracker.save()
+    assert_mirrored(adapters[0], LogReader('graphs/log.log'), tracker.adapter.mirrors[0].ids)
@@ -0,0 +1,54 @@
+from array import array
+
+import numpy
+
+from peaviz.adapters.genotype import GenotypeStore, canonical_gene, pack_gene, unpack_gene
+
+def roundtrip(gene):
+    return unpack_gene(pack_gene(gene))
+
+def test_binary_genes_keep_their_type():
+    assert roundtrip([0, 1, 1, 0]) == (0, 1, 1, 0)
+    assert all(type(item) is int for item in roundtrip([0, 1, 1, 0]))
+    assert all(type(item) is bool for item in roundtrip([False, True, True]))
+
+def test_integer_vectors_match_across_containers():
+    gene = [3, 0, 7, 2]
+    key = pack_gene(gene)
+    assert pack_gene(tuple(gene)) == key
+    assert pack_gene(numpy.array(gene)) == key
+    assert pack_gene(array('q', gene)) == key
+    assert roundtrip(gene) == tuple(gene)
+
+def test_sets_of_numpy_integers_match_python_integers():
+    assert pack_gene({numpy.int64(4), numpy.int32(1)}) == pack_gene({1, 4})
+    assert roundtrip({numpy.int64(4), numpy.int32(1)}) == frozenset({1, 4})
+
+def test_other_genes_are_kept_as_objects():
+    assert roundtrip([0.5, 1.5]) == (0.5, 1.5)
+    assert roundtrip([[0, 1], [1]]) == ((0, 1), (1,))
+    assert roundtrip('abc') == 'abc'
+
+def test_store_interns_equal_genes_once():
+    store = GenotypeStore()
+    assert store.intern([0, 1]) == store.intern(numpy.array([0, 1])) == 0
+    assert store.intern({2, 5}) == 1
+    assert store.lookup(frozenset({5, 2})) == 1
+    assert store.lookup([1, 0]) is None
+    copy = GenotypeStore.from_arrays(**store.to_arrays())
+    assert copy.get(0) == (0, 1) and copy.get(1) == frozenset({2, 5})
+
+def test_bools_and_ints_are_different_genotypes():
+    store = GenotypeStore()
+    assert canonical_gene([True, False]) == canonical_gene([1, 0])
+    assert store.intern([True, False]) != store.intern([1, 0])
+
+def test_nested_genes():
+    gene = [[1, 2], [3, [4, 5]], {6}]
+    assert canonical_gene(gene) == ((1, 2), (3, (4, 5)), frozenset({6}))
+    assert canonical_gene(numpy.arange(4).reshape(2, 2)) == ((0, 1), (2, 3))
+    store = GenotypeStore()
+    genotypeID = store.intern(gene)
+    assert store.lookup([[1, 2], [3, [4, 5]], {6}]) == genotypeID
+    assert store.lookup(numpy.array([[1, 2], [3, 4]])) is None
+    assert store.get(genotypeID) == ((1, 2), (3, (4, 5)), frozenset({6}))
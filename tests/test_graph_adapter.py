@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip('graph_tool')
+
+from peaviz.adapters.graph_adapter import GraphAdapter
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+def track(adapter, batched):
+    if batched:
+        adapter.begin_batch()
+    nodeIDs = [adapter.add_node([i, i % 2], gen=i // 2) for i in range(6)]
+    edgeIDs = [adapter.add_edge('PARENT_OF', nodeIDs[i // 2], nodeIDs[i], {'gen': i // 2})
+               for i in range(2, 6)]
+    adapter.update_evaluations({nodeID: [nodeID, -nodeID] for nodeID in nodeIDs},
+                               {nodeID: 10 * nodeID for nodeID in nodeIDs})
+    return nodeIDs, edgeIDs
+
+def test_batched_writes_wait_for_flush():
+    adapter = GraphAdapter('0', 'batched')
+    nodeIDs, edgeIDs = track(adapter, batched=True)
+    assert nodeIDs == list(range(6)) and edgeIDs == list(range(4))
+    assert adapter.graph.num_vertices() == 0 and adapter.graph.num_edges() == 0
+    adapter.flush()
+    assert adapter.graph.num_vertices() == 6 and adapter.graph.num_edges() == 4
+
+def test_batched_matches_unbatched():
+    batched, unbatched = GraphAdapter('0', 'batched'), GraphAdapter('0', 'unbatched')
+    track(batched, batched=True)
+    batched.flush()
+    track(unbatched, batched=False)
+    for key in ('gen', 'genotype', 'score'):
+        assert batched.graph.vp[key].a.tolist() == unbatched.graph.vp[key].a.tolist()
+    assert [list(batched.graph.vp.fitness[v]) for v in batched.graph.vertices()] == \
+           [list(unbatched.graph.vp.fitness[v]) for v in unbatched.graph.vertices()]
+    assert [(int(e.source()), int(e.target()), batched.graph.ep.label[e])
+            for e in batched.graph.edges()] == \
+           [(int(e.source()), int(e.target()), unbatched.graph.ep.label[e])
+            for e in unbatched.graph.edges()]
@@ -0,0 +1,64 @@
+import pytest
+
+from peaviz.adapters import LogAdapter
+from peaviz.adapters.log_adapter import LogReader
+from peaviz.trackers import TrackerBase
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+    return tmp_path / 'graphs'
+
+class Individual(list):
+    cid = None
+
+def test_rerun_replaces_the_previous_run():
+    for genes in ([[1, 2], [3]], [[4]]):
+        adapter = LogAdapter('0', 'rerun')
+        for gene in genes:
+            adapter.add_node(gene)
+        adapter.save()
+    assert list(LogReader('graphs/rerun.log').node_genes()) == [(4,)]
+
+def test_other_directories_are_kept(graphs):
+    (graphs / 'other.log').mkdir()
+    (graphs / 'other.log' / 'notes.txt').write_text('keep me')
+    with pytest.raises(FileExistsError, match='not a previous run'):
+        LogAdapter('0', 'other')
+    assert (graphs / 'other.log' / 'notes.txt').exists()
+
+def test_nodes_without_their_gene_are_dropped(graphs):
+    adapter = LogAdapter('0', 'crash')
+    nodeIDs = [adapter.add_node([i]) for i in range(3)]
+    adapter.add_edge('PARENT_OF', nodeIDs[0], nodeIDs[2])
+    adapter.flush()
+    # the node records reached the disk, the last two genes did not
+    genes = graphs / 'crash.log' / 'genes.jsonl'
+    genes.write_bytes(genes.read_bytes().split(b'\n', 1)[0] + b'\n[1')
+
+    reader = LogReader('graphs/crash.log')
+    assert len(reader.nodes) == 1
+    assert list(reader.node_genes()) == [(0,)]
+    assert reader.getNode(0)['gene'] == (0,)
+    assert len(reader.edge_table()['src']) == 0
+
+def test_save_closes_the_files():
+    adapter = LogAdapter('0', 'closed')
+    adapter.add_node([1])
+    files = list(adapter._files.values())
+    adapter.save()
+    assert all(f.closed for f in files)
+    # a later event reopens them for appending
+    adapter.add_node([2])
+    adapter.save()
+    assert list(LogReader('graphs/closed.log').node_genes()) == [(1,), (2,)]
+
+def test_collect_keeps_every_node():
+    tracker = TrackerBase(LogAdapter, seed_str='0', name='collect')
+    with tracker.generation(0):
+        individuals = [Individual([i]) for i in range(3)]
+        for individual in individuals:
+            individual.cid = tracker.deploy(individual, 0)
+    assert tracker.collect(individuals[:1], 2) == 0
+    assert [individual.cid for individual in individuals] == [0, 1, 2]
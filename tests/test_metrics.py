@@ -0,0 +1,47 @@
+import pytest
+
+from peaviz.adapters import ArrayAdapter
+from peaviz.trackers import TrackerBase
+from peaviz.trackers.metrics import NetworkMetrics
+
+def breed(tracker, parentIDs, gen):
+    for parentID in parentIDs:
+        childID = tracker.deploy([gen, parentID], gen)
+        tracker.setParents(childID, [parentID], gen)
+
+def test_truncation_selection_counts_unselected_parents():
+    tracker = TrackerBase(ArrayAdapter, metrics=True, seed_str='0', name='crow')
+    with tracker.generation(0):
+        pop = [tracker.deploy([i], 0) for i in range(10)]
+    # the better half gets two children each
+    with tracker.generation(1, population=len(pop)):
+        breed(tracker, pop[:5] * 2, 1)
+    record = tracker.metrics.history[-1]
+    assert record['population'] == 10 and record['parents'] == 5
+    assert record['offspring_mean'] == 1.0
+    assert record['offspring_per_parent'] == 2.0
+    assert record['crow_index'] == pytest.approx(1.0)
+
+def test_population_defaults_to_previous_births():
+    metrics = NetworkMetrics()
+    metrics.begin(0)
+    for nodeID in range(4):
+        metrics.node(nodeID)
+    metrics.begin(1)
+    metrics.node(4)
+    metrics.node(5)
+    metrics.parents(4, [0])
+    metrics.parents(5, [0])
+    record = metrics.compile()
+    assert record['population'] == 4 and record['parents'] == 1
+    # counts 2, 0, 0, 0: mean 0.5, variance 0.75
+    assert record['crow_index'] == pytest.approx(3.0)
+    assert metrics.compile(population=2)['crow_index'] == pytest.approx(1.0)
+
+def test_equal_offspring_means_no_selection():
+    metrics = NetworkMetrics()
+    metrics.begin(1, population=3)
+    for childID, parentID in zip(range(3, 9), [0, 1, 2] * 2):
+        metrics.node(childID)
+        metrics.parents(childID, [parentID])
+    assert metrics.compile()['crow_index'] == 0.0
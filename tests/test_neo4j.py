@@ -0,0 +1,111 @@
+import sys
+import types
+
+from peaviz.adapters.neo4j_adapter import Neo4jAdapter
+
+class FakeGraph:
+    """
+    @brief      An in-process stand-in for a py2neo ``Graph``, recording the
+                statements it is sent.
+    """
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        # (cypher, parameters) run outside of a transaction
+        self.ran = []
+        # one list of (cypher, parameters) per committed transaction
+        self.transactions = []
+
+    def run(self, cypher, parameters=None):
+        self.ran.append((cypher, parameters))
+        return types.SimpleNamespace(evaluate=lambda: None)
+
+    def begin(self):
+        return FakeTransaction(self)
+
+class FakeTransaction:
+    def __init__(self, graph):
+        self.graph = graph
+        self.statements = []
+
+    def run(self, cypher, parameters=None):
+        self.statements.append((cypher, parameters))
+
+    def commit(self):
+        self.graph.transactions.append(self.statements)
+
+def test_indexes():
+    graph = FakeGraph()
+    Neo4jAdapter('42', graph=graph)
+    assert [cypher for cypher, _ in graph.ran] == [
+        'CREATE INDEX IF NOT EXISTS FOR (n:`42`) ON (n.id)',
+        'CREATE INDEX IF NOT EXISTS FOR (n:`I`) ON (n.id)']
+
+def test_add_node_batching():
+    graph = FakeGraph()
+    adapter = Neo4jAdapter('42', graph=graph, batch_size=3)
+    assert [adapter.add_node([i, 1], gen=0) for i in range(2)] == [0, 1]
+    assert graph.transactions == []
+    adapter.add_node([2, 1], gen=1)
+    (cypher, parameters), = graph.transactions[0]
+    assert cypher == 'UNWIND $rows AS row CREATE (n:`I`:`42`) SET n = row'
+    assert [(row['id'], row['gen'], row['gene']) for row in parameters['rows']] == [
+        (0, 0, [0, 1]), (1, 0, [1, 1]), (2, 1, [2, 1])]
+
+    # a tracked generation is written at once, whatever its size
+    adapter.begin_batch()
+    for i in range(5):
+        adapter.add_node([i], gen=2)
+    assert len(graph.transactions) == 1
+    adapter.flush()
+    (_, parameters), = graph.transactions[1]
+    assert [row['id'] for row in parameters['rows']] == [3, 4, 5, 6, 7]
+
+def test_edges_per_tag():
+    graph = FakeGraph()
+    adapter = Neo4jAdapter('42', graph=graph)
+    adapter.begin_batch()
+    a, b, c = (adapter.add_node([i]) for i in range(3))
+    assert adapter.add_edge('PARENT_OF', a, c, {'gen': 1}) == 0
+    assert adapter.add_edge('EVOLVE', a, b, {'gen': 1}) == 1
+    assert adapter.add_edge('PARENT_OF', b, c, {'gen': 1}) == 2
+    adapter.flush()
+    statements, = graph.transactions
+    edges = {cypher: parameters['rows'] for cypher, parameters in statements[1:]}
+    assert edges == {
+        'UNWIND $rows AS row MATCH (a:`42` {id: row.src}), (b:`42` {id: row.dst}) '
+        'CREATE (a)-[r:`PARENT_OF`]->(b) SET r = row.props': [
+            {'src': 0, 'dst': 2, 'props': {'gen': 1, 'id': 0}},
+            {'src': 1, 'dst': 2, 'props': {'gen': 1, 'id': 2}}],
+        'UNWIND $rows AS row MATCH (a:`42` {id: row.src}), (b:`42` {id: row.dst}) '
+        'CREATE (a)-[r:`EVOLVE`]->(b) SET r = row.props': [
+            {'src': 0, 'dst': 1, 'props': {'gen': 1, 'id': 1}}]}
+    assert adapter.walk_edge('EVOLVE', a) == b
+
+def test_evaluations():
+    graph = FakeGraph()
+    adapter = Neo4jAdapter('42', graph=graph)
+    nodeID = adapter.add_node([1])
+    adapter.flush()
+    adapter.update_fitness(nodeID, (1.0, 2.0))
+    adapter.update_score(nodeID, 0.5)
+    adapter.update_evaluations({}, {nodeID: 0.75})
+    adapter.save()
+    (cypher, parameters), = graph.transactions[-1]
+    assert cypher == 'UNWIND $rows AS row MATCH (n:`42` {id: row.id}) SET n += row.props'
+    assert parameters == {'rows': [{'id': 0, 'props': {'fitness': [1.0, 2.0], 'score': 0.75}}]}
+
+def test_connects_on_first_write(monkeypatch):
+    graphs = []
+    def connect(**kwargs):
+        graphs.append(FakeGraph(**kwargs))
+        return graphs[-1]
+    py2neo = types.SimpleNamespace(database=types.SimpleNamespace(Graph=connect))
+    monkeypatch.setitem(sys.modules, 'py2neo', py2neo)
+
+    adapter = Neo4jAdapter('42', passwd='secret')
+    adapter.add_node([1])
+    assert graphs == []
+    adapter.save()
+    graph, = graphs
+    assert graph.kwargs['password'] == 'secret'
+    assert len(graph.ran) == 2 and len(graph.transactions) == 1
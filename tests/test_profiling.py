@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from peaviz.adapters import ArrayAdapter
+from peaviz.profiling import Operation, Profiler
+from peaviz.trackers import TrackerBase
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+def test_histogram_and_percentiles():
+    stats = Operation()
+    for ns in [100] * 98 + [5000, 70000]:
+        stats.add(ns)
+    assert (stats.count, stats.min, stats.max) == (100, 100, 70000)
+    assert stats.histogram[7] == 98
+    assert stats.percentile(50) == 128
+    assert stats.percentile(99) == 8192
+    assert stats.percentile(100) == 70000
+
+def test_profiling_is_opt_in():
+    tracker = TrackerBase(ArrayAdapter, seed_str='0', name='plain')
+    assert tracker.profiler is None
+    assert 'deploy' not in vars(tracker) and 'add_node' not in vars(tracker.adapter)
+
+def test_tracker_and_adapter_operations_are_timed(tmp_path):
+    tracker = TrackerBase(ArrayAdapter, profile=True, seed_str='0', name='profiled')
+    for gen in range(3):
+        with tracker.generation(gen):
+            nodeID = tracker.deploy([gen], gen)
+            tracker.updateEvaluation(nodeID, (1.0, 1.0), 1.0)
+    profiler = tracker.profiler
+    assert profiler.operations['tracker.deploy'].count == 3
+    assert profiler.operations['adapter.add_node'].count == 3
+    assert profiler.operations['adapter.update_evaluations'].count == 3
+    assert [entry['gen'] for entry in profiler.as_dict()['generations']] == [0, 1, 2]
+    assert profiler.table().splitlines()[0].split()[:2] == ['operation', 'calls']
+    with open(profiler.dump(str(tmp_path / 'profile.json'))) as f:
+        assert json.load(f)['operations']['tracker.deploy']['count'] == 3
+
+def test_errors_are_timed_too():
+    profiler = Profiler()
+
+    class Failing:
+        def run(self):
+            raise RuntimeError('failed')
+
+    failing = profiler.instrument(Failing(), ['run', 'missing'])
+    with pytest.raises(RuntimeError):
+        failing.run()
+    assert list(profiler.operations) == ['run']
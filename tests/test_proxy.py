@@ -0,0 +1,52 @@
+import multiprocessing
+import pickle
+
+import pytest
+
+from peaviz.adapters import ArrayAdapter
+from peaviz.trackers import TrackerBase
+from peaviz.trackers.proxy import TrackedEvaluation, TrackerProxy
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+class Individual(list):
+    cid = None
+
+def evaluate(individual, tracker):
+    fitness = (float(sum(individual)), float(len(individual)))
+    tracker.updateFitness(individual.cid, fitness)
+    tracker.updateScore(individual.cid, fitness[0] / fitness[1])
+    return fitness
+
+def population(tracker):
+    pop = []
+    with tracker.generation(0):
+        for i in range(12):
+            individual = Individual([i % 2, i % 3, i % 5])
+            individual.cid = tracker.deploy(individual, 0)
+            pop.append(individual)
+    return pop
+
+def test_proxy_records_are_picklable():
+    proxy = TrackerProxy()
+    proxy.updateEvaluation(3, [1.0, 2.0], 0.5)
+    assert pickle.loads(pickle.dumps(proxy)).records == [(2, 3, ((1.0, 2.0), 0.5))]
+    fitness, records = TrackedEvaluation(evaluate)(Individual([1, 1]))
+    assert fitness == (2.0, 2.0) and len(records) == 2
+
+def test_process_pool_matches_serial_evaluation():
+    serial = TrackerBase(ArrayAdapter, seed_str='0', name='serial')
+    pop = population(serial)
+    with serial.generation(1):
+        expected = [evaluate(individual, serial) for individual in pop]
+
+    pooled = TrackerBase(ArrayAdapter, seed_str='0', name='pooled')
+    pop = population(pooled)
+    with multiprocessing.Pool(2) as pool, pooled.generation(1):
+        fitnesses = pooled.mapEvaluate(pool.map, evaluate, pop)
+    assert fitnesses == expected
+    for key in ('fitness', 'score'):
+        assert serial.adapter.node_table()[key].tolist() == pooled.adapter.node_table()[key].tolist()
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+import pytest
+
+from peaviz import registry
+from peaviz.adapters import ArrayAdapter
+
+def test_import_loads_no_backend():
+    script = ('import sys, peaviz, peaviz.adapters, peaviz.trackers\n'
+              'from peaviz.adapters import ArrayAdapter\n'
+              'print(" ".join(name for name in ("graph_tool", "neo4j", "py2neo", "gephistreamer")'
+              ' if name in sys.modules))')
+    loaded = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip() == ''
+
+def test_adapter_by_name():
+    assert registry.adapter('array') is ArrayAdapter
+    # classes pass through
+    assert registry.adapter(ArrayAdapter) is ArrayAdapter
+    with pytest.raises(KeyError, match='unknown adapter'):
+        registry.adapter('missing')
+
+def test_register_adapter(monkeypatch):
+    monkeypatch.setitem(registry.ADAPTERS, 'other', 'peaviz.adapters.log_adapter:LogAdapter')
+    from peaviz.adapters.log_adapter import LogAdapter
+    assert registry.adapter('other') is LogAdapter
+
+    registry.register_adapter('other', ArrayAdapter)
+    assert registry.adapter('other') is ArrayAdapter
+
+def test_register_streamer(monkeypatch):
+    monkeypatch.setitem(registry.STREAMERS, 'fake', None)
+    registry.register_streamer('fake', dict)
+    assert registry.streamer('fake', port=1) == {'port': 1}
+
+def test_unavailable_adapter_is_an_attribute_error(monkeypatch):
+    import peaviz.adapters
+
+    # graph-tool is not importable
+    monkeypatch.setitem(sys.modules, 'graph_tool', None)
+    monkeypatch.delitem(sys.modules, 'peaviz.adapters.graph_adapter', raising=False)
+    monkeypatch.delitem(vars(peaviz.adapters), 'GraphAdapter', raising=False)
+    with pytest.raises(AttributeError, match='GraphAdapter is unavailable'):
+        peaviz.adapters.GraphAdapter
+    assert not hasattr(peaviz.adapters, 'MissingAdapter')
@@ -0,0 +1,97 @@
+import json
+
+import numpy
+import pytest
+
+from peaviz import replay
+from peaviz.adapters import ArrayAdapter, LogAdapter
+from peaviz.trackers import TrackerBase
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+class Recorder:
+    """
+    A streamer recording the actions of every frame.
+    """
+    def __init__(self):
+        self.frames = [[]]
+
+    def put(self, event, entities):
+        self.frames[-1].append({event: entities})
+
+    def flush(self):
+        self.frames.append([])
+
+def track(adapterClass, name):
+    """
+    Three generations of two nodes, every child gets both parents of the
+    previous generation.
+    """
+    tracker = TrackerBase(adapterClass, seed_str='0', name=name, fitness_width=1)
+    previous = []
+    for gen in range(3):
+        with tracker.generation(gen):
+            current = [tracker.deploy([gen, i], gen) for i in range(2)]
+            for nodeID in current:
+                if previous:
+                    tracker.setParents(nodeID, previous, gen)
+                tracker.updateEvaluation(nodeID, (float(nodeID),), 0.5 * nodeID)
+        previous = current
+    return tracker.save()
+
+def test_formats_load_the_same_run():
+    npz = replay.load(track(ArrayAdapter, 'array'))
+    track(LogAdapter, 'log')
+    log = replay.load('graphs/log.log/')
+    for table in ('nodes', 'edges'):
+        for key, column in getattr(npz, table).items():
+            if key in getattr(log, table):
+                numpy.testing.assert_array_equal(column, getattr(log, table)[key])
+    assert npz.labels == log.labels
+    assert npz.genes == log.genes == ['[0, 0]', '[0, 1]', '[1, 0]', '[1, 1]', '[2, 0]', '[2, 1]']
+
+def test_frames():
+    run = replay.load(track(ArrayAdapter, 'frames'))
+    frames = [(first, last, nodeIDs.tolist(), edgeIDs.tolist())
+              for first, last, nodeIDs, edgeIDs in replay.frames(run)]
+    assert frames == [(0, 0, [0, 1], []), (1, 1, [2, 3], [0, 1, 2, 3]), (2, 2, [4, 5], [4, 5, 6, 7])]
+
+    # the parents of the first frame's edges come with it
+    frames = list(replay.frames(run, gen_min=2, coalesce=2))
+    assert len(frames) == 1
+    first, last, nodeIDs, edgeIDs = frames[0]
+    assert (first, last) == (2, 2)
+    assert sorted(nodeIDs.tolist()) == [2, 3, 4, 5]
+    assert edgeIDs.tolist() == [4, 5, 6, 7]
+
+def test_replay_sends_one_flush_per_frame():
+    run = replay.load(track(ArrayAdapter, 'replay'))
+    streamer = Recorder()
+    assert replay.replay(run, streamer, fps=0, coalesce=2, chunk=3) == 2
+    first, second, rest = streamer.frames
+    assert rest == []
+    # four nodes in chunks of three, then four edges
+    assert [list(action) for action in first] == [['an'], ['an'], ['ae'], ['ae']]
+    assert first[0]['an']['1'] == {'gen': 0, 'score': 0.5, 'fitness': '1'}
+    assert first[2]['ae']['0'] == {'source': '0', 'target': '2', 'directed': True,
+                                   'label': 'PARENT_OF', 'gen': 1}
+    assert sum(len(action['an']) for action in second if 'an' in action) == 2
+
+def test_missing_values_are_sent_as_null():
+    tracker = TrackerBase(ArrayAdapter, seed_str='0', name='missing', fitness_width=2)
+    tracker.deploy([1], 0)
+    run = replay.load(tracker.save())
+    assert replay.node_attributes(run, 0, genes=True) == {
+        'gen': 0, 'score': None, 'fitness': '', 'gene': '[1]'}
+
+def test_main_writes_the_actions(capsys):
+    path = track(ArrayAdapter, 'main')
+    assert replay.main([path, '--fps', '0', '--output', 'frames.json', '--gen-max', '1']) == 0
+    with open('frames.json') as actions:
+        actions = [json.loads(line) for line in actions]
+    assert sum(len(action.get('an', {})) for action in actions) == 4
+    assert sum(len(action.get('ae', {})) for action in actions) == 4
+    assert capsys.readouterr().out.splitlines()[-1] == '2 frames, 6 nodes, 8 edges'
@@ -0,0 +1,51 @@
+import numpy
+import pytest
+
+from peaviz.adapters import ArrayAdapter, LogAdapter
+from peaviz.runner import TrackerFactory, merge_graph_files, run_seeds
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+    return tmp_path / 'graphs'
+
+def experiment(seed, tracker):
+    with tracker.generation(0):
+        parentID = tracker.deploy([seed, 0], 0)
+    with tracker.generation(1):
+        childID = tracker.deploy([seed, 1], 1)
+        tracker.setParents(childID, [parentID], 1)
+        tracker.updateEvaluation(childID, (1.0, float(seed)), float(seed))
+    return {'best': float(seed)}
+
+@pytest.mark.parametrize('adapterClass', [ArrayAdapter, LogAdapter])
+def test_merge_graphs(adapterClass):
+    results = run_seeds(experiment, [3, 4], TrackerFactory(adapterClass, 'merge'),
+        processes=1, merge_graphs=True)
+    assert results['graph'] == 'graphs/merge-merged.npz'
+    assert results['mean']['best'] == 3.5
+    with numpy.load(results['graph']) as data:
+        assert data['node_seed'].tolist() == ['3', '3', '4', '4']
+        assert data['edge_src'].tolist() == [0, 2] and data['edge_dst'].tolist() == [1, 3]
+        assert data['node_score'][[1, 3]].tolist() == [3.0, 4.0]
+
+def test_sharded_runs_are_not_merged():
+    results = run_seeds(experiment, [1], TrackerFactory(ArrayAdapter, 'sharded', shard_generations=1),
+        processes=1)
+    with pytest.raises(ValueError, match='ShardReader'):
+        merge_graph_files([results['runs'][0]['graph']], [1], 'graphs/merged.npz')
+
+def test_merge_pads_fitness():
+    filenames = []
+    for seed, width in ((1, 2), (2, 3)):
+        tracker = TrackerFactory(ArrayAdapter, 'width', fitness_width=width)(seed)
+        with tracker.generation(0):
+            nodeID = tracker.deploy([seed], 0)
+            tracker.updateEvaluation(nodeID, (1.0,) * width, 1.0)
+        filenames.append(tracker.save())
+    merge_graph_files(filenames, [1, 2], 'graphs/merged.npz')
+    with numpy.load('graphs/merged.npz') as data:
+        fitness = data['node_fitness']
+    assert fitness.shape == (2, 3)
+    assert numpy.isnan(fitness[0, 2]) and fitness[1].tolist() == [1.0, 1.0, 1.0]
@@ -0,0 +1,71 @@
+import pytest
+
+from peaviz.adapters import ArrayAdapter
+from peaviz.trackers import UNTRACKED, LineageSampledTracker, TopKTracker
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+def edges(tracker):
+    table = tracker.adapter.edge_table()
+    return list(zip(table['src'].tolist(), table['dst'].tolist()))
+
+def test_lineages_follow_the_first_parent():
+    tracker = LineageSampledTracker(ArrayAdapter, fraction=0.5, seed=3, seed_str='0', name='lineage')
+    with tracker.generation(0):
+        founders = [tracker.deploy([i], 0) for i in range(40)]
+    tracked = [cid for cid in founders if cid != UNTRACKED]
+    assert 0 < len(tracked) < 40
+    untracked = founders.index(UNTRACKED)
+
+    with tracker.generation(1):
+        childID = tracker.deploy([100], 1, [tracked[0], founders[untracked]])
+        assert tracker.setParents(childID, [tracked[0], founders[untracked]], 1) == [0]
+        orphanID = tracker.deploy([101], 1, [founders[untracked], tracked[0]])
+        assert orphanID == UNTRACKED
+        assert tracker.setParents(orphanID, [founders[untracked], tracked[0]], 1) == []
+        tracker.updateEvaluation(orphanID, (1.0, 1.0), 1.0)
+        tracker.updateEvaluation(childID, (2.0, 2.0), 2.0)
+    assert tracker.numNodes() == len(tracked) + 1
+    assert edges(tracker) == [(tracked[0], childID)]
+    assert tracker.adapter.node_table()['score'].tolist()[childID] == 2.0
+
+def test_top_k_promotes_the_best_and_their_ancestors():
+    tracker = TopKTracker(ArrayAdapter, k=1, seed_str='0', name='topk')
+    with tracker.generation(0):
+        founders = [tracker.deploy([i], 0) for i in range(4)]
+        for score, cid in enumerate(founders):
+            tracker.updateScore(cid, float(score))
+    # the best founder only
+    assert tracker.numNodes() == 1 and tracker.resolve(founders[3]) == 0
+
+    with tracker.generation(1):
+        children = []
+        for i, parents in enumerate([(founders[0], founders[1]), (founders[2], founders[3])]):
+            childID = tracker.deploy([10 + i], 1)
+            tracker.setParents(childID, list(parents), 1)
+            children.append(childID)
+        tracker.updateScore(children[0], 10.0)
+        tracker.updateScore(children[1], 5.0)
+    # the best child, after its shadowed parents in creation order
+    resolved = [tracker.resolve(cid) for cid in founders + children]
+    assert resolved == [1, 2, None, 0, 3, None]
+    assert sorted(edges(tracker)) == [(1, 3), (2, 3)]
+    assert tracker.getRawNode(children[0])['score'] == 10.0
+
+def test_top_k_forgets_after_the_horizon():
+    tracker = TopKTracker(ArrayAdapter, k=1, horizon=1, seed_str='0', name='horizon')
+    with tracker.generation(0):
+        founders = [tracker.deploy([i], 0) for i in range(2)]
+        tracker.updateScore(founders[0], 1.0)
+        tracker.updateScore(founders[1], 0.0)
+    with tracker.generation(1):
+        tracker.updateScore(tracker.deploy([9], 1), 0.0)
+    with tracker.generation(2):
+        childID = tracker.deploy([10], 2)
+        tracker.setParents(childID, [founders[1]], 2)
+        tracker.updateScore(childID, 1.0)
+    assert tracker.resolve(founders[1]) is None
+    assert edges(tracker) == []
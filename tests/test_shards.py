@@ -0,0 +1,38 @@
+import pytest
+
+from peaviz.adapters import ArrayAdapter
+from peaviz.adapters.shards import ShardReader
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+    return tmp_path / 'graphs'
+
+def sharded_run(name, generations):
+    adapter = ArrayAdapter('0', name, shard_generations=1)
+    for gen in range(generations):
+        adapter.add_node([gen, 5], gen)
+        adapter.flush()
+    adapter.save()
+
+def test_rerun_replaces_the_previous_run():
+    sharded_run('rerun', 3)
+    sharded_run('rerun', 1)
+    nodes, edges = ShardReader('graphs/rerun.shards').window(0, 10)
+    assert nodes['gen'].tolist() == [0]
+
+def test_other_directories_are_kept(graphs):
+    (graphs / 'other.shards').mkdir()
+    (graphs / 'other.shards' / 'notes.txt').write_text('keep me')
+    with pytest.raises(FileExistsError, match='not a previous run'):
+        ArrayAdapter('0', 'other', shard_generations=1)
+    assert (graphs / 'other.shards' / 'notes.txt').exists()
+
+def test_prune_keeps_written_nodes():
+    adapter = ArrayAdapter('0', 'pruned', shard_generations=1)
+    for gen in range(3):
+        adapter.add_node([gen], gen)
+        adapter.flush()
+    assert adapter.prune([2], 2).tolist() == [0, 1, 2]
+    assert adapter.numNodes() == 3
@@ -0,0 +1,147 @@
+import http.server
+import json
+import threading
+
+import numpy
+import pytest
+
+from peaviz.streaming import BatchedStreamer
+
+class GephiStub(http.server.ThreadingHTTPServer):
+    """
+    A GraphStream endpoint counting the actions it receives. While ``hold`` is
+    cleared, requests wait before being answered.
+    """
+    def __init__(self):
+        http.server.ThreadingHTTPServer.__init__(self, ('127.0.0.1', 0), GephiHandler)
+        self.requests = []
+        self.received = threading.Event()
+        self.hold = threading.Event()
+        self.hold.set()
+        # status codes of the next responses, 200 once exhausted
+        self.statuses = []
+        self.batchIds = []
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def actions(self):
+        return sum(len(entities) for request in self.requests
+                   for action in request for entities in action.values())
+
+class GephiHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+        assert self.path == '/workspace1?operation=updateGraph'
+        self.server.batchIds.append(self.headers['X-Batch-Id'])
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        if status == 200:
+            self.server.requests.append([json.loads(line) for line in body.split('\r\n')])
+        self.server.received.set()
+        self.server.hold.wait(5)
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def gephi():
+    server = GephiStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.hold.set()
+    server.shutdown()
+    server.server_close()
+
+def fill_while_busy(gephi, streamer, count):
+    """
+    Sends one action, then queues ``count`` more while Gephi holds the first
+    request, so that the queue fills up deterministically.
+    """
+    gephi.hold.clear()
+    streamer.put('an', {'first': {}})
+    assert gephi.received.wait(5)
+    for i in range(count):
+        streamer.put('an', {str(i): {}})
+    gephi.hold.set()
+    streamer.flush()
+
+def test_actions_are_coalesced(gephi):
+    streamer = BatchedStreamer(port=gephi.port, flush_interval=0.5)
+    streamer.put('an', {'1': {'gen': 0}})
+    streamer.put('an', {'2': {'gen': 0}})
+    streamer.put('ae', {'3': {'source': '1', 'target': '2', 'directed': True}})
+    streamer.put('an', {'4': {'gen': 1}})
+    streamer.flush()
+    streamer.close()
+    assert gephi.requests == [[
+        {'an': {'1': {'gen': 0}, '2': {'gen': 0}}},
+        {'ae': {'3': {'source': '1', 'target': '2', 'directed': True}}},
+        {'an': {'4': {'gen': 1}}}
+    ]]
+    assert (streamer.sent_requests, streamer.sent_actions, streamer.errors) == (1, 4, 0)
+
+def test_batches_are_split(gephi):
+    streamer = BatchedStreamer(port=gephi.port, batch_size=10, flush_interval=0.5)
+    for i in range(25):
+        streamer.put('an', {str(i): {}})
+    streamer.close()
+    assert gephi.actions() == streamer.sent_actions == 25
+    assert len(gephi.requests) == streamer.sent_requests == 3
+
+def test_drop_policy(gephi):
+    streamer = BatchedStreamer(port=gephi.port, batch_size=1, maxsize=4, policy='drop')
+    fill_while_busy(gephi, streamer, 20)
+    streamer.close()
+    assert streamer.dropped == 16
+    assert gephi.actions() == streamer.sent_actions == 5
+
+def test_sample_policy(gephi):
+    streamer = BatchedStreamer(port=gephi.port, batch_size=1, maxsize=10, policy='sample', sample=3)
+    fill_while_busy(gephi, streamer, 20)
+    streamer.close()
+    # 5 actions fill the queue to half, then one in 3 is kept until it is full
+    assert streamer.dropped == 10
+    assert gephi.actions() == streamer.sent_actions == 11
+
+def test_bad_batch_does_not_stop_the_worker(gephi):
+    streamer = BatchedStreamer(port=gephi.port, flush_interval=0.01)
+    streamer.put('an', {'1': {'gen': numpy.int64(3)}})
+    flushed = threading.Thread(target=streamer.flush, daemon=True)
+    flushed.start()
+    flushed.join(5)
+    assert not flushed.is_alive()
+    assert streamer.errors == 1 and isinstance(streamer.last_error, TypeError)
+    streamer.put('an', {'2': {'gen': 3}})
+    streamer.close()
+    assert gephi.requests == [[{'an': {'2': {'gen': 3}}}]]
+
+def test_server_errors_are_retried_once(gephi):
+    gephi.statuses = [503]
+    streamer = BatchedStreamer(port=gephi.port, flush_interval=0.01)
+    streamer.put('an', {'1': {}})
+    streamer.flush()
+    assert gephi.batchIds == ['1', '1']
+    assert (streamer.sent_requests, streamer.sent_actions, streamer.errors) == (1, 1, 0)
+
+    gephi.statuses = [500, 502]
+    streamer.put('an', {'2': {}})
+    streamer.close()
+    assert gephi.batchIds[2:] == ['2', '2']
+    assert (streamer.sent_requests, streamer.sent_actions, streamer.errors) == (1, 1, 1)
+    assert '502' in str(streamer.last_error)
+
+def test_client_errors_are_not_retried(gephi):
+    gephi.statuses = [400]
+    streamer = BatchedStreamer(port=gephi.port, flush_interval=0.01)
+    streamer.put('an', {'1': {}})
+    streamer.flush()
+    streamer.put('an', {'2': {}})
+    streamer.close()
+    assert gephi.batchIds == ['1', '2']
+    assert gephi.requests == [[{'an': {'2': {}}}]]
+    assert (streamer.sent_requests, streamer.sent_actions, streamer.errors) == (1, 1, 1)
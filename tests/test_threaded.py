@@ -0,0 +1,127 @@
+import random
+import threading
+
+import numpy
+import pytest
+
+from peaviz.adapters import ArrayAdapter, FanOutAdapter
+from peaviz.adapters.threaded import ThreadedAdapter, Writer
+from peaviz.trackers import TrackerBase
+
+@pytest.fixture(autouse=True)
+def graphs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+
+class Individual(list):
+    cid = None
+
+def evolve(tracker, generations=12, size=20, seed=1):
+    rng = random.Random(seed)
+    with tracker.generation(0):
+        pop = []
+        for _ in range(size):
+            gene = Individual(rng.randint(0, 1) for _ in range(8))
+            gene.cid = tracker.deploy(gene, 0)
+            pop.append(gene)
+    for gen in range(1, generations + 1):
+        with tracker.generation(gen, population=len(pop)):
+            offspring = []
+            for _ in range(size):
+                parent1, parent2 = rng.sample(pop, 2)
+                cut = rng.randrange(8)
+                child = Individual(parent1[:cut] + parent2[cut:])
+                child.cid = childID = tracker.deploy(child, gen)
+                tracker.setParents(childID, [parent1.cid, parent2.cid], gen)
+                tracker.checkAndAddMirror(childID, child, gen, {})
+                tracker.updateEvaluation(childID, (sum(child), 0.0), float(sum(child)))
+                # the GA keeps mutating the individual after deploying it
+                child[0] ^= 1
+                offspring.append(child)
+            pop = offspring
+        if gen % 4 == 0:
+            tracker.collect(pop, gen)
+    return tracker
+
+def tables(adapter):
+    return adapter.node_table(), adapter.edge_table(), list(adapter.node_genes())
+
+def assert_same(left, right):
+    (nodes1, edges1, genes1), (nodes2, edges2, genes2) = left, right
+    assert genes1 == genes2
+    for key in nodes1:
+        numpy.testing.assert_array_equal(nodes1[key], nodes2[key])
+    for key in edges1:
+        numpy.testing.assert_array_equal(edges1[key], edges2[key])
+
+def test_threaded_matches_synchronous():
+    sync = evolve(TrackerBase(ArrayAdapter, seed_str='0', name='sync'))
+    threaded = evolve(TrackerBase(ArrayAdapter, threaded=True, seed_str='0', name='threaded'))
+    threaded.adapter.wait()
+    assert_same(tables(sync.adapter), tables(threaded.adapter.adapter))
+
+def test_small_queue_and_no_flush_barrier():
+    sync = evolve(TrackerBase(ArrayAdapter, seed_str='0', name='sync'))
+    threaded = TrackerBase(ArrayAdapter, seed_str='0', name='threaded')
+    threaded.adapter = ThreadedAdapter(threaded.adapter, maxsize=3, flush_barrier=False)
+    evolve(threaded)
+    threaded.adapter.wait()
+    assert_same(tables(sync.adapter), tables(threaded.adapter.adapter))
+
+def test_fanout_behind_threaded():
+    tracker = evolve(TrackerBase(['array', 'array'], threaded=True, seed_str='0', name='fan'))
+    tracker.adapter.wait()
+    fanout = tracker.adapter.adapter
+    assert isinstance(fanout, FanOutAdapter)
+    fanout.wait()
+    nodes, edges, genes = tables(fanout.mirrors[0].adapter)
+    assert len(genes) >= fanout.primary.numNodes()
+
+def test_save_stops_the_writer_thread():
+    tracker = TrackerBase(ArrayAdapter, threaded=True, seed_str='0', name='saved')
+    evolve(tracker, generations=2)
+    writer = tracker.adapter.writer
+    thread = writer.thread
+    assert thread.is_alive()
+    tracker.save()
+    assert writer.thread is None and not thread.is_alive()
+    # the next event starts a new thread
+    with tracker.generation(3):
+        tracker.deploy([1, 2, 3], 3)
+    assert writer.thread.is_alive()
+    tracker.save()
+
+def test_writer_reports_errors_and_checks_ids():
+    applied = []
+    def apply(event):
+        if event == 'bad':
+            raise ValueError(event)
+        applied.append(event)
+    writer = Writer(apply, maxsize=2)
+    for event in ['a', 'b', 'bad', 'c']:
+        writer.put(event)
+    with pytest.raises(RuntimeError) as error:
+        writer.wait()
+    assert isinstance(error.value.__cause__, ValueError)
+    assert applied == ['a', 'b']
+    writer.close()
+
+    adapter = ThreadedAdapter(ArrayAdapter('0', 'ids'))
+    adapter.adapter.add_edge('PARENT_OF', 0, 0)
+    adapter.add_edge('PARENT_OF', 0, 0)
+    with pytest.raises(RuntimeError):
+        adapter.wait()
+    adapter.close()
+
+def test_wait_does_not_poll():
+    release = threading.Event()
+    writer = Writer(lambda event: release.wait(5))
+    writer.put('slow')
+    waiter = threading.Thread(target=writer.wait)
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive()
+    release.set()
+    waiter.join(5)
+    assert not waiter.is_alive()
+    writer.close()
@@ -0,0 +1,109 @@
+import pytest
+
+from peaviz.adapters import ArrayAdapter
+from peaviz.adapters.adapter_base import AdapterBase
+from peaviz.trackers import TrackerBase
+
+class Recorder(AdapterBase):
+    """
+    An adapter recording the calls it receives.
+    """
+    def __init__(self, seed_str, name):
+        AdapterBase.__init__(self)
+        self.name = name
+        self.calls = []
+        self.nodes = self.edges = 0
+
+    def add_node(self, gene, gen=0, attrs={}):
+        self.calls.append(('add_node', gen))
+        self.nodes += 1
+        return self.nodes - 1
+
+    def add_edge(self, TAG, srcID, destID, attrs={}):
+        self.calls.append(('add_edge', TAG, srcID, destID))
+        self.edges += 1
+        return self.edges - 1
+
+    def update_evaluations(self, fitnesses, scores):
+        self.calls.append(('update_evaluations', dict(fitnesses), dict(scores)))
+
+    def begin_batch(self):
+        self.calls.append(('begin_batch',))
+
+    def flush(self):
+        self.calls.append(('flush',))
+
+    def numNodes(self):
+        return self.nodes
+
+def evolve_edges(tracker):
+    edges = tracker.adapter.edge_table()
+    code = tracker.adapter.labels.index(TrackerBase.MIRROR_TAG)
+    return [(src, dst) for src, dst, label in zip(edges['src'].tolist(), edges['dst'].tolist(),
+                                                  edges['label'].tolist()) if label == code]
+
+def test_equal_siblings_form_a_chain():
+    tracker = TrackerBase(ArrayAdapter, seed_str='0', name='siblings')
+    parentIDs = [tracker.deploy([0, 1, 1], 0), tracker.deploy([1, 0, 1], 0)]
+    # both children deployed before their mirror checks, like the samples do
+    childIDs = [tracker.deploy(set(), 1), tracker.deploy(set(), 1)]
+    for childID in childIDs:
+        tracker.setParents(childID, parentIDs, 1)
+        tracker.checkAndAddMirror(childID, set(), 1, {})
+    assert evolve_edges(tracker) == [(childIDs[0], childIDs[1])]
+
+def test_mirror_chain_follows_older_nodes():
+    tracker = TrackerBase(ArrayAdapter, seed_str='0', name='chain')
+    firstID = tracker.deploy([1, 1], 0)
+    childIDs = [tracker.deploy([1, 1], 1), tracker.deploy([1, 1], 1)]
+    for childID in childIDs:
+        tracker.checkAndAddMirror(childID, [1, 1], 1, {})
+    assert evolve_edges(tracker) == [(firstID, childIDs[0]), (childIDs[0], childIDs[1])]
+
+def test_generation_is_flushed_when_it_closes():
+    tracker = TrackerBase(Recorder, seed_str='0', name='batch')
+    with tracker.generation(0):
+        parentID = tracker.deploy([0], 0)
+        tracker.updateEvaluation(parentID, (1.0,), 1.0)
+    with tracker.generation(1):
+        childID = tracker.deploy([1], 1)
+        tracker.setParents(childID, [parentID], 1)
+        tracker.updateFitness(childID, (2.0,))
+        assert tracker.adapter.calls[-1] == ('add_edge', 'PARENT_OF', 0, 1)
+    assert tracker.adapter.calls == [
+        ('begin_batch',), ('add_node', 0),
+        ('update_evaluations', {0: (1.0,)}, {0: 1.0}), ('flush',),
+        ('begin_batch',), ('add_node', 1), ('add_edge', 'PARENT_OF', 0, 1),
+        ('update_evaluations', {1: (2.0,)}, {}), ('flush',)]
+    assert tracker.currentGen is None
+
+def test_generation_is_flushed_on_errors():
+    tracker = TrackerBase(Recorder, seed_str='0', name='error')
+    with pytest.raises(KeyError):
+        with tracker.generation(3):
+            nodeID = tracker.deploy([0], 3)
+            tracker.updateScore(nodeID, 0.5)
+            raise KeyError('evaluation failed')
+    assert tracker.adapter.calls[-2:] == [('update_evaluations', {}, {0: 0.5}), ('flush',)]
+
+def test_updates_are_coalesced():
+    tracker = TrackerBase(Recorder, seed_str='0', name='coalesce')
+    with tracker.generation(0):
+        firstID, secondID = tracker.deploy([0], 0), tracker.deploy([1], 0)
+        tracker.updateFitness(firstID, (1.0,))
+        tracker.updateEvaluation(secondID, (2.0,), 2.0)
+        tracker.updateFitness(firstID, (3.0,))
+        tracker.updateScore(secondID, 4.0)
+    updates = [call for call in tracker.adapter.calls if call[0] == 'update_evaluations']
+    assert updates == [('update_evaluations', {0: (3.0,), 1: (2.0,)}, {1: 4.0})]
+
+def test_reads_see_pending_updates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'graphs').mkdir()
+    tracker = TrackerBase(ArrayAdapter, seed_str='0', name='pending')
+    nodeID = tracker.deploy([1], 0)
+    tracker.updateEvaluation(nodeID, (1.0, 2.0), 0.5)
+    assert tracker.getRawNode(nodeID)['score'] == 0.5
+    tracker.updateScore(nodeID, 0.75)
+    tracker.save()
+    assert tracker.adapter.node_table()['score'].tolist() == [0.75]